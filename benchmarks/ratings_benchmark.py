@@ -0,0 +1,182 @@
+import argparse
+import time
+
+import numpy as np
+import pandas as pd
+
+import parameters
+import ratings
+
+
+
+# Benchmark of the vectorized spend ratings (ratings.spendRatings) against the original row-wise apply.
+# Run from the repository root with: python -m benchmarks.ratings_benchmark
+# The spend metrics are synthetic z-scores, so no client data is needed.
+
+
+vcutoff = parameters.vcutoff
+dcutoff = parameters.dcutoff
+mincitations = parameters.mincitations
+
+rating_columns = ["Adoption_Rating", "Increase_Rating", "Decrease_Rating", "Replacing_Rating", "NetScore_Rating", "MarketShare_Rating"]
+
+
+# Original row-wise decision trees, kept as the reference path.
+
+def rowRatings(x):
+    if x["Citations"] >= mincitations:
+        #Adoption Rating
+        if np.isnan(x["AdoptionP_Delta_sos_SurveyZ"]) == False and np.isnan(x["AdoptionP_Delta_yoy_SurveyZ"]) == False:
+            if x["AdoptionP_Value_SurveyZ"] >= vcutoff:
+                x["Adoption_Rating"] = "Positive"
+            elif x["AdoptionP_Value_SurveyZ"] >= 0 and x["AdoptionP_Delta_sos_SurveyZ"] >= 0 and x["AdoptionP_Delta_yoy_SurveyZ"] >= 0 and (x["AdoptionP_Delta_sos_SurveyZ"] >= dcutoff or x["AdoptionP_Delta_yoy_SurveyZ"] >= dcutoff):
+                x["Adoption_Rating"] = "Positive"
+            elif x["AdoptionP_Delta_sos_SurveyZ"] <= 0 and x["AdoptionP_Delta_yoy_SurveyZ"] <= 0 and (x["AdoptionP_Delta_sos_SurveyZ"] <= -dcutoff or x["AdoptionP_Delta_yoy_SurveyZ"] <= -dcutoff):
+                x["Adoption_Rating"] = "Negative"
+        elif np.isnan(x["AdoptionP_Delta_sos_SurveyZ"]) == False and np.isnan(x["AdoptionP_Delta_yoy_SurveyZ"]) == True:
+            if x["AdoptionP_Value_SurveyZ"] >= vcutoff:
+                x["Adoption_Rating"] = "Positive"
+            elif x["AdoptionP_Value_SurveyZ"] >= 0 and x["AdoptionP_Delta_sos_SurveyZ"] >= dcutoff:
+                x["Adoption_Rating"] = "Positive"
+            elif x["AdoptionP_Delta_sos_SurveyZ"] <= -dcutoff:
+                x["Adoption_Rating"] = "Negative"
+        elif np.isnan(x["AdoptionP_Delta_sos_SurveyZ"]) == True and np.isnan(x["AdoptionP_Delta_yoy_SurveyZ"]) == True:
+            if x["AdoptionP_Value_SurveyZ"] >= vcutoff:
+                x["Adoption_Rating"] = "Positive"
+        #Increase Rating
+        if np.isnan(x["IncreaseP_Delta_sos_SurveyZ"]) == False and np.isnan(x["IncreaseP_Delta_yoy_SurveyZ"]) == False:
+            if x["IncreaseP_Value_SurveyZ"] >= vcutoff:
+                x["Increase_Rating"] = "Positive"
+            elif x["IncreaseP_Value_SurveyZ"] >= 0 and x["IncreaseP_Delta_sos_SurveyZ"] >= 0 and x["IncreaseP_Delta_yoy_SurveyZ"] >= 0 and (x["IncreaseP_Delta_sos_SurveyZ"] >= dcutoff or x["IncreaseP_Delta_yoy_SurveyZ"] >= dcutoff):
+                x["Increase_Rating"] = "Positive"
+            elif x["IncreaseP_Delta_sos_SurveyZ"] <= 0 and x["IncreaseP_Delta_yoy_SurveyZ"] <= 0 and (x["IncreaseP_Delta_sos_SurveyZ"] <= -dcutoff or x["IncreaseP_Delta_yoy_SurveyZ"] <= -dcutoff):
+                x["Increase_Rating"] = "Negative"
+        elif np.isnan(x["IncreaseP_Delta_sos_SurveyZ"]) == False and np.isnan(x["IncreaseP_Delta_yoy_SurveyZ"]) == True:
+            if x["IncreaseP_Value_SurveyZ"] >= vcutoff:
+                x["Increase_Rating"] = "Positive"
+            elif x["IncreaseP_Value_SurveyZ"] >= 0 and x["IncreaseP_Delta_sos_SurveyZ"] >= dcutoff:
+                x["Increase_Rating"] = "Positive"
+            elif x["IncreaseP_Delta_sos_SurveyZ"] <= -dcutoff:
+                x["Increase_Rating"] = "Negative"
+        elif np.isnan(x["IncreaseP_Delta_sos_SurveyZ"]) == True and np.isnan(x["IncreaseP_Delta_yoy_SurveyZ"]) == True:
+            if x["IncreaseP_Value_SurveyZ"] >= vcutoff:
+                x["Increase_Rating"] = "Positive"
+        #Decrease Rating
+        if np.isnan(x["DecreaseP_Delta_sos_SurveyZ"]) == False and np.isnan(x["DecreaseP_Delta_yoy_SurveyZ"]) == False:
+            if x["DecreaseP_Value_SurveyZ"] >= vcutoff:
+                x["Decrease_Rating"] = "Negative"
+            elif x["DecreaseP_Value_SurveyZ"] >= 0 and x["DecreaseP_Delta_sos_SurveyZ"] >= 0 and x["DecreaseP_Delta_yoy_SurveyZ"] >= 0 and (x["DecreaseP_Delta_sos_SurveyZ"] >= dcutoff or x["DecreaseP_Delta_yoy_SurveyZ"] >= dcutoff):
+                x["Decrease_Rating"] = "Negative"
+            elif x["DecreaseP_Delta_sos_SurveyZ"] <= 0 and x["DecreaseP_Delta_yoy_SurveyZ"] <= 0 and (x["DecreaseP_Delta_sos_SurveyZ"] <= -dcutoff or x["DecreaseP_Delta_yoy_SurveyZ"] <= -dcutoff):
+                x["Decrease_Rating"] = "Positive"
+        elif np.isnan(x["DecreaseP_Delta_sos_SurveyZ"]) == False and np.isnan(x["DecreaseP_Delta_yoy_SurveyZ"]) == True:
+            if x["DecreaseP_Value_SurveyZ"] >= vcutoff:
+                x["Decrease_Rating"] = "Negative"
+            elif x["DecreaseP_Value_SurveyZ"] >= 0 and x["DecreaseP_Delta_sos_SurveyZ"] >= dcutoff:
+                x["Decrease_Rating"] = "Negative"
+            elif x["DecreaseP_Delta_sos_SurveyZ"] <= -dcutoff:
+                x["Decrease_Rating"] = "Positive"
+        elif np.isnan(x["DecreaseP_Delta_sos_SurveyZ"]) == True and np.isnan(x["DecreaseP_Delta_yoy_SurveyZ"]) == True:
+            if x["DecreaseP_Value_SurveyZ"] >= vcutoff:
+                x["Decrease_Rating"] = "Negative"
+        #Replace Rating
+        if np.isnan(x["ReplacingP_Delta_sos_SurveyZ"]) == False and np.isnan(x["ReplacingP_Delta_yoy_SurveyZ"]) == False:
+            if x["ReplacingP_Value_SurveyZ"] >= vcutoff:
+                x["Replacing_Rating"] = "Negative"
+            elif x["ReplacingP_Value_SurveyZ"] >= 0 and x["ReplacingP_Delta_sos_SurveyZ"] >= 0 and x["ReplacingP_Delta_yoy_SurveyZ"] >= 0 and (x["ReplacingP_Delta_sos_SurveyZ"] >= dcutoff or x["ReplacingP_Delta_yoy_SurveyZ"] >= dcutoff):
+                x["Replacing_Rating"] = "Negative"
+            elif x["ReplacingP_Delta_sos_SurveyZ"] <= 0 and x["ReplacingP_Delta_yoy_SurveyZ"] <= 0 and (x["ReplacingP_Delta_sos_SurveyZ"] <= -dcutoff or x["ReplacingP_Delta_yoy_SurveyZ"] <= -dcutoff):
+                x["Replacing_Rating"] = "Positive"
+        elif np.isnan(x["ReplacingP_Delta_sos_SurveyZ"]) == False and np.isnan(x["ReplacingP_Delta_yoy_SurveyZ"]) == True:
+            if x["ReplacingP_Value_SurveyZ"] >= vcutoff:
+                x["Replacing_Rating"] = "Negative"
+            elif x["ReplacingP_Value_SurveyZ"] >= 0 and x["ReplacingP_Delta_sos_SurveyZ"] >= dcutoff:
+                x["Replacing_Rating"] = "Negative"
+            elif x["ReplacingP_Delta_sos_SurveyZ"] <= -dcutoff:
+                x["Replacing_Rating"] = "Positive"
+        elif np.isnan(x["ReplacingP_Delta_sos_SurveyZ"]) == True and np.isnan(x["ReplacingP_Delta_yoy_SurveyZ"]) == True:
+            if x["ReplacingP_Value_SurveyZ"] >= vcutoff:
+                x["Replacing_Rating"] = "Negative"
+        #Net Score Rating
+        if np.isnan(x["NetScore_Delta_sos_SurveyZ"]) == False and np.isnan(x["NetScore_Delta_yoy_SurveyZ"]) == False:
+            if x["NetScore_Value_SurveyZ"] >= vcutoff:
+                x["NetScore_Rating"] = "Positive"
+            elif x["NetScore_Value_SurveyZ"] >= 0 and x["NetScore_Delta_sos_SurveyZ"] >= 0 and x["NetScore_Delta_yoy_SurveyZ"] >= 0 and (x["NetScore_Delta_sos_SurveyZ"] >= dcutoff or x["NetScore_Delta_yoy_SurveyZ"] >= dcutoff):
+                x["NetScore_Rating"] = "Positive"
+            elif x["NetScore_Value_SurveyZ"] <= 0 and x["NetScore_Delta_sos_SurveyZ"] <= 0 and x["NetScore_Delta_yoy_SurveyZ"] <= 0 and (x["NetScore_Delta_sos_SurveyZ"] <= -dcutoff or x["NetScore_Delta_yoy_SurveyZ"] <= -dcutoff):
+                x["NetScore_Rating"] = "Negative"
+            elif x["NetScore_Value_SurveyZ"] <= -vcutoff:
+                x["NetScore_Rating"] = "Negative"
+        elif np.isnan(x["NetScore_Delta_sos_SurveyZ"]) == False and np.isnan(x["NetScore_Delta_yoy_SurveyZ"]) == True:
+            if x["NetScore_Value_SurveyZ"] >= vcutoff:
+                x["NetScore_Rating"] = "Positive"
+            elif x["NetScore_Value_SurveyZ"] >= 0 and x["NetScore_Delta_sos_SurveyZ"] >= dcutoff:
+                x["NetScore_Rating"] = "Positive"
+            elif x["NetScore_Value_SurveyZ"] <= 0 and x["NetScore_Delta_sos_SurveyZ"] <= -dcutoff:
+                x["NetScore_Rating"] = "Negative"
+            elif x["NetScore_Value_SurveyZ"] <= -vcutoff:
+                x["NetScore_Rating"] = "Negative"
+        elif np.isnan(x["NetScore_Delta_sos_SurveyZ"]) == True and np.isnan(x["NetScore_Delta_yoy_SurveyZ"]) == True:
+            if x["NetScore_Value_SurveyZ"] >= vcutoff:
+                x["NetScore_Rating"] = "Positive"
+            elif x["NetScore_Value_SurveyZ"] <= -vcutoff:
+                x["NetScore_Rating"] = "Negative"
+        #Market Share Rating
+        if np.isnan(x["MarketShare_Delta_sos_SurveyZ"]) == False and np.isnan(x["MarketShare_Delta_yoy_SurveyZ"]) == False:
+            if x["MarketShare_Delta_sos_SurveyZ"] >= 0 and x["MarketShare_Delta_yoy_SurveyZ"] >= 0 and (x["MarketShare_Delta_sos_SurveyZ"] >= dcutoff or x["MarketShare_Delta_yoy_SurveyZ"] >= dcutoff):
+                x["MarketShare_Rating"] = "Positive"
+            elif x["MarketShare_Delta_sos_SurveyZ"] <= 0 and x["MarketShare_Delta_yoy_SurveyZ"] <= 0 and (x["MarketShare_Delta_sos_SurveyZ"] <= -dcutoff or x["MarketShare_Delta_yoy_SurveyZ"] <= -dcutoff):
+                x["MarketShare_Rating"] = "Negative"
+        elif np.isnan(x["MarketShare_Delta_sos_SurveyZ"]) == False and np.isnan(x["MarketShare_Delta_yoy_SurveyZ"]) == True:
+            if x["MarketShare_Delta_sos_SurveyZ"] >= dcutoff:
+                x["MarketShare_Rating"] = "Positive"
+            elif x["MarketShare_Delta_sos_SurveyZ"] <= -dcutoff:
+                x["MarketShare_Rating"] = "Negative"
+
+    return x
+
+
+
+def syntheticSpend(rows, seed = 0):
+    # One row per vendor/product with the z-score columns read by the rating trees.
+    # Roughly a sixth of the rows have no Survey-over-Survey history and a third have no Year-over-Year history.
+    rng = np.random.RandomState(seed)
+    spend = pd.DataFrame({"Citations": rng.randint(1, 200, size = rows).astype(float)})
+    no_sos = rng.rand(rows) < .15
+    no_yoy = no_sos | (rng.rand(rows) < .2)
+    for metric in ["AdoptionP", "IncreaseP", "FlatP", "DecreaseP", "ReplacingP", "NetScore", "MarketShare"]:
+        spend[metric + "_Value_SurveyZ"] = rng.normal(size = rows)
+        spend[metric + "_Delta_sos_SurveyZ"] = np.where(no_sos, np.nan, rng.normal(size = rows))
+        spend[metric + "_Delta_yoy_SurveyZ"] = np.where(no_yoy, np.nan, rng.normal(size = rows))
+    return spend
+
+
+def timed(function, *args):
+    start = time.perf_counter()
+    result = function(*args)
+    return result, time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Compare the vectorized spend ratings with the row-wise apply.")
+    parser.add_argument("--rows", type = int, default = 1000, help = "Row count of the 1x scale")
+    parser.add_argument("--scales", type = int, nargs = "+", default = [1, 10, 100])
+    args = parser.parse_args()
+
+    print("Rows".rjust(10), "Row-wise (s)".rjust(14), "Vectorized (s)".rjust(16), "Speedup".rjust(9), "  Identical")
+    for scale in args.scales:
+        spend = syntheticSpend(args.rows * scale, seed = scale)
+
+        legacy, legacy_time = timed(lambda df: df.apply(rowRatings, axis = 1), spend)
+        vectorized, vectorized_time = timed(ratings.spendRatings, spend, vcutoff, dcutoff, mincitations)
+
+        # The row-wise apply only creates the rating columns that receive at least one label.
+        legacy = legacy.reindex(columns = rating_columns)
+        identical = legacy.fillna("").equals(vectorized[rating_columns].fillna(""))
+
+        print(str(len(spend)).rjust(10), ("%.3f" % legacy_time).rjust(14), ("%.4f" % vectorized_time).rjust(16),
+              ("%.0fx" % (legacy_time / vectorized_time)).rjust(9), " ", identical)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+import os
+import sys
+import json
+import time
+import shutil
+import argparse
+import tempfile
+import subprocess
+
+import pandas as pd
+
+from benchmarks import synthetic
+
+
+
+# Scaling benchmark of the whole program on synthetic inputs (see benchmarks/synthetic.py).
+# Run from the repository root with: python -m benchmarks.scaling_benchmark
+# For each scale the inputs are generated with scale times the respondents per survey (so about scale times the source rows),
+# and the program (quantinsights.run) is run in a fresh process with the stage report enabled (see instrument.py).
+# The stage reports of all scales are written to one CSV file, with the time and peak memory of each stage, as a baseline
+# that later changes can be compared against. The 1x scale can be sized to the client's source dataset with the generator options.
+
+
+def runScale(settings_file):
+    # Runs the program with the input files and stage report in settings_file (called in a fresh process by measureScale).
+    with open(settings_file) as f:
+        settings = json.load(f)
+    import quantinsights
+    quantinsights.run(settings)
+
+
+def measureScale(folder, paths, report_file):
+    # Runs one scale and returns its stage report and wall time.
+    settings = {"source_file": paths["ETRSource"], "spReturns_file": paths["StockReturns"], "ftecReturns_file": paths["FTECReturns"],
+                "cache_dir": None, "incremental": False, "streaming": False, "stage_report": report_file, "stage_profile_dir": None}
+    settings_file = os.path.join(folder, "settings.json")
+    with open(settings_file, "w") as f:
+        json.dump(settings, f)
+
+    start = time.perf_counter()
+    with open(os.devnull, "w") as devnull:
+        subprocess.check_call([sys.executable, "-W", "ignore", "-m", "benchmarks.scaling_benchmark", "--run", settings_file], stdout = devnull)
+    return pd.read_csv(report_file), time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Time each stage of the program on synthetic inputs at several scales.")
+    parser.add_argument("--scales", type = int, nargs = "+", default = [1, 10, 50], help = "Multiples of the respondents per survey of the 1x scale")
+    parser.add_argument("--surveys", type = int, default = 40)
+    parser.add_argument("--respondents", type = int, default = 400, help = "Respondents per survey at the 1x scale")
+    parser.add_argument("--sectors", type = int, default = 20)
+    parser.add_argument("--vendors", type = int, default = 8, help = "Vendors per sector")
+    parser.add_argument("--ticker-nan-rate", type = float, default = .2)
+    parser.add_argument("--seed", type = int, default = 0)
+    parser.add_argument("--folder", help = "Folder for the generated inputs (a temporary folder by default, removed afterwards)")
+    parser.add_argument("--output", default = "scaling_benchmark.csv", help = "File path of the combined stage reports")
+    parser.add_argument("--run", help = argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.run is not None:
+        runScale(args.run)
+        return
+
+    folder = args.folder if args.folder is not None else tempfile.mkdtemp(prefix = "QuantInsights_Benchmark_")
+    reports = []
+    try:
+        for scale in args.scales:
+            scale_folder = os.path.join(folder, "%dx" % scale)
+            paths, rows = synthetic.writeInputs(scale_folder, surveys = args.surveys, respondents = args.respondents * scale, sectors = args.sectors,
+                                                vendors = args.vendors, ticker_nan_rate = args.ticker_nan_rate, seed = args.seed)
+            report, wall = measureScale(scale_folder, paths, os.path.join(scale_folder, "stages.csv"))
+            report.insert(0, "Source_Rows", rows)
+            report.insert(0, "Scale", scale)
+            reports.append(report)
+            print("%4dx %12d source rows %10.1f s %10.0f MB peak" % (scale, rows, wall, report["Peak_RSS_MB"].max()))
+            if args.folder is None:
+                shutil.rmtree(scale_folder)
+    finally:
+        if args.folder is None:
+            shutil.rmtree(folder, ignore_errors = True)
+
+    reports = pd.concat(reports, ignore_index = True)
+    reports.to_csv(args.output, index = False)
+    print(reports.pivot_table(index = "Stage", columns = "Scale", values = "Wall_Seconds").reindex(reports["Stage"].drop_duplicates()).round(3))
+
+
+if __name__ == "__main__":
+    main()
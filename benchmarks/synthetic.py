@@ -0,0 +1,162 @@
+import os
+import argparse
+import datetime
+
+import numpy as np
+import pandas as pd
+
+import ingest
+import parameters
+
+
+
+# Synthetic versions of the three input files (ETRSource Source Dataset, ETRInsight StockReturns and FTECReturns),
+# with the columns of the schemas in ingest.py, so the program can be run and benchmarked without client data.
+# Run from the repository root with: python -m benchmarks.synthetic --folder <folder>
+#
+# Every survey is a quarter apart. Each sector has a number of vendors, some with several products and some without
+# ticker identifiers; the major Public Cloud vendors in parameters.py are always in the cloud sector. A share of the vendors
+# were renamed part way through the history, so their historical name and identifiers differ from the current ones in early surveys.
+# Respondents cite the products of a few sectors each survey. Each vendor has a latent sentiment that drifts from survey to survey
+# and tilts its metric mix towards ADOPTION/INCREASE or DECREASE/REPLACING, and the vendor's stock return over the following
+# quarter is correlated with its sentiment, so the ratings and the model have a signal to find.
+
+
+metric_list = ["ADOPTION", "INCREASE", "FLAT", "DECREASE", "REPLACING"]
+
+
+def syntheticVendors(sectors, vendors, ticker_nan_rate, rename_rate, rng):
+    # One row per vendor/product with its current and historical identifiers and the survey it was renamed in.
+    rows = []
+    for s in range(sectors):
+        sector = parameters.cloudsector if s == 0 else "SECTOR %03d" % s
+        names = ["VENDOR %03d-%03d" % (s, v) for v in range(vendors)]
+        if s == 0:
+            names = list(parameters.cloudvendors) + names[len(parameters.cloudvendors):]
+        for name in names:
+            ticker = "T%03d%03d" % (s, len(rows)) if rng.rand() >= ticker_nan_rate else None
+            renamed = rng.rand() < rename_rate
+            for product in ([None] if rng.rand() < .6 else ["PRODUCT A", "PRODUCT B"]):
+                rows.append({"Sector_Current": sector, "Vendor_Current": name, "Product_Current": product,
+                             "Symbol_ID_Current": ticker, "Bloomberg_ID_Current": None if ticker is None else ticker + " US Equity",
+                             "FIGI_ID_Current": None if ticker is None else "BBG" + ticker, "Renamed": renamed})
+    return pd.DataFrame(rows)
+
+
+def surveyDates(survey_id):
+    launch = datetime.date(2010, 1, 4) + datetime.timedelta(weeks = 13 * (survey_id - 1))
+    return {"Survey_Launch": launch, "Survey_Close": launch + datetime.timedelta(days = 28), "Announcement_Date": launch + datetime.timedelta(days = 42)}
+
+
+def dateString(date):
+    return date.strftime("%m/%d/%Y")
+
+
+def syntheticSurvey(survey_id, products, sentiment, respondents, sectors_per_respondent, citation_rate, metric_mix, rename_survey, rng):
+    # The citations of one survey in the column layout of the source dataset.
+    sector_names = products["Sector_Current"].unique()
+    product_sector = pd.Categorical(products["Sector_Current"], categories = sector_names).codes
+
+    # Each respondent covers a few sectors and cites a share of the products in them.
+    covered = np.zeros((respondents, len(sector_names)), dtype = bool)
+    picks = np.argsort(rng.random_sample((respondents, len(sector_names))), axis = 1)[:, :min(sectors_per_respondent, len(sector_names))]
+    covered[np.arange(respondents)[:, None], picks] = True
+    cited = covered[:, product_sector] & (rng.random_sample((respondents, len(products))) < citation_rate)
+    respondent, product = np.nonzero(cited)
+
+    # The metric mix of each product is tilted by its vendor's sentiment.
+    tilt = np.array([1., 1., 0., -1., -1.])
+    weights = np.asarray(metric_mix)[None, :] * np.exp(np.outer(sentiment[product], tilt))
+    cumulative = (weights / weights.sum(axis = 1)[:, None]).cumsum(axis = 1)
+    metric = (rng.random_sample(len(product))[:, None] > cumulative[:, :-1]).sum(axis = 1)
+
+    survey = products.iloc[product].reset_index(drop = True)
+    for column in ["Sector", "Vendor", "Product", "Symbol_ID", "Bloomberg_ID", "FIGI_ID"]:
+        survey[column + "_Historical"] = survey[column + "_Current"]
+    old = (survey["Renamed"] & (survey_id < rename_survey)).values
+    survey.loc[old, "Vendor_Historical"] = "FORMERLY " + survey.loc[old, "Vendor_Current"]
+    for column in ["Symbol_ID_Historical", "Bloomberg_ID_Historical", "FIGI_ID_Historical"]:
+        survey.loc[old & survey[column].notnull().values, column] = "OLD" + survey.loc[old & survey[column].notnull().values, column]
+
+    dates = surveyDates(survey_id)
+    survey["Survey_Description_1"] = "ETR TSIS Survey %d" % survey_id
+    survey["Survey_ID"] = survey_id
+    for name, date in dates.items():
+        survey[name] = dateString(date)
+    survey["Respondent_ID"] = 100000 + respondent
+    survey["Metric"] = np.array(metric_list)[metric]
+    return survey[list(ingest.schemas["source"])]
+
+
+def syntheticReturns(products, sentiments, rename_survey, rng):
+    # Next-quarter stock returns of each ticker by survey, on its historical Bloomberg identifier, and the benchmark returns.
+    tickers = products.drop_duplicates("Vendor_Current")
+    tickers = tickers[tickers["Bloomberg_ID_Current"].notnull()]
+    rows = []
+    benchmark = []
+    for i, sentiment in enumerate(sentiments):
+        survey_id = i + 1
+        start = surveyDates(survey_id)["Announcement_Date"]
+        market = rng.normal(.02, .06)
+        benchmark.append(market + rng.normal(0, .01))
+        # The return follows the change in sentiment over the next survey.
+        change = sentiments[i + 1] - sentiment if i + 1 < len(sentiments) else np.zeros(len(sentiment))
+        returns = market + .1 * change[tickers.index.values] + rng.normal(0, .08, len(tickers))
+        bloomberg = np.where(tickers["Renamed"].values & (survey_id < rename_survey), "OLD" + tickers["Bloomberg_ID_Current"].values.astype(object), tickers["Bloomberg_ID_Current"].values)
+        rows.append(pd.DataFrame({"Survey_ID": survey_id, "Bloomberg_ID_Historical": bloomberg, "Return_End": returns,
+                                  "Window_Start": dateString(start), "Window_End": dateString(start + datetime.timedelta(weeks = 13) - datetime.timedelta(days = 1))}))
+    spReturns = pd.concat(rows, ignore_index = True)[list(ingest.schemas["spReturns"])]
+    ftecReturns = pd.DataFrame({"Survey_ID": np.arange(1, len(sentiments) + 1), "Benchmark_Fidelity_MSCI_IT_ETF": benchmark})
+    return spReturns, ftecReturns
+
+
+def writeInputs(folder, surveys = 40, respondents = 400, sectors = 20, vendors = 8, sectors_per_respondent = 4, citation_rate = .35,
+                metric_mix = (.1, .3, .4, .15, .05), ticker_nan_rate = .2, rename_rate = .1, seed = 0):
+    # Writes ETRSource.csv, StockReturns.csv and FTECReturns.csv to folder and returns their paths and the source row count.
+    # The source dataset is written one survey at a time, so its size is not limited by memory.
+    rng = np.random.RandomState(seed)
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    products = syntheticVendors(sectors, vendors, ticker_nan_rate, rename_rate, rng)
+    rename_survey = surveys // 2
+
+    # Vendor sentiment is a random walk, shared by the vendor's products.
+    vendor = pd.Categorical(products["Vendor_Current"]).codes
+    walk = np.cumsum(rng.normal(0, .35, (surveys, vendor.max() + 1)), axis = 0)
+    sentiments = [step[vendor] for step in walk]
+
+    paths = {name: os.path.join(folder, name + ".csv") for name in ["ETRSource", "StockReturns", "FTECReturns"]}
+    rows = 0
+    for survey_id in range(1, surveys + 1):
+        survey = syntheticSurvey(survey_id, products, sentiments[survey_id - 1], respondents, sectors_per_respondent, citation_rate, metric_mix, rename_survey, rng)
+        survey.to_csv(paths["ETRSource"], index = False, mode = 'w' if survey_id == 1 else 'a', header = survey_id == 1)
+        rows += len(survey)
+
+    spReturns, ftecReturns = syntheticReturns(products, sentiments, rename_survey, rng)
+    spReturns.to_csv(paths["StockReturns"], index = False)
+    ftecReturns.to_csv(paths["FTECReturns"], index = False)
+    return paths, rows
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Write synthetic source, stock return and benchmark return files.")
+    parser.add_argument("--folder", required = True, help = "Folder for ETRSource.csv, StockReturns.csv and FTECReturns.csv")
+    parser.add_argument("--surveys", type = int, default = 40)
+    parser.add_argument("--respondents", type = int, default = 400, help = "Respondents per survey")
+    parser.add_argument("--sectors", type = int, default = 20)
+    parser.add_argument("--vendors", type = int, default = 8, help = "Vendors per sector")
+    parser.add_argument("--sectors-per-respondent", type = int, default = 4)
+    parser.add_argument("--citation-rate", type = float, default = .35, help = "Share of the products in a covered sector that a respondent cites")
+    parser.add_argument("--metric-mix", type = float, nargs = 5, default = [.1, .3, .4, .15, .05], help = "Base shares of " + ", ".join(metric_list))
+    parser.add_argument("--ticker-nan-rate", type = float, default = .2, help = "Share of vendors without ticker identifiers")
+    parser.add_argument("--rename-rate", type = float, default = .1, help = "Share of vendors renamed half way through the surveys")
+    parser.add_argument("--seed", type = int, default = 0)
+    args = parser.parse_args()
+
+    paths, rows = writeInputs(args.folder, args.surveys, args.respondents, args.sectors, args.vendors, args.sectors_per_respondent,
+                              args.citation_rate, args.metric_mix, args.ticker_nan_rate, args.rename_rate, args.seed)
+    print("Wrote " + str(rows) + " source rows to " + paths["ETRSource"])
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,78 @@
+import numpy as np
+import pandas as pd
+import entities
+
+
+
+# Respondent bitmap index of the coded citations.
+# The respondents of each survey are numbered from 0, and each (Survey_ID, Entity_ID, Metric) of the citations keeps the set of
+# its respondents as a bitmap: one bit per respondent of the survey, packed into 64-bit words (a row of the "words" matrix).
+# The Entity_ID carries the vendor/product and its sector (see entities.py).
+# A cohort of respondents (e.g. the Cloud Group of the cloud theme) is a bitmap per survey as well, so cohort membership
+# and a vendor's citations or Net Score within a cohort are bitwise ANDs and popcounts of these words, rather than filters
+# and merges of the respondent-level citations. The peer theme's shared accounts are counted in cocitation.py.
+# A bitmap counts each respondent once; "exact" is False when a respondent has repeated citations of the same key,
+# whose counts then differ from the number of citations.
+
+
+def popcount(words):
+    # Number of set bits of each bitmap (along the last axis of words), counted within each word by adding up
+    # neighbouring bit fields (numpy has no popcount before 2.0).
+    x = words - ((words >> np.uint64(1)) & np.uint64(0x5555555555555555))
+    x = (x & np.uint64(0x3333333333333333)) + ((x >> np.uint64(2)) & np.uint64(0x3333333333333333))
+    x = (x + (x >> np.uint64(4))) & np.uint64(0x0F0F0F0F0F0F0F0F)
+    return ((x * np.uint64(0x0101010101010101)) >> np.uint64(56)).sum(axis = -1, dtype = np.int64)
+
+
+def buildIndex(citations):
+    # Returns the index of the coded citations: "keys" (Survey_ID, Entity_ID, Metric and number of Citations of each bitmap),
+    # "words" (the bitmaps), "survey" (the position in "surveys" of each key's survey), "surveys" (the Survey_IDs),
+    # "respondents" (the number of respondents of each survey) and "exact".
+    survey, surveys = pd.factorize(citations["Survey_ID"].values, sort = True)
+    account, first = entities.tupleCodes(citations, ["Survey_ID", "Respondent_ID"])
+    respondents = np.bincount(survey[first], minlength = len(surveys))
+
+    # The respondents of each survey are numbered in order of first appearance.
+    order = np.argsort(survey[first], kind = 'mergesort')
+    number = np.empty(len(order), dtype = np.int64)
+    number[order] = np.arange(len(order)) - np.repeat(np.cumsum(respondents) - respondents, respondents)
+    bit = number[account]
+
+    metric, metrics = pd.factorize(citations["Metric"])
+    entity = citations["Entity_ID"].values.astype(np.int64)
+    key, uniques = pd.factorize((survey * (entity.max() + 1 if len(entity) else 0) + entity) * len(metrics) + metric)
+    key_first = np.empty(len(uniques), dtype = np.int64)
+    key_first[key[::-1]] = np.arange(len(key))[::-1]
+    keys = citations[["Survey_ID", "Entity_ID", "Metric"]].iloc[key_first].reset_index(drop = True)
+    keys["Citations"] = np.bincount(key, minlength = len(key_first))
+
+    words = np.zeros((len(key_first), int(respondents.max() + 63) // 64 if len(respondents) else 0), dtype = np.uint64)
+    np.bitwise_or.at(words.reshape(-1), key * words.shape[1] + (bit >> 6), np.left_shift(np.uint64(1), (bit & 63).astype(np.uint64)))
+
+    return {"keys": keys, "words": words, "survey": survey[key_first], "surveys": surveys,
+            "respondents": respondents, "exact": bool((popcount(words) == keys["Citations"].values).all())}
+
+
+def cohorts(index, rows):
+    # The cohort of each survey: the bitmap of the respondents of the keys selected by rows (a boolean mask of the keys).
+    cohort = np.zeros((len(index["surveys"]), index["words"].shape[1]), dtype = np.uint64)
+    selected = np.flatnonzero(rows)
+    for position in np.unique(index["survey"][selected]):
+        cohort[position] = np.bitwise_or.reduce(index["words"][selected[index["survey"][selected] == position]], axis = 0)
+    return cohort
+
+
+def cohortCounts(index, cohort):
+    # The number of respondents of each key in its survey's cohort.
+    return popcount(index["words"] & cohort[index["survey"]])
+
+
+def metricCounts(index, counts, metrics):
+    # The counts of each key as one row per Survey_ID and Entity_ID with one column per metric, for the rows with any count.
+    keys = index["keys"]
+    table = pd.DataFrame({"Survey_ID": keys["Survey_ID"].values, "Entity_ID": keys["Entity_ID"].values,
+                          "Metric": np.asarray(keys["Metric"], dtype = object), "Count": counts})
+    table = table[table["Count"] > 0].set_index(["Survey_ID", "Entity_ID", "Metric"])["Count"].unstack("Metric", fill_value = 0)
+    table = table.reindex(columns = metrics, fill_value = 0).reset_index()
+    table.columns.name = None
+    return table
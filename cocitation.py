@@ -0,0 +1,73 @@
+import numpy as np
+import pandas as pd
+import scipy.sparse as sparse
+
+
+
+# Shared account counts for the Peer Benchmarking / Competition Theme.
+# Instead of joining every respondent's citations to all of their other citations within a sector,
+# each survey is turned into two sparse incidence matrices with one row per (Respondent_ID, Sector_ID):
+#   A: the primary vendor (Vendor_Filter) columns, one per Entity_ID and Metric_Filter_Group
+#   B: the competitor (Vendor_Calc) columns, one per vendor/product (Product_ID) and Metric_Calc
+# The shared account count of every primary vendor/competitor pair is then A.T * B,
+# so the pairwise respondent-level table is never materialized.
+
+
+positive_metrics = ["INCREASE", "ADOPTION"]
+
+
+def codes(df, columns):
+    return df.groupby(columns, sort = False).ngroup().values
+
+
+def surveyCoCitations(survey):
+    # Shared account counts for the coded citations of a single survey.
+    account = codes(survey, ["Respondent_ID", "Sector_ID"])
+    primary = codes(survey, ["Entity_ID", "Metric_Filter_Group"])
+    competitor = codes(survey, ["Product_ID", "Metric_Code"])
+    product = survey["Product_ID"].values
+
+    ones = np.ones(len(survey))
+    a = sparse.csr_matrix((ones, (account, primary)), shape = (account.max() + 1, primary.max() + 1))
+    b = sparse.csr_matrix((ones, (account, competitor)), shape = (account.max() + 1, competitor.max() + 1))
+    shared = a.T.dot(b).tocoo()
+
+    # Any citation with a given code carries that code's key values.
+    primary_rows = np.empty(primary.max() + 1, dtype = np.int64)
+    primary_rows[primary] = np.arange(len(survey))
+    competitor_rows = np.empty(competitor.max() + 1, dtype = np.int64)
+    competitor_rows[competitor] = np.arange(len(survey))
+    primary_rows = primary_rows[shared.row]
+    competitor_rows = competitor_rows[shared.col]
+
+    # A vendor/product is not its own competitor.
+    keep = product[primary_rows] != product[competitor_rows]
+    primary_rows = primary_rows[keep]
+    competitor_rows = competitor_rows[keep]
+
+    return pd.DataFrame({"Survey_ID": survey["Survey_ID"].values[primary_rows],
+                         "Entity_ID": survey["Entity_ID"].values[primary_rows],
+                         "Metric_Filter_Group": survey["Metric_Filter_Group"].values[primary_rows],
+                         "Product_ID_Calc": product[competitor_rows],
+                         "Metric_Code": survey["Metric_Code"].values[competitor_rows],
+                         "Count": shared.data[keep].round().astype(np.int64)})
+
+
+def surveyPairs(citations, by = ["Survey_ID"]):
+    # Citation pairs within each respondent's sector accounts, by survey (or by survey and sector): an upper bound on the shared
+    # account counts, used to estimate the memory and work of coCitations before it runs.
+    accounts = citations.groupby(["Survey_ID", "Respondent_ID", "Sector_ID"]).size().astype(np.int64)
+    return (accounts ** 2).groupby(level = by).sum()
+
+
+def coCitations(citations, entities):
+    # Returns one row per survey, primary vendor (Entity_ID), Metric_Filter_Group, competitor (Product_ID_Calc) and Metric_Calc
+    # with the number of shared accounts in "Count", matching the grouped pairwise self-join of the source citations.
+    survey_citations = citations[["Survey_ID", "Respondent_ID", "Entity_ID", "Sector_ID"]].copy()
+    survey_citations["Product_ID"] = entities["Product_ID"].values[citations["Entity_ID"].values]
+    survey_citations["Metric_Code"] = citations["Metric"].cat.codes.values
+    survey_citations["Metric_Filter_Group"] = np.where(citations["Metric"].isin(positive_metrics), 'Pos', 'Neg')
+
+    counts = pd.concat([surveyCoCitations(survey) for survey_id, survey in survey_citations.groupby("Survey_ID", sort = True)], ignore_index = True)
+    counts["Metric_Calc"] = np.asarray(citations["Metric"].cat.categories)[counts["Metric_Code"].values]
+    return counts.drop(["Metric_Code"], axis = 1)
@@ -0,0 +1,116 @@
+import numpy as np
+import pandas as pd
+
+
+
+# Entity dictionary for the source dataset.
+# The 17-column string key (Survey_Description_1 ... FIGI_ID_Historical) is replaced by two integer keys:
+#   Survey_ID, with the survey's description and dates kept in a survey table
+#   Entity_ID, one per unique vendor/product tuple, with its descriptive columns kept as categoricals in an entity table
+# The entity table also carries coarser integer keys used to match vendors across surveys and themes.
+# Missing values are a value of their own in every key, as '---' was when the key columns were filled.
+# The descriptive columns are joined back with decode() only when the final datasets are produced.
+
+
+survey_columns = ["Survey_Description_1", "Survey_ID", "Survey_Launch", "Survey_Close", "Announcement_Date"]
+entity_columns = ["Sector_Current", "Vendor_Current", "Product_Current", "Symbol_ID_Current", "Bloomberg_ID_Current", "FIGI_ID_Current", "Sector_Historical", "Vendor_Historical", "Product_Historical", "Symbol_ID_Historical", "Bloomberg_ID_Historical", "FIGI_ID_Historical"]
+
+# Coarser keys derived from the entity columns:
+#   Sector_ID   matches the respondents of a sector
+#   Product_ID  matches a vendor/product across surveys (spend and peer deltas) and identifies competitors
+#   Security_ID matches a vendor/product and its current security identifiers across surveys (cloud deltas)
+#   Company_ID  combines the vendor's sectors and products into one forecast per security
+entity_keys = {"Sector_ID": ["Sector_Current"],
+               "Product_ID": ["Sector_Current", "Vendor_Current", "Product_Current"],
+               "Security_ID": ["Sector_Current", "Vendor_Current", "Product_Current", "Symbol_ID_Current", "Bloomberg_ID_Current", "FIGI_ID_Current"],
+               "Company_ID": ["Vendor_Historical", "Symbol_ID_Historical", "Bloomberg_ID_Historical", "FIGI_ID_Historical"]}
+
+
+def tupleCodes(df, columns):
+    # Returns a compact integer code for each row's tuple of values and the position of the first row with each code.
+    # Columns are folded in one at a time and re-factorized, so the combined code never exceeds the row count.
+    code = np.zeros(len(df), dtype = np.int64)
+    for column in columns:
+        values, uniques = pd.factorize(df[column])
+        code = pd.factorize(code * (len(uniques) + 1) + values + 1)[0]
+
+    first = np.empty(code.max() + 1 if len(code) else 0, dtype = np.int64)
+    first[code[::-1]] = np.arange(len(code))[::-1]
+    return code, first
+
+
+def sortedCategories(values):
+    # A categorical of values with its categories in sorted order. read_csv (see ingest.py) adds categories in order of
+    # appearance, and a frame sorted on a categorical column is sorted by category order rather than by value.
+    values = values.astype('category')
+    return values.cat.set_categories(sorted(values.cat.categories))
+
+
+def buildEntities(source, surveys = None, entities = None):
+    # Returns the coded citations (Survey_ID, Respondent_ID, Entity_ID, Sector_ID, Metric) with the survey and entity tables.
+    # The survey table has one row per survey, so its descriptive columns are kept as plain strings.
+    # Survey and entity tables from an earlier run can be passed in to keep their IDs: codes are assigned in order of
+    # first appearance, so the earlier entities keep their Entity_ID (and coarser keys) and new entities are appended.
+    new_surveys = source[survey_columns].drop_duplicates("Survey_ID").set_index("Survey_ID")
+    if surveys is not None:
+        new_surveys = pd.concat([surveys, new_surveys[~new_surveys.index.isin(surveys.index)]])
+    surveys = new_surveys.sort_index().astype(object)
+
+    keys = source[entity_columns]
+    known = 0
+    if entities is not None:
+        known = len(entities)
+        keys = pd.concat([entities[entity_columns].astype(object), keys], ignore_index = True)
+
+    entity, first = tupleCodes(keys, entity_columns)
+    entities = keys.iloc[first].reset_index(drop = True)
+    entity = entity[known:]
+    for key, columns in entity_keys.items():
+        entities[key] = tupleCodes(entities, columns)[0]
+    for column in entity_columns:
+        entities[column] = sortedCategories(entities[column])
+    entities.index.name = "Entity_ID"
+
+    coded = pd.DataFrame({"Survey_ID": source["Survey_ID"].values,
+                          "Respondent_ID": source["Respondent_ID"].values,
+                          "Entity_ID": entity.astype(np.int32),
+                          "Sector_ID": entities["Sector_ID"].values[entity],
+                          "Metric": sortedCategories(source["Metric"]).values})
+    return coded, surveys, entities
+
+
+def entityKey(df, entities, key, id_column = "Entity_ID"):
+    # Looks up one of the coarser keys (or a descriptive column) for each row's Entity_ID.
+    return entities[key].values[df[id_column].values]
+
+
+def countMetrics(citations, by, metrics):
+    # Counts the citations of each metric per group of coded citations, with one column per metric.
+    counts = citations.groupby(by + ["Metric"], observed = True).size().unstack("Metric", fill_value = 0)
+    counts.columns = counts.columns.astype(str)
+    counts = counts.reindex(columns = metrics, fill_value = 0).reset_index()
+    counts.columns.name = None
+    return counts
+
+
+def decode(df, surveys, entities, id_column = "Entity_ID", columns = entity_columns):
+    # Joins the survey columns (by Survey_ID) and the given entity columns (by id_column) back in front of the remaining columns.
+    # id_column is Entity_ID or one of the coarser keys, in which case only columns that are constant within that key should be requested.
+    if id_column == "Entity_ID":
+        lookup = entities[columns]
+    else:
+        lookup = entities.drop_duplicates(id_column).set_index(id_column)[columns]
+
+    survey = surveys.reindex(df["Survey_ID"].values)
+    entity = lookup.reindex(df[id_column].values)
+    decoded = pd.DataFrame({"Survey_ID": df["Survey_ID"].values})
+    for column in survey_columns[:1] + survey_columns[2:]:
+        decoded[column] = survey[column].values
+    decoded = decoded[survey_columns]
+    for column in columns:
+        decoded[column] = entity[column].values
+    rest = df.drop(["Survey_ID", id_column], axis = 1).reset_index(drop = True)
+    for column in rest.columns:
+        decoded[column] = rest[column].values
+    decoded.index = df.index
+    return decoded
@@ -0,0 +1,83 @@
+import os
+import shutil
+import pandas as pd
+
+
+
+# Export of the final datasets, and optionally the theme outputs, as Parquet or Arrow IPC files partitioned by Survey_ID.
+# Each dataset is written to <folder>/<name>/Survey_ID=<id>/part-0.parquet (or .arrow), the Hive layout understood by
+# pyarrow.dataset, pandas.read_parquet, Spark and DuckDB, so readers can load or memory-map only the surveys and columns they need.
+# Datasets without a Survey_ID column (InsightPerformance) are written as a single <folder>/<name>.parquet (or .arrow) file.
+# The survey dates are written as dates and the other string columns as dictionary-encoded (categorical) columns, with the same
+# dictionary in every partition.
+# pyarrow is only needed here, so it is not in requirements.txt and is imported when an export runs.
+
+
+extensions = {"parquet": ".parquet", "arrow": ".arrow"}
+
+date_columns = ["Survey_Launch", "Survey_Close", "Announcement_Date"]
+date_format = "%m/%d/%Y"
+
+
+def arrowModules():
+    try:
+        import pyarrow
+        import pyarrow.parquet
+    except ImportError:
+        raise ImportError("Exporting to Parquet or Arrow requires pyarrow (pip install pyarrow)")
+    return pyarrow, pyarrow.parquet
+
+
+def typedColumns(df):
+    # The survey dates as datetime64 and the other string columns as categoricals.
+    typed = df.copy(deep = False)
+    for column in typed.columns:
+        if column in date_columns:
+            typed[column] = pd.to_datetime(typed[column], format = date_format)
+        elif typed[column].dtype == object:
+            typed[column] = typed[column].astype('category')
+    return typed
+
+
+def writeTable(df, path, file_format):
+    pa, pq = arrowModules()
+    table = pa.Table.from_pandas(df, preserve_index = False)
+    if file_format == "parquet":
+        pq.write_table(table, path)
+    else:
+        with pa.OSFile(path, "wb") as sink:
+            writer = pa.RecordBatchFileWriter(sink, table.schema)
+            writer.write_table(table)
+            writer.close()
+
+
+def exportDatasets(datasets, folder, file_format = "parquet", partition_column = "Survey_ID"):
+    # Writes each DataFrame in datasets (a dict by name) to folder and returns the path written for each name.
+    # The earlier export of a dataset is replaced.
+    if file_format not in extensions:
+        raise ValueError("Unknown export format: " + str(file_format) + " (expected " + " or ".join(extensions) + ")")
+    arrowModules()
+    extension = extensions[file_format]
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+
+    paths = {}
+    for name, df in datasets.items():
+        typed = typedColumns(df)
+        target = os.path.join(folder, name)
+        if os.path.isdir(target):
+            shutil.rmtree(target)
+        elif os.path.exists(target + extension):
+            os.remove(target + extension)
+
+        if partition_column not in typed.columns:
+            paths[name] = target + extension
+            writeTable(typed, paths[name], file_format)
+            continue
+
+        paths[name] = target
+        for value, partition in typed.groupby(partition_column, sort = True):
+            partition_folder = os.path.join(target, partition_column + "=" + str(value))
+            os.makedirs(partition_folder)
+            writeTable(partition.drop([partition_column], axis = 1), os.path.join(partition_folder, "part-0" + extension), file_format)
+    return paths
@@ -0,0 +1,50 @@
+import os
+import pandas as pd
+
+
+
+# Incremental survey mode.
+# The spend, peer and cloud theme outputs of earlier runs are saved to a state file together with the survey and entity tables
+# that their integer keys refer to. A run then only computes the surveys that are not in the state file, from the citations of
+# those surveys and of their lag surveys (see themes.lagSurveys), and appends them to the saved outputs.
+# The model is refit on the combined outputs, so InsightForecast and InsightPerformance are always recomputed.
+# Saved surveys are not recomputed: remove the state file when earlier surveys in the source dataset are restated.
+# A state file saved with different theme parameters is ignored and every survey is recomputed.
+
+
+theme_names = ["spend", "peer", "cloud"]
+
+
+def loadState(state_file, theme_parameters):
+    # Returns the saved state, or None when there is no usable state file.
+    if not os.path.exists(state_file):
+        return None
+
+    state = pd.read_pickle(state_file)
+    if state["parameters"] != theme_parameters:
+        print("Theme parameters have changed since " + state_file + " was saved: all surveys will be recomputed.")
+        return None
+    return state
+
+
+def saveState(state_file, surveys, entities, outputs, theme_parameters):
+    state = {"parameters": theme_parameters, "surveys": surveys, "entities": entities, "outputs": outputs}
+    pd.to_pickle(state, state_file)
+
+
+def newSurveys(survey_ids, state):
+    # Survey_IDs of the source dataset that are not in the saved state.
+    if state is None:
+        return list(survey_ids)
+    return [survey_id for survey_id in survey_ids if survey_id not in state["surveys"].index]
+
+
+def appendSurveys(state, name, output, survey_ids):
+    # Keeps the given surveys of a theme output and appends them to the saved output of that theme.
+    # Without an output (no new surveys) the saved output is returned.
+    if output is None:
+        return state["outputs"][name]
+    output = output[output["Survey_ID"].isin(survey_ids)]
+    if state is not None:
+        output = pd.concat([state["outputs"][name], output], ignore_index = True, sort = False)
+    return output.reset_index(drop = True)
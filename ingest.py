@@ -0,0 +1,121 @@
+import os
+import json
+import hashlib
+import pandas as pd
+
+
+
+# Typed reads of the three input CSV files, with a columnar cache.
+# Each dataset has an explicit schema: the columns that are read and their dtypes. Repeated strings (sectors, vendors,
+# identifiers, metrics, survey descriptions and dates) are read as categoricals.
+# The first read of a file parses the CSV and writes one pickled column per file to <cache_dir>/<dataset>, with a manifest
+# holding the file's size, modification time and SHA-1 hash. Later reads load only the requested columns from the cache.
+# The cache is rewritten when the file's size changes, or when its modification time changes and its hash no longer matches.
+
+
+schemas = {
+    "source": {"Survey_Description_1": "category", "Survey_ID": "int64", "Survey_Launch": "category", "Survey_Close": "category",
+               "Announcement_Date": "category", "Respondent_ID": "int64",
+               "Sector_Current": "category", "Vendor_Current": "category", "Product_Current": "category",
+               "Symbol_ID_Current": "category", "Bloomberg_ID_Current": "category", "FIGI_ID_Current": "category",
+               "Sector_Historical": "category", "Vendor_Historical": "category", "Product_Historical": "category",
+               "Symbol_ID_Historical": "category", "Bloomberg_ID_Historical": "category", "FIGI_ID_Historical": "category",
+               "Metric": "category"},
+    "spReturns": {"Survey_ID": "int64", "Bloomberg_ID_Historical": "object", "Return_End": "float64", "Window_Start": "object", "Window_End": "object"},
+    "ftecReturns": {"Survey_ID": "int64", "Benchmark_Fidelity_MSCI_IT_ETF": "float64"},
+    # The returns files of several horizons (see return_horizons in parameters.py): one row per horizon in months.
+    "spReturnsHorizons": {"Survey_ID": "int64", "Bloomberg_ID_Historical": "object", "Return_Horizon": "int64", "Return_End": "float64", "Window_Start": "object", "Window_End": "object"},
+    "ftecReturnsHorizons": {"Survey_ID": "int64", "Return_Horizon": "int64", "Benchmark_Fidelity_MSCI_IT_ETF": "float64"},
+}
+
+# The columns identifying a row of the returns datasets. A file with repeated keys is rejected: e.g. a file of several horizons
+# read with a single-horizon schema, which does not read its Return_Horizon column.
+keys = {
+    "spReturns": ["Survey_ID", "Bloomberg_ID_Historical"],
+    "ftecReturns": ["Survey_ID"],
+    "spReturnsHorizons": ["Survey_ID", "Bloomberg_ID_Historical", "Return_Horizon"],
+    "ftecReturnsHorizons": ["Survey_ID", "Return_Horizon"],
+}
+
+
+def fileHash(path):
+    sha1 = hashlib.sha1()
+    with open(path, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 24), b""):
+            sha1.update(chunk)
+    return sha1.hexdigest()
+
+
+def readCSV(path, name, columns):
+    schema = schemas[name]
+    return pd.read_csv(path, usecols = columns, dtype = {column: schema[column] for column in columns})[columns]
+
+
+def cachedManifest(path, folder, schema):
+    # Returns the manifest of a cache that matches the file, or None.
+    manifest_file = os.path.join(folder, "manifest.json")
+    if not os.path.exists(manifest_file):
+        return None
+    with open(manifest_file) as f:
+        manifest = json.load(f)
+
+    stat = os.stat(path)
+    if manifest["schema"] != schema or manifest["size"] != stat.st_size:
+        return None
+    if manifest["mtime"] != stat.st_mtime:
+        # The file was touched or copied: the cache is kept if its contents are unchanged.
+        if manifest["sha1"] != fileHash(path):
+            return None
+        manifest["mtime"] = stat.st_mtime
+        writeManifest(folder, manifest)
+    return manifest
+
+
+def writeManifest(folder, manifest):
+    manifest_file = os.path.join(folder, "manifest.json")
+    with open(manifest_file + ".tmp", "w") as f:
+        json.dump(manifest, f)
+    os.replace(manifest_file + ".tmp", manifest_file)
+
+
+def fileManifest(path, schema):
+    stat = os.stat(path)
+    return {"file": os.path.abspath(path), "size": stat.st_size, "mtime": stat.st_mtime, "sha1": fileHash(path), "schema": schema}
+
+
+def writeCache(path, folder, name):
+    schema = schemas[name]
+    manifest = fileManifest(path, schema)
+    df = readCSV(path, name, list(schema))
+
+    if not os.path.exists(folder):
+        os.makedirs(folder)
+    manifest_file = os.path.join(folder, "manifest.json")
+    if os.path.exists(manifest_file):
+        os.remove(manifest_file)
+    for column in df.columns:
+        df[column].to_pickle(os.path.join(folder, column + ".pkl"))
+    writeManifest(folder, manifest)
+    return df
+
+
+def checkKeys(df, path, name):
+    key_columns = keys.get(name, [])
+    if key_columns and set(key_columns) <= set(df.columns) and df.duplicated(key_columns).any():
+        raise ValueError(path + " has repeated " + ", ".join(key_columns) + " rows"
+                         + ("" if "Return_Horizon" in key_columns else " (for a file with a Return_Horizon column, set return_horizons in parameters.py)"))
+    return df
+
+
+def readDataset(path, name, columns = None, cache_dir = None):
+    # Reads the given columns (all columns of the schema by default) of one of the datasets in schemas,
+    # from the column cache in cache_dir when it matches the file. Without a cache_dir the CSV file is parsed.
+    schema = schemas[name]
+    columns = list(schema) if columns is None else list(columns)
+    if cache_dir is None:
+        return checkKeys(readCSV(path, name, columns), path, name)
+
+    folder = os.path.join(cache_dir, name)
+    if cachedManifest(path, folder, schema) is None:
+        return checkKeys(writeCache(path, folder, name)[columns], path, name)
+    return checkKeys(pd.DataFrame({column: pd.read_pickle(os.path.join(folder, column + ".pkl")) for column in columns}, columns = columns), path, name)
@@ -0,0 +1,190 @@
+import os
+import sys
+import time
+import json
+import cProfile
+import threading
+import tracemalloc
+import pandas as pd
+
+try:
+    import resource
+except ImportError:
+    # Not available on Windows.
+    resource = None
+
+try:
+    import psutil
+except ImportError:
+    # Optional: reads the resident memory where /proc/self/status does not exist (macOS, Windows).
+    psutil = None
+
+
+
+# Per-stage instrumentation.
+# run() calls one stage of the calculation and, when instrumentation is configured, records its wall time, CPU time,
+# peak resident memory during the stage (and its increase over the resident memory at the stage's start) and the row and
+# column counts of its first input and of its output.
+# On Linux the kernel's peak (VmHWM) is reset before each stage by writing 5 to /proc/self/clear_refs and read after it.
+# Where that is not allowed, the resident memory is sampled on a thread during the stage (from /proc/self/status, or with
+# psutil when it is installed). Without either, the peak of the whole process so far (ru_maxrss) is all that can be recorded.
+# writeReport() saves the records as a JSON or CSV report, so runs on growing survey volumes can be compared stage by stage.
+# Optionally each stage is also profiled with cProfile (<profile_dir>/<stage>.prof, readable with pstats or snakeviz)
+# and traced with tracemalloc (<profile_dir>/<stage>.tracemalloc, readable with tracemalloc.Snapshot.load).
+
+
+settings = {"enabled": False, "profile_dir": None, "tracemalloc": False}
+records = []
+
+
+def configure(enabled, profile_dir = None, trace_memory = False):
+    settings["enabled"] = enabled
+    settings["profile_dir"] = profile_dir
+    settings["tracemalloc"] = trace_memory
+    del records[:]
+    if enabled and profile_dir is not None and not os.path.exists(profile_dir):
+        os.makedirs(profile_dir)
+
+
+def peakRSS():
+    # Peak resident memory of the process so far, in MB.
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # ru_maxrss is in bytes on macOS and in kilobytes elsewhere.
+    return peak / 1024. ** 2 if sys.platform == "darwin" else peak / 1024.
+
+
+def statusMB(field):
+    # A memory field of /proc/self/status (Linux), in MB, or None.
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith(field + ":"):
+                    return int(line.split()[1]) / 1024.
+    except (IOError, OSError, ValueError):
+        pass
+    return None
+
+
+def currentRSS():
+    # Current resident memory of the process, in MB, or None.
+    rss = statusMB("VmRSS")
+    if rss is None and psutil is not None:
+        rss = psutil.Process().memory_info().rss / 1024. ** 2
+    return rss
+
+
+def resetPeak():
+    # Resets the kernel's peak resident memory of the process (VmHWM) to its current size; False where that is not allowed.
+    if statusMB("VmHWM") is None:
+        return False
+    try:
+        with open("/proc/self/clear_refs", "w") as f:
+            f.write("5")
+        return True
+    except (IOError, OSError):
+        return False
+
+
+# The largest peak of the stages run within each stage being measured.
+nested_peaks = []
+
+
+def startPeak(interval = 0.01):
+    # Starts measuring the peak resident memory of a stage. Returns a function that stops the measurement and returns
+    # the resident memory at the start and the peak during the stage, in MB.
+    start = currentRSS()
+    if start is None:
+        before = peakRSS()
+        return lambda: (before, peakRSS())
+
+    nested_peaks.append(start)
+    if resetPeak():
+        measured = lambda: statusMB("VmHWM")
+    else:
+        samples = [start]
+        stop = threading.Event()
+        def sample():
+            while not stop.wait(interval):
+                samples.append(currentRSS())
+        thread = threading.Thread(target = sample)
+        thread.daemon = True
+        thread.start()
+        def measured():
+            stop.set()
+            thread.join()
+            return max(samples + [currentRSS()])
+
+    def finish():
+        # A nested stage resets the kernel's peak too, so the peaks of the stages within this one are included.
+        peak = max(measured(), nested_peaks.pop())
+        if nested_peaks:
+            nested_peaks[-1] = max(nested_peaks[-1], peak)
+        return start, peak
+    return finish
+
+
+def frameShape(value):
+    # Rows and columns of a DataFrame, or of the first DataFrame in a tuple, list or dict.
+    if isinstance(value, dict):
+        value = list(value.values())
+    if isinstance(value, (tuple, list)):
+        value = next((v for v in value if isinstance(v, pd.DataFrame)), None)
+    if isinstance(value, pd.DataFrame):
+        return value.shape
+    return (None, None)
+
+
+def run(name, function, *args, **kwargs):
+    # Returns function(*args, **kwargs), recording the stage under name when instrumentation is enabled.
+    if not settings["enabled"]:
+        return function(*args, **kwargs)
+
+    input_shape = frameShape(list(args))
+    profile_dir = settings["profile_dir"]
+    profiler = cProfile.Profile() if profile_dir is not None else None
+    trace = profile_dir is not None and settings["tracemalloc"]
+    if trace:
+        tracemalloc.start()
+
+    peak = startPeak()
+    wall = time.perf_counter()
+    cpu = time.process_time()
+    if profiler is not None:
+        profiler.enable()
+    try:
+        output = function(*args, **kwargs)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        wall = time.perf_counter() - wall
+        cpu = time.process_time() - cpu
+        rss_before, rss_peak = peak()
+
+    record = {"Stage": name, "Wall_Seconds": wall, "CPU_Seconds": cpu,
+              "Peak_RSS_MB": rss_peak, "Peak_RSS_Delta_MB": None if rss_peak is None else rss_peak - rss_before,
+              "Input_Rows": input_shape[0], "Input_Columns": input_shape[1],
+              "Output_Rows": frameShape(output)[0], "Output_Columns": frameShape(output)[1]}
+    if profiler is not None:
+        profiler.dump_stats(os.path.join(profile_dir, name + ".prof"))
+    if trace:
+        record["Traced_Peak_MB"] = tracemalloc.get_traced_memory()[1] / 1024. ** 2
+        tracemalloc.take_snapshot().dump(os.path.join(profile_dir, name + ".tracemalloc"))
+        tracemalloc.stop()
+    records.append(record)
+    return output
+
+
+def report():
+    return pd.DataFrame(records, columns = ["Stage", "Wall_Seconds", "CPU_Seconds", "Peak_RSS_MB", "Peak_RSS_Delta_MB", "Input_Rows", "Input_Columns", "Output_Rows", "Output_Columns"]
+                        + (["Traced_Peak_MB"] if settings["tracemalloc"] and settings["profile_dir"] is not None else []))
+
+
+def writeReport(path):
+    # Saves the stage records to path, as JSON (one object per stage) when path ends in .json and as CSV otherwise.
+    if path.lower().endswith(".json"):
+        with open(path, "w") as f:
+            json.dump(records, f, indent = 1)
+    else:
+        report().to_csv(path, index = False)
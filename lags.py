@@ -0,0 +1,85 @@
+import numpy as np
+import pandas as pd
+import entities
+
+
+
+# Survey-over-Survey and Year-over-Year lag values on a dense survey x key panel.
+# The lag survey of every Survey_ID is looked up in two vectors built once (lagVectors), and each theme's rows are placed
+# in a panel indexed by (Survey_ID, key), where the key is the vendor/product (and metric or competitor) the lag values are matched on.
+# A row's lag values are then the rows in the cell of its lag survey, found by array indexing instead of sorting and merging
+# the theme on its key columns.
+# A key can have more than one row in a survey (e.g. a renamed vendor cited under both names), so each cell holds a range of rows
+# and rows are repeated once per matching lag row, giving the same rows in the same order as a left merge on the key columns.
+
+
+def lagVectors(survey_max):
+    # The Survey-over-Survey and Year-over-Year lag survey of each Survey_ID from 0 to survey_max, -1 where there is none.
+    # Surveys were semi-annual before survey 6 and quarterly from it: the Year-over-Year lag of surveys 3, 4 and 5 is 1, 2 and 2,
+    # and from survey 6 it is 3 surveys back for even and 4 surveys back for odd Survey_IDs.
+    survey = np.arange(survey_max + 1)
+    sos = survey - 1
+    yoy = np.where(survey >= 6, np.where(survey % 2 == 0, survey - 3, survey - 4), -1)
+    for survey_id, lag in [(3, 1), (4, 2), (5, 2)]:
+        if survey_id <= survey_max:
+            yoy[survey_id] = lag
+    return {"sos": sos, "yoy": yoy}
+
+
+def takeRows(values, rows):
+    # values[rows], with NaN where rows is -1.
+    taken = values.take(np.maximum(rows, 0)) if len(values) else np.full(len(rows), np.nan)
+    if (rows < 0).any():
+        taken = np.where(rows < 0, np.nan, taken)
+    return taken
+
+
+def addLags(df, keys, columns, lags = ("sos", "yoy")):
+    # Adds the value of each column in columns (a dict of column: lag column prefix) in each lag survey of lags,
+    # as "<prefix>_sos" and "<prefix>_yoy", from the rows of df with the same Survey_ID lag and keys.
+    survey = df["Survey_ID"].values.astype(np.int64)
+    survey_max = int(survey.max()) if len(df) else 0
+    code, first = entities.tupleCodes(df, keys)
+    cells = len(first)
+
+    # Rows of each (Survey_ID, key) cell, in their order in df: cell c holds rows order[start[c]:start[c] + count[c]].
+    # When no cell holds more than one row, position[c] is the row of cell c (-1 when it is empty) and no sort is needed.
+    cell = survey * cells + code
+    count = np.bincount(cell, minlength = (survey_max + 1) * cells)
+    unique = count.max() <= 1 if len(count) else True
+    if unique:
+        position = np.full(len(count), -1, dtype = np.int64)
+        position[cell] = np.arange(len(df))
+    else:
+        start = np.cumsum(count) - count
+        order = np.argsort(cell, kind = 'mergesort')
+
+    vectors = lagVectors(survey_max)
+    rows = np.arange(len(df))
+    matched = {}
+    for lag in lags:
+        lag_survey = vectors[lag][survey[rows]]
+        lag_cell = np.where(lag_survey >= 0, lag_survey * cells + code[rows], 0)
+        n = np.where(lag_survey >= 0, count[lag_cell], 0)
+
+        if unique:
+            matched[lag] = np.where(n > 0, position[lag_cell], -1)
+            continue
+
+        # Each row is repeated once per row in its lag cell (once when the cell is empty).
+        repeats = np.maximum(n, 1)
+        repeated = np.repeat(np.arange(len(rows)), repeats)
+        offset = np.arange(len(repeated)) - np.repeat(np.cumsum(repeats) - repeats, repeats)
+        match = np.where(n[repeated] > 0, order[np.minimum(start[lag_cell[repeated]] + offset, len(order) - 1)], -1)
+
+        rows = rows[repeated]
+        matched = {name: values[repeated] for name, values in matched.items()}
+        matched[lag] = match
+
+    # Without repeated rows the lag columns are added to a shallow copy of df rather than a copy of its data.
+    lagged = df.copy(deep = False) if unique else df.iloc[rows]
+    lagged.index = pd.RangeIndex(len(lagged))
+    for lag in lags:
+        for column, prefix in columns.items():
+            lagged[prefix + "_" + lag] = takeRows(df[column].values, matched[lag])
+    return lagged
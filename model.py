@@ -0,0 +1,446 @@
+import pandas as pd
+import numpy as np
+import datetime
+import weighted
+import entities
+
+
+
+# Model Creation and Performance Testing.
+# The theme outputs are merged into the Insight Dataset, stock price returns are merged on to label outperformers and
+# underperformers, a logistic regression model of outperformance is fit on the ratings, and the model's forecasts are
+# turned into the InsightForecast and InsightPerformance datasets.
+# See Appendix E of the accompanying methodology documentation for a graphical representation of this process.
+
+
+rating_list = ["Adoption_Rating", "Increase_Rating", "Decrease_Rating", "Replacing_Rating", "NetScore_Rating", "MarketShare_Rating", "Peer_Rating", "Cloud_Rating"]
+
+insight_columns = ['Survey_ID',	'Entity_ID',	'Company_ID',	'Bloomberg_ID_Historical',	'Citations',	'AdoptionP_Value',	'DecreaseP_Value',	'DecreaseP_Value_SurveyZ',	'FlatP_Value',	'FlatP_Value_SurveyZ',	'IncreaseP_Value',	'IncreaseP_Value_SurveyZ',	'MarketShare_Value',	'NetScore_Value',	'NetScore_Value_SurveyZ',	'ReplacingP_Value',	'ReplacingP_Value_SurveyZ',	'AdoptionP_Value_SurveyZ',	'AdoptionP_Delta_sos',	'AdoptionP_Delta_sos_SurveyZ',	'DecreaseP_Delta_sos',	'DecreaseP_Delta_sos_SurveyZ',	'FlatP_Delta_sos',	'FlatP_Delta_sos_SurveyZ',	'IncreaseP_Delta_sos',	'IncreaseP_Delta_sos_SurveyZ',	'MarketShare_Delta_sos',	'MarketShare_Delta_sos_SurveyZ',	'NetScore_Delta_sos',	'NetScore_Delta_sos_SurveyZ',	'ReplacingP_Delta_sos',	'ReplacingP_Delta_sos_SurveyZ',	'AdoptionP_Delta_yoy',	'AdoptionP_Delta_yoy_SurveyZ',	'DecreaseP_Delta_yoy',	'DecreaseP_Delta_yoy_SurveyZ',	'FlatP_Delta_yoy',	'FlatP_Delta_yoy_SurveyZ',	'IncreaseP_Delta_yoy',	'IncreaseP_Delta_yoy_SurveyZ',	'MarketShare_Delta_yoy',	'MarketShare_Delta_yoy_SurveyZ',	'NetScore_Delta_yoy',	'NetScore_Delta_yoy_SurveyZ',	'ReplacingP_Delta_yoy',	'ReplacingP_Delta_yoy_SurveyZ',	'Adoption_Rating',	'Increase_Rating',	'Decrease_Rating',	'Replacing_Rating',	'NetScore_Rating',	'MarketShare_Rating',	'Peer_Accelerating',	'Peer_Decelerating',	'Peer_Rating',	'Cloud_Citations',	'Cloud_NetScore',	'Control_NetScore',	'Cloud_NetScore_Delta_Control',	'Cloud_Overlap',	'Cloud_Share',	'Cloud_Share_sos',	'Cloud_Share_yoy',	'Cloud_NetScore_Delta_sos',	'Cloud_NetScore_Delta_yoy',	'Cloud_Rating']
+
+final_columns = ["Survey_Description_1","Survey_ID","Survey_Launch","Survey_Close","Announcement_Date",
+                 "Sector_Current","Vendor_Current","Product_Current","Symbol_ID_Current","Bloomberg_ID_Current",
+                 "FIGI_ID_Current","Sector_Historical","Vendor_Historical","Product_Historical","Symbol_ID_Historical",
+                 "Bloomberg_ID_Historical","FIGI_ID_Historical","Citations","AdoptionP_Value","AdoptionP_Value_SurveyZ",
+                 "AdoptionP_Delta_sos","AdoptionP_Delta_sos_SurveyZ","AdoptionP_Delta_yoy","AdoptionP_Delta_yoy_SurveyZ",
+                 "Adoption_Rating","IncreaseP_Value","IncreaseP_Value_SurveyZ","IncreaseP_Delta_sos",
+                 "IncreaseP_Delta_sos_SurveyZ","IncreaseP_Delta_yoy","IncreaseP_Delta_yoy_SurveyZ","Increase_Rating",
+                 "FlatP_Value","FlatP_Value_SurveyZ","FlatP_Delta_sos","FlatP_Delta_sos_SurveyZ","FlatP_Delta_yoy",
+                 "FlatP_Delta_yoy_SurveyZ","DecreaseP_Value","DecreaseP_Value_SurveyZ","DecreaseP_Delta_sos",
+                 "DecreaseP_Delta_sos_SurveyZ","DecreaseP_Delta_yoy","DecreaseP_Delta_yoy_SurveyZ","Decrease_Rating",
+                 "ReplacingP_Value","ReplacingP_Value_SurveyZ","ReplacingP_Delta_sos","ReplacingP_Delta_sos_SurveyZ",
+                 "ReplacingP_Delta_yoy","ReplacingP_Delta_yoy_SurveyZ","Replacing_Rating","NetScore_Value"
+                 ,"NetScore_Value_SurveyZ","NetScore_Delta_sos","NetScore_Delta_sos_SurveyZ","NetScore_Delta_yoy",
+                 "NetScore_Delta_yoy_SurveyZ","NetScore_Rating","MarketShare_Value","MarketShare_Delta_sos",
+                 "MarketShare_Delta_sos_SurveyZ","MarketShare_Delta_yoy","MarketShare_Delta_yoy_SurveyZ",
+                 "MarketShare_Rating","Peer_Accelerating","Peer_Decelerating","Peer_Rating","Cloud_Citations",
+                 "Cloud_NetScore","Cloud_Share","Cloud_Share_sos","Cloud_NetScore_Delta_sos","Cloud_Share_yoy",
+                 "Cloud_NetScore_Delta_yoy","Control_NetScore","Cloud_Overlap","Cloud_NetScore_Delta_Control","Cloud_Rating"]
+
+
+def insightData(spend_final, peer_final, cloud_final, entity_dict, mincitations):
+
+    # Metrics from all themes are merged together.
+
+    # Please note, only data from 2015 and on is used for the remainder of this program.
+    # The time difference between the start of the Source Dataset(2010) and the remainder of Insight Dataset(2015) is primarily due to two factors:
+    # [1] a shift in technology spend that occurred during that time frame from a largely CapEx model to a mix between CapEx and OpEx
+    # and
+    # [2] ETR’s sample of respondents(i.e., the number of CIOs and IT Decision Makers participating in ETR’s ecosystem and taking our surveys) approximately doubled between 2010 and 2015.
+
+    cloud_final = cloud_final.drop(["Cloud_N", "Survey_Citations"], axis = 1)
+
+    returns1 = spend_final.merge(peer_final, how = 'outer', on = ["Survey_ID", "Entity_ID"])
+    returns1 = returns1.merge(cloud_final, how = 'outer', on = ["Survey_ID", "Entity_ID"])
+    returns1 = returns1[returns1["Survey_ID"] >= 18]
+    returns1 = returns1[returns1["Citations"] >= mincitations]
+    returns1["Company_ID"] = entities.entityKey(returns1, entity_dict, "Company_ID")
+    returns1["Bloomberg_ID_Historical"] = entities.entityKey(returns1, entity_dict, "Bloomberg_ID_Historical").astype(object)
+    returns1 = returns1.sort_values(by = ["Survey_ID", "Bloomberg_ID_Historical"], na_position = 'first').reset_index(drop = True)
+
+    return returns1[insight_columns]
+
+
+def stockReturns(returns1, spReturns, zcutoff):
+
+    # Stock Price returns are merged on.
+    # Stock Price return survey averages and z-scores are calculated to determine outperformers and underperformers.
+
+    spReturns2 = spReturns.sort_values(by = ["Survey_ID", "Bloomberg_ID_Historical"], na_position = 'first').reset_index()[["Survey_ID", "Bloomberg_ID_Historical", "Return_End"]]
+
+    returns2 = returns1.merge(spReturns2, how = 'left', on = ["Survey_ID", "Bloomberg_ID_Historical"])
+
+    returns2_means = pd.DataFrame()
+
+    returns2_means["Return_End_Mean"] = returns2.groupby("Survey_ID")["Return_End"].mean()
+    returns2_means["Return_End_StdDev"] = returns2.groupby("Survey_ID")["Return_End"].std()
+    returns2_means = returns2_means.reset_index()
+
+    returns3 = returns2.merge(returns2_means, on = "Survey_ID")
+    returns3["Return_EndZ"] = (returns3["Return_End"] - returns3["Return_End_Mean"]) / returns3["Return_End_StdDev"]
+    returns3["PosNeg_EndZ"] = np.nan
+
+    returns3.loc[(np.isnan(returns3["Return_EndZ"]) == False) & (returns3["Return_EndZ"] >= zcutoff), "PosNeg_EndZ"] = "Positive"
+    returns3.loc[(np.isnan(returns3["Return_EndZ"]) == False) & (returns3["Return_EndZ"] <= -zcutoff), "PosNeg_EndZ"] = "Negative"
+
+    return returns3
+
+
+def horizonReturns(returns1, spReturns, horizons, zcutoff):
+
+    # stockReturns for several return horizons at once. spReturns is a long table with one row per survey, security and
+    # Return_Horizon (the horizon in months). The returns of the horizons in horizons are pivoted into one column each and merged on
+    # in a single merge, and the survey z-scores and labels of all horizons are calculated together:
+    # Return_End_<h>, Return_EndZ_<h> and PosNeg_EndZ_<h> for each horizon h.
+
+    keys = ["Survey_ID", "Bloomberg_ID_Historical"]
+    spReturns2 = spReturns[spReturns["Return_Horizon"].isin(horizons)].drop_duplicates(keys + ["Return_Horizon"])
+    spReturns2 = spReturns2.set_index(keys + ["Return_Horizon"])["Return_End"].unstack("Return_Horizon").reindex(columns = horizons)
+    spReturns2.columns = ["Return_End_%d" % horizon for horizon in horizons]
+
+    returns3 = returns1.merge(spReturns2.reset_index(), how = 'left', on = keys)
+
+    returns = returns3[list(spReturns2.columns)]
+    grouped = returns.groupby(returns3["Survey_ID"].values)
+    z = ((returns - grouped.transform('mean')) / grouped.transform('std')).values
+
+    labels = np.full(z.shape, np.nan, dtype = object)
+    with np.errstate(invalid = 'ignore'):
+        labels[z >= zcutoff] = "Positive"
+        labels[z <= -zcutoff] = "Negative"
+
+    for i, horizon in enumerate(horizons):
+        returns3["Return_EndZ_%d" % horizon] = z[:, i]
+        returns3["PosNeg_EndZ_%d" % horizon] = labels[:, i]
+
+    return returns3
+
+
+def ratingLevels(predictors, rating_list):
+    # Each rating as a level: 1 for "Positive", -1 for "Negative" and 0 when it is not rated.
+    levels = np.zeros((len(predictors), len(rating_list)), dtype = np.int8)
+    for i, rating in enumerate(rating_list):
+        values = np.asarray(predictors[rating], dtype = object)
+        levels[values == "Positive", i] = 1
+        levels[values == "Negative", i] = -1
+    return levels
+
+
+def ratingPatterns(levels):
+    # The ratings take three levels, so there are at most 3^8 distinct rows of ratings.
+    # Returns the unique rows (rating patterns) and the pattern of each row, so the model only sees one row per pattern.
+    codes = (levels.astype(np.int64) + 1).dot(3 ** np.arange(levels.shape[1], dtype = np.int64))
+    codes, first, inverse = np.unique(codes, return_index = True, return_inverse = True)
+    return levels[first], inverse
+
+
+def designMatrix(levels, rating_list):
+    # Create Design Matrix for regression: each rating is coded as a Negative and a Positive column.
+    design = pd.DataFrame({"Intercept": np.ones(len(levels))})
+    for i, rating in enumerate(rating_list):
+        rated = [levels[:, i] == 0, levels[:, i] == 1]
+        design[rating + "Negative"] = np.select(rated, [-1., 0.], 1.)
+        design[rating + "Positive"] = np.select(rated, [-1., 1.], 0.)
+    return design
+
+
+def fitModel(returns3, survey_max, verbose = True, start_params = None):
+
+    # The logistic regression model is trained to model the probability of outperformance.
+    # Returns the fitted model and the ratings kept by the step-wise selection.
+    # The fit can be warm-started from the coefficients of an earlier fit, as a dict by design matrix column (see walkforward.py).
+
+    # Prune unuseful data/last survey data
+    returns3 = returns3[returns3["Survey_ID"] < survey_max]
+    returns3 = returns3[pd.notnull(returns3["PosNeg_EndZ"])]
+
+    response = (returns3["PosNeg_EndZ"] == "Positive").values
+
+    # Rows with the same rating pattern are collapsed into one row with their numbers of Positive and Negative outcomes.
+    # The binomial model on the collapsed rows has the same likelihood, coefficients and Wald tests as the logistic regression
+    # on the rows, but its size does not depend on the number of vendors.
+    patterns, inverse = ratingPatterns(ratingLevels(returns3, rating_list))
+    positives = np.bincount(inverse, weights = response, minlength = len(patterns))
+    outcomes = np.column_stack([positives, np.bincount(inverse, minlength = len(patterns)) - positives])
+
+    return selectModel(patterns, outcomes, verbose, start_params)
+
+
+def selectModel(patterns, outcomes, verbose = True, start_params = None):
+
+    # statsmodels is imported here rather than with the module, as it takes most of the import time
+    # and is only needed when a model is fit (see quantinsights.py).
+    import statsmodels.genmod.generalized_linear_model as glm
+    import statsmodels.genmod.families as families
+
+    # The binomial model of the Positive and Negative outcomes of each rating pattern, with step-wise backwards selection of the ratings.
+
+    selected = list(rating_list)
+    newdm = designMatrix(patterns, selected)
+
+    # While loop manually performs step-wise backwards selection
+    selection_completed = False
+    while selection_completed == False:
+        # Fit model function
+        smmodel = glm.GLM(outcomes, newdm, family = families.Binomial())
+        result = None
+        if start_params is not None:
+            result = smmodel.fit(start_params = np.array([start_params.get(column, 0.) for column in newdm.columns]))
+            # Newton steps can diverge from a poor starting point; the fit is then restarted from the default start.
+            if not (result.converged and np.isfinite(result.llf)):
+                result = None
+        if result is None:
+            result = smmodel.fit()
+
+        if verbose:
+            print(result.summary())
+            print(result.wald_test_terms())
+
+        # Retrieve Wald test statistics
+
+        wald_results = []
+        for rating in selected:
+            hypotheses = "(" + rating + "Negative = 0), (" + rating + "Positive = 0)"
+            wald_results.append(result.wald_test(hypotheses).pvalue)
+
+        pvalues = pd.DataFrame(selected, columns = ["Predictor"])
+        pvalues["p-value"] = pd.Series(wald_results)
+
+
+        maxpvalue = pvalues["p-value"].max().item()
+        maxp = pvalues[pvalues["p-value"] == maxpvalue]
+
+        if maxpvalue <= .2:
+            selection_completed = True
+        else:
+            drop_column = maxp.iloc[0, 0]
+            newdm = newdm.drop([drop_column + "Positive", drop_column + "Negative"], axis = 1)
+            selected.remove(drop_column)
+            if start_params is not None:
+                start_params = dict(result.params)
+            if verbose:
+                print("Dropped Predictor:" + drop_column)
+
+    return result, selected
+
+
+def fitHorizons(returns3, survey_max, horizons, verbose = True):
+
+    # fitModel for each horizon of horizonReturns, returning a dict of (result, selected ratings) by horizon.
+    # The rating patterns are found once for all horizons; each horizon's model is then fit on its own numbers of
+    # Positive and Negative outcomes per pattern, leaving out the patterns without a labelled row in that horizon.
+
+    returns3 = returns3[returns3["Survey_ID"] < survey_max]
+    patterns, inverse = ratingPatterns(ratingLevels(returns3, rating_list))
+
+    fits = {}
+    for horizon in horizons:
+        labels = returns3["PosNeg_EndZ_%d" % horizon].values
+        positives = np.bincount(inverse, weights = labels == "Positive", minlength = len(patterns))
+        labelled = np.bincount(inverse, weights = pd.notnull(labels), minlength = len(patterns))
+        fitted = labelled > 0
+        outcomes = np.column_stack([positives, labelled - positives])[fitted]
+        fits[horizon] = selectModel(patterns[fitted], outcomes, verbose)
+    return fits
+
+
+def forecast(returns3, result, selected, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff):
+
+    # The original dataset is passed through the trained model to determine the model's historical performance.
+
+    # The model is evaluated once per rating pattern and looked up for each row.
+    patterns, inverse = ratingPatterns(ratingLevels(returns3, selected))
+    newpred = designMatrix(patterns, selected)
+
+    p_Positive = np.asarray(result.predict(newpred))[inverse]
+    p_Negative = 1-p_Positive
+
+    forecast1 = returns3.copy()
+    forecast1["P_Positive"] = p_Positive
+    forecast1["P_Negative"] = p_Negative
+
+    # Vendors across multiple sectors or products are combined using a citation-weighted average to determine the vendor's overall probability of outperformance.
+    # Only vendors above a certain threshold are assigned a Positive / Negative forecast.
+
+    # Vendors are combined on their historical vendor name and security identifiers (Company_ID).
+
+    weightedmeans = weighted.weightedMoments(forecast1, ['Survey_ID', 'Company_ID'], ['P_Positive'], 'Citations')
+    weightedmeans = weightedmeans.drop(['P_Positive_StdDev'], axis = 1).rename(columns = {'P_Positive_Mean':'P_Positive'})
+    # The vendor's citations are kept for the citation-weighted portfolios (see portfolio.py).
+    weightedmeans['Citations'] = forecast1.groupby(['Survey_ID', 'Company_ID'], sort = True)['Citations'].sum().values
+    weightedmeans = entities.decode(weightedmeans, survey_dict, entity_dict, id_column = 'Company_ID', columns = entities.entity_keys['Company_ID'])
+
+    spReturns = spReturns.sort_values(by=['Survey_ID', 'Bloomberg_ID_Historical'])
+
+    forecast2 = weightedmeans.sort_values(by=['Survey_ID', 'Bloomberg_ID_Historical'])
+    forecast3 = forecast2.merge(spReturns, how = 'left', on = ['Survey_ID', 'Bloomberg_ID_Historical'])
+
+    forecast3 = forecast3[pd.isnull(forecast3["P_Positive"]) == False]
+    forecast3 = forecast3[pd.isnull(forecast3["Bloomberg_ID_Historical"]) == False]
+
+    forecast3["Insight_Forecast"] = np.nan
+
+    forecast3.loc[forecast3["P_Positive"] >= upperpcutoff, "Insight_Forecast"] = "Positive"
+    forecast3.loc[forecast3["P_Positive"] <= lowerpcutoff, "Insight_Forecast"] = "Negative"
+
+    forecast3 = forecast3[pd.isnull(forecast3["Insight_Forecast"]) == False]
+
+    forecast3 = forecast3.sort_values(by = ["Survey_ID", "Insight_Forecast", "Bloomberg_ID_Historical"])
+
+    return forecast3
+
+
+def forecastHorizons(returns3, fits, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff):
+
+    # forecast for each horizon in fits (see fitHorizons), as one long table with a Return_Horizon column.
+    # The rating patterns, the citation-weighted averages of the vendors and the merge of the returns are done once for all horizons.
+
+    horizons = list(fits)
+    patterns, inverse = ratingPatterns(ratingLevels(returns3, rating_list))
+
+    forecast1 = returns3[["Survey_ID", "Company_ID", "Citations"]].copy()
+    for horizon, (result, selected) in fits.items():
+        columns = [rating_list.index(rating) for rating in selected]
+        forecast1["P_Positive_%d" % horizon] = np.asarray(result.predict(designMatrix(patterns[:, columns], selected)))[inverse]
+
+    weightedmeans = weighted.weightedMoments(forecast1, ['Survey_ID', 'Company_ID'], ["P_Positive_%d" % horizon for horizon in horizons], 'Citations')
+    means = weightedmeans[["P_Positive_%d_Mean" % horizon for horizon in horizons]].values
+
+    # One row per vendor and horizon.
+    forecast2 = weightedmeans[['Survey_ID', 'Company_ID']].iloc[np.repeat(np.arange(len(weightedmeans)), len(horizons))].reset_index(drop = True)
+    forecast2["Return_Horizon"] = np.tile(horizons, len(weightedmeans))
+    forecast2["P_Positive"] = means.ravel()
+    forecast2["Citations"] = np.repeat(forecast1.groupby(['Survey_ID', 'Company_ID'], sort = True)['Citations'].sum().values, len(horizons))
+    forecast2 = entities.decode(forecast2, survey_dict, entity_dict, id_column = 'Company_ID', columns = entities.entity_keys['Company_ID'])
+
+    forecast3 = forecast2.merge(spReturns, how = 'left', on = ['Survey_ID', 'Bloomberg_ID_Historical', 'Return_Horizon'])
+
+    forecast3 = forecast3[pd.isnull(forecast3["P_Positive"]) == False]
+    forecast3 = forecast3[pd.isnull(forecast3["Bloomberg_ID_Historical"]) == False]
+
+    forecast3["Insight_Forecast"] = np.nan
+
+    forecast3.loc[forecast3["P_Positive"] >= upperpcutoff, "Insight_Forecast"] = "Positive"
+    forecast3.loc[forecast3["P_Positive"] <= lowerpcutoff, "Insight_Forecast"] = "Negative"
+
+    forecast3 = forecast3[pd.isnull(forecast3["Insight_Forecast"]) == False]
+
+    forecast3 = forecast3.sort_values(by = ["Return_Horizon", "Survey_ID", "Insight_Forecast", "Bloomberg_ID_Historical"])
+
+    return forecast3
+
+
+def strtodate(x):
+    format_str = '%m/%d/%Y'
+    return datetime.datetime.strptime(x, format_str)
+
+
+def datetostr(x):
+    format_str = '%m/%d/%Y'
+    return x.strftime(format_str)
+
+
+def totals(df, columns, by, how):
+    # The sum, min or max (how) of the columns as a one-row DataFrame, or with by columns one row per group.
+    if by:
+        return getattr(df.groupby(by)[columns], how)().reset_index()
+    return getattr(df[columns], how)().reset_index().set_index('index').T
+
+
+def performance(forecast3, ftecReturns, by = []):
+
+    # Historical returns are calculated to measure model performance.
+    # With by columns (Return_Horizon for forecastHorizons), the performance of each of their groups is calculated in the same pass,
+    # with the by columns in front of the InsightPerformance columns.
+
+    windows = by + ["Survey_Description_1", "Survey_ID", "Survey_Launch", "Survey_Close", "Announcement_Date", "Window_Start", "Window_End"]
+
+    forecast4 = forecast3.groupby(windows + ["Insight_Forecast"])["Return_End"].mean().reset_index(name = "Return_End_Mean")
+    temp = forecast3.groupby(windows + ["Insight_Forecast"])["Return_End"].count().reset_index(name = "Vendor_Count")
+
+    forecast4["Vendor_Count"] = temp["Vendor_Count"]
+
+    forecast5a = pd.pivot_table(forecast4, index = windows, columns = "Insight_Forecast", values = "Return_End_Mean").reset_index()
+    forecast5b = pd.pivot_table(forecast4, index = windows, columns = "Insight_Forecast", values = "Vendor_Count").reset_index()
+    forecast5a = forecast5a.rename(columns = {"Positive":"Positive_Returns", "Negative":"Negative_Returns"})
+    forecast5b = forecast5b.rename(columns = {"Positive":"Positive_VendorCount", "Negative":"Negative_VendorCount"})
+
+    forecast6 = forecast5a.merge(forecast5b, on = windows).sort_values(by + ["Survey_ID"])
+
+    ftecReturns = ftecReturns.sort_values(by + ["Survey_ID"])[by + ["Survey_ID", "Benchmark_Fidelity_MSCI_IT_ETF"]]
+
+    forecast7 = forecast6.merge(ftecReturns, how = 'left', on = by + ["Survey_ID"])
+
+    forecast7["Index_Type"] = "Single Insight Dataset"
+    forecast7["Index_Window"] = forecast7["Window_Start"] + "-" + forecast7["Window_End"]
+    forecast7["Window_Year"] = forecast7["Window_Start"].str.slice(start = -4)
+    forecast7["Positive_Returns_log"] = np.log(forecast7["Positive_Returns"] + 1)
+    forecast7["Negative_Returns_log"] = np.log(forecast7["Negative_Returns"] + 1)
+    forecast7["Benchmark_Return_log"] = np.log(forecast7["Benchmark_Fidelity_MSCI_IT_ETF"] + 1)
+
+    forecast7b = forecast7.groupby(by + ["Window_Year"])[["Positive_Returns_log", "Negative_Returns_log", "Benchmark_Return_log"]].sum().reset_index()
+    forecast7c = totals(forecast7, ["Positive_Returns_log", "Negative_Returns_log", "Benchmark_Return_log"], by, "sum")
+
+    forecast7["Window_Start"] = forecast7["Window_Start"].apply(strtodate)
+    forecast7["Window_End"] = forecast7["Window_End"].apply(strtodate)
+
+    mindate = forecast7.groupby(by + ["Window_Year"])[["Window_Start", "Window_End"]].min().reset_index()
+    maxdate = forecast7.groupby(by + ["Window_Year"])[["Window_Start", "Window_End"]].max().reset_index()
+
+    window7b = mindate.merge(maxdate, on = by + ["Window_Year"])
+    window7b = window7b.rename(columns = {"Window_Start_x":"Window_Start_Min", "Window_Start_y":"Window_Start_Max", "Window_End_x":"Window_End_Min", "Window_End_y":"Window_End_Max"})
+
+    window7c = totals(forecast7, ["Window_Start", "Window_End"], by, "min")
+    window7c = window7c.rename(columns = {"Window_Start":"Window_Start_Min", "Window_End":"Window_End_Min"})
+    maxdate = totals(forecast7, ["Window_Start", "Window_End"], by, "max")
+    maxdate = maxdate.rename(columns = {"Window_Start":"Window_Start_Max", "Window_End":"Window_End_Max"})
+
+    window7c["Window_Start_Max"] = maxdate["Window_Start_Max"]
+    window7c["Window_End_Max"] = maxdate["Window_End_Max"]
+
+    forecast8b = forecast7b.merge(window7b, on = by + ["Window_Year"])
+    forecast8b["Index_Type"] = "Four Consecutive Insight Datasets"
+    forecast8b["Window_Start_Min"] = forecast8b["Window_Start_Min"].apply(datetostr)
+    forecast8b["Window_Start_Max"] = forecast8b["Window_Start_Max"].apply(datetostr)
+    forecast8b["Window_End_Min"] = forecast8b["Window_End_Min"].apply(datetostr)
+    forecast8b["Window_End_Max"] = forecast8b["Window_End_Max"].apply(datetostr)
+    forecast8b["Index_Window"] = forecast8b["Window_Start_Min"].astype(str) + "-" + forecast8b["Window_End_Max"].astype(str)
+    forecast8b["Positive_Returns_Consecutive"] = np.exp(forecast8b["Positive_Returns_log"]) - 1
+    forecast8b["Negative_Returns_Consecutive"] = np.exp(forecast8b["Negative_Returns_log"]) - 1
+    forecast8b["Benchmark_Returns_Consecutive"] = np.exp(forecast8b["Benchmark_Return_log"]) - 1
+
+    forecast8c = forecast7c
+    forecast8c["Window_Start_Min"] = window7c["Window_Start_Min"]
+    forecast8c["Window_End_Min"] = window7c["Window_End_Min"]
+    forecast8c["Window_Start_Max"] = window7c["Window_Start_Max"]
+    forecast8c["Window_End_Max"] = window7c["Window_End_Max"]
+    forecast8c["Index_Type"] = "Cumulative Insight Dataset"
+    forecast8c["Window_Start_Min"] = forecast8c["Window_Start_Min"].apply(datetostr)
+    forecast8c["Window_Start_Max"] = forecast8c["Window_Start_Max"].apply(datetostr)
+    forecast8c["Window_End_Min"] = forecast8c["Window_End_Min"].apply(datetostr)
+    forecast8c["Window_End_Max"] = forecast8c["Window_End_Max"].apply(datetostr)
+    forecast8c["Index_Window"] = forecast8c["Window_Start_Min"].astype(str) + "-" + forecast8c["Window_End_Max"].astype(str)
+    forecast8c["Positive_Returns_Consecutive"] = np.exp(forecast8c["Positive_Returns_log"]) - 1
+    forecast8c["Negative_Returns_Consecutive"] = np.exp(forecast8c["Negative_Returns_log"]) - 1
+    forecast8c["Benchmark_Returns_Consecutive"] = np.exp(forecast8c["Benchmark_Return_log"]) - 1
+
+    forecast9 = forecast7[by + ["Index_Type", "Index_Window", "Positive_Returns", "Negative_Returns", "Benchmark_Fidelity_MSCI_IT_ETF"]]
+    forecast9 = forecast9.append(forecast8b[by + ["Index_Type", "Index_Window", "Positive_Returns_Consecutive", "Negative_Returns_Consecutive", "Benchmark_Returns_Consecutive"]].rename(columns = {"Positive_Returns_Consecutive":"Positive_Returns", "Negative_Returns_Consecutive":"Negative_Returns", "Benchmark_Returns_Consecutive":"Benchmark_Fidelity_MSCI_IT_ETF"}))
+    forecast9 = forecast9.append(forecast8c[by + ["Index_Type", "Index_Window", "Positive_Returns_Consecutive", "Negative_Returns_Consecutive", "Benchmark_Returns_Consecutive"]].rename(columns = {"Positive_Returns_Consecutive":"Positive_Returns", "Negative_Returns_Consecutive":"Negative_Returns", "Benchmark_Returns_Consecutive":"Benchmark_Fidelity_MSCI_IT_ETF"}))
+    forecast9 = forecast9.reset_index().drop("index", axis = 1)
+
+    return forecast9
+
+
+def finalInsightData(returns1, survey_dict, entity_dict):
+    # The survey and vendor/product descriptive columns are joined back on from the entity dictionary.
+    InsightData_Final = entities.decode(returns1.drop(["Company_ID", "Bloomberg_ID_Historical"], axis = 1), survey_dict, entity_dict)
+    InsightData_Final = InsightData_Final.sort_values(by = ["Survey_ID", "Sector_Current", "Vendor_Current", "Product_Current"], na_position = 'first').reset_index(drop = True)
+    return InsightData_Final[final_columns]
+
+
+def finalInsightForecast(forecast3, probability = False):
+    # With probability, the vendor's P_Positive is kept after its Insight_Forecast (see query.py).
+    # The forecasts of forecastHorizons keep their Return_Horizon in front of the Insight_Forecast.
+    horizon = ["Return_Horizon"] if "Return_Horizon" in forecast3.columns else []
+    forecast3 = forecast3.sort_values(by = horizon + ["Survey_ID", "Insight_Forecast", "Vendor_Historical"])
+    return forecast3.drop(["Return_End", "Window_Start", "Window_End"], axis = 1).reset_index(drop = True)[["Survey_Description_1", "Survey_ID", "Survey_Launch", "Survey_Close", "Announcement_Date"] + horizon + ["Insight_Forecast"] + (["P_Positive"] if probability else []) + ["Vendor_Historical", "Bloomberg_ID_Historical", "Symbol_ID_Historical", "FIGI_ID_Historical"]]
@@ -0,0 +1,90 @@
+import os
+import sys
+import shutil
+import tempfile
+import subprocess
+import numpy as np
+import pandas as pd
+import themes
+
+
+
+# Parallel theme mode.
+# The spend, peer and cloud themes only read the coded citations and the entity table, and are not joined until the
+# Insight Dataset is built. runThemes writes the citations once to a temporary folder as one .npy file per column
+# (categorical columns as their codes, with the categories pickled next to them) and starts one worker process per theme.
+# Each worker memory-maps the columns, computes its theme's metrics, deltas and ratings (see themes.py) and pickles the result,
+# so the citations are written once rather than pickled to each worker.
+# The workers are separate Python processes running this file, so the mode works the same on Windows and Linux.
+
+
+def writeColumns(df, folder):
+    os.makedirs(folder)
+    categories = {}
+    for column in df.columns:
+        values = df[column]
+        if str(values.dtype) == "category":
+            categories[column] = values.cat.categories
+            values = values.cat.codes
+        np.save(os.path.join(folder, column + ".npy"), values.values)
+    pd.to_pickle({"columns": list(df.columns), "categories": categories}, os.path.join(folder, "columns.pkl"))
+
+
+def readColumns(folder):
+    layout = pd.read_pickle(os.path.join(folder, "columns.pkl"))
+    columns = {}
+    for column in layout["columns"]:
+        values = np.load(os.path.join(folder, column + ".npy"), mmap_mode = 'r')
+        if column in layout["categories"]:
+            values = pd.Categorical.from_codes(values, layout["categories"][column])
+        columns[column] = values
+    return pd.DataFrame(columns, columns = layout["columns"])
+
+
+def runTheme(folder, name):
+    # Worker: computes one theme from the shared citations and pickles its output to the folder.
+    inputs = pd.read_pickle(os.path.join(folder, "inputs.pkl"))
+    citations = readColumns(os.path.join(folder, "citations"))
+    entity_dict = inputs["entities"]
+    p = inputs["parameters"]
+
+    if name == "spend":
+        output = themes.spendTheme(citations, entity_dict, p["vcutoff"], p["dcutoff"], p["mincitations"])
+    elif name == "peer":
+        output = themes.peerTheme(citations, entity_dict, p["peermincitations"], p["deltayoy"], p["peerdelta"])
+    else:
+        output = themes.cloudTheme(citations, entity_dict, p["cloudsector"], p["cloudvendors"], p["cloudthresholds"])
+    output.to_pickle(os.path.join(folder, name + ".pkl"))
+
+
+def runThemes(citations, entity_dict, theme_parameters, names = ("spend", "peer", "cloud")):
+    # Returns a dict with the output of each theme, computed in one worker process per theme.
+    folder = tempfile.mkdtemp(prefix = "QuantInsights_Themes_")
+    try:
+        writeColumns(citations, os.path.join(folder, "citations"))
+        pd.to_pickle({"entities": entity_dict, "parameters": theme_parameters}, os.path.join(folder, "inputs.pkl"))
+
+        runWorkers(os.path.abspath(__file__), folder, names)
+        return {name: pd.read_pickle(os.path.join(folder, name + ".pkl")) for name in names}
+    finally:
+        shutil.rmtree(folder, ignore_errors = True)
+
+
+def runWorkers(script, folder, names):
+    # Runs "python <script> <folder> <name>" for each name at once and waits for all of them.
+    # The remaining workers are stopped when one of them fails.
+    workers = []
+    try:
+        workers = [subprocess.Popen([sys.executable, script, folder, str(name)]) for name in names]
+        for name, worker in zip(names, workers):
+            if worker.wait() != 0:
+                raise RuntimeError("Worker " + str(name) + " of " + os.path.basename(script) + " failed with exit code " + str(worker.returncode))
+    finally:
+        for worker in workers:
+            if worker.poll() is None:
+                worker.kill()
+                worker.wait()
+
+
+if __name__ == "__main__":
+    runTheme(sys.argv[1], sys.argv[2])
@@ -23,3 +23,99 @@ peerdelta = 2  # Difference between accelerating peers and decelerating peers
 zcutoff = .253  # Minimum difference from 0 in z-score for a label of "Positive" or "Negative"
 upperpcutoff = .55  # Minimum p value to be considered "Positive"
 lowerpcutoff = .45  # Maximum p value to be considered "Negative"
+model_summaries = True  # Print the summary and Wald tests of each step of the model's step-wise selection
+return_horizons = None  # Return horizons in months to evaluate together, e.g. [1, 3, 6, 12]; the returns files then have a Return_Horizon column with one row per horizon. None uses the single Return_End window
+
+# Cloud Rating parameters
+cloudsector = "CLOUD COMPUTING"  # Sector of the major Public Cloud vendors
+cloudvendors = ["AWS", "Microsoft", "Google"]  # Major Public Cloud vendors: their customers form the Cloud Group and they are always rated "Positive"
+
+# Cloud Rating decision tree thresholds.
+# Values given as (sos_yoy, sos) pairs apply to vendors with both Survey-over-Survey and Year-over-Year history
+# and to vendors with Survey-over-Survey history only. "delta" is the average of the Cloud Net Score deltas
+# (the Survey-over-Survey delta alone when there is no Year-over-Year history) and "control" is the Cloud Group Net Score less the Control Group Net Score.
+cloudthresholds = {
+    "netscore_high": .7,                 # Cloud Net Score at or above which a vendor is "Positive"
+    "netscore_mid": .35,                 # Minimum Cloud Net Score for a trend-based "Positive"
+    "netscore_low": .1,                  # Cloud Net Score at or below which a vendor is "Negative"
+    "trend_delta": (.02, .02),           # Minimum average delta for a trend-based rating
+    "trend_control": (0, .02),           # Minimum Cloud vs. Control difference for a trend-based rating
+    "band_delta": (.05, .02),            # Largest delta against the rating allowed by the Cloud vs. Control rule
+    "band_control": (.05, .05),          # Minimum Cloud vs. Control difference for the Cloud vs. Control rule
+    "band_citations": (5, .05),          # Minimum Control Group citations for the Cloud vs. Control rule
+    "share_drop": .5,                    # A "Positive" is removed if Cloud_Share falls below this fraction of its sos/yoy value
+    "share_rise": 1.5,                   # A "Negative" is removed if Cloud_Share rises above this multiple of its sos/yoy value
+    "min_survey_citations": 30,          # Minimum citations to be considered for a rating
+    "min_cloud_citations": 5,            # Minimum Cloud Group citations to be considered for a rating
+    "min_cloud_overlap": .4,             # Minimum share of citations from the Cloud Group to be considered for a rating
+}
+
+# Incremental mode parameters
+incremental = False  # Only compute the surveys that are not in the state file, then save the updated theme outputs to it (see incremental.py)
+state_file = "QuantInsights_State.pkl"  # File path of the saved theme outputs
+
+# Ingest cache parameters
+cache_dir = "QuantInsights_Cache"  # Folder for the typed column cache of the three input files (see ingest.py); None parses the CSV files on every run
+
+# Streaming mode parameters
+streaming = False  # Split the source dataset into per-survey partitions and process one survey at a time, to bound memory use (see partition.py)
+partition_dir = "QuantInsights_Partitions"  # Folder for the per-survey partitions of the source dataset; must be new, empty or an earlier partition_dir
+chunksize = 1000000  # Rows of the source dataset read at a time when it is partitioned
+
+# Parallel theme mode parameters
+parallel_themes = False  # Compute the spend, peer and cloud themes in three parallel worker processes (see parallel.py); not used in streaming mode
+
+# Sector-sharded theme mode parameters (see shards.py)
+sharded_themes = False  # Compute the spend and peer themes as independent (Survey_ID, Sector) work units on worker processes or nodes; not used in streaming mode
+shard_processes = None  # Number of local worker processes (None uses one per CPU)
+shard_tasks = None  # Number of tasks each step's work units are balanced over (None uses four per CPU)
+shard_executor = None  # "module:function" returning an executor, a function map(function, tasks) that runs the tasks on several nodes; None uses local worker processes
+
+# Walk-forward mode parameters
+walkforward = False  # Forecast each survey with a model fit only on the surveys before it, instead of one model fit on all surveys (see walkforward.py)
+walkforward_min_surveys = 2  # Minimum number of earlier surveys with returns for a survey to be forecast in walk-forward mode
+walkforward_processes = None  # Number of worker processes for the walk-forward fits (None uses one per CPU)
+
+# Significance parameters
+significance = False  # Add bootstrap confidence intervals and permutation p-values of the Positive minus Negative spread to InsightPerformance (see significance.py)
+significance_resamples = 10000  # Number of bootstrap and permutation resamples
+significance_level = .95  # Confidence level of the bootstrap intervals
+significance_seed = 0  # Random seed of the resamples
+significance_processes = 1  # Number of worker processes for the resamples (None uses one per CPU)
+
+# Portfolio simulation parameters (see portfolio.py)
+portfolio = False  # Simulate Long, Short and LongShort portfolios of the forecasts from survey to survey, returned as InsightPortfolio and summarized in the sweep results
+portfolio_weighting = "equal"  # Position sizes: "equal", "citations" (the vendor's citations) or "probability" (P_Positive for the Long book, P_Negative for the Short book)
+portfolio_cost_bps = 0.  # Commission of each trade in basis points of the value traded
+portfolio_slippage_bps = 0.  # Slippage of each trade in basis points of the value traded
+portfolio_trade_fee = 0.  # Fixed cost of each trade as a fraction of the book's value
+
+# Export parameters (see export.py; requires pyarrow)
+export_dir = None  # Folder to write the final datasets to as files partitioned by Survey_ID; None disables the export
+export_format = "parquet"  # "parquet" or "arrow" (Arrow IPC files, which can be memory-mapped)
+export_themes = False  # Also export the spend, peer and cloud theme outputs
+
+# Query service parameters (see query.py, run with "python query.py")
+publish_dir = None  # Folder each run's final datasets are published to for the query service; None disables publishing
+query_port = 8765  # Port of the local HTTP endpoint
+query_reload_interval = 1.0  # Seconds between checks for a newly published run
+
+# Memory parameters
+memory_budget = None  # Memory in MB for the peer metrics and spend z-scores, which are computed in groups of surveys above it; the peak memory of each stage is printed after the run. None computes all surveys at once
+
+# Instrumentation parameters
+stage_report = None  # File path of the per-stage time, memory and row count report, as .json or .csv (see instrument.py); None disables instrumentation
+stage_profile_dir = None  # Folder for a cProfile dump of each stage (<stage>.prof); None disables profiling
+stage_tracemalloc = False  # Also trace Python allocations of each stage with tracemalloc (<stage>.tracemalloc in stage_profile_dir); slows the run considerably
+
+# Parameter sweep parameters (see sweep.py, run with "python sweep.py")
+# Each parameter in sweep_grid takes each of the listed values; the other rating, model and forecast parameters keep their values above.
+sweep_grid = {"vcutoff": [.75, 1.000, 1.25], "dcutoff": [.5, .675, .85], "zcutoff": [.2, .253, .3], "upperpcutoff": [.55, .6], "lowerpcutoff": [.4, .45]}
+sweep_samples = None  # Number of random parameter sets drawn from sweep_grid instead of every combination; (low, high) pairs are then drawn uniformly
+sweep_seed = 0  # Random seed for sweep_samples
+sweep_processes = None  # Number of worker processes (None uses one per CPU)
+sweep_file = "InsightPerformance_Sweep.csv"  # File path of the sweep results
+
+# Stage cache parameters (see pipeline.py, run with "python pipeline.py")
+stage_cache_dir = "QuantInsights_Stages"  # Folder for the cached results of each stage
+stage_cache_size = 4000000000  # Largest size of the stage cache in bytes; the least recently used results are removed beyond it
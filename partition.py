@@ -0,0 +1,84 @@
+import os
+import json
+import shutil
+import pandas as pd
+import ingest
+import entities
+import themes
+
+
+
+# Out-of-core processing of the source dataset.
+# partitionSource reads the source CSV in chunks and writes each chunk's citations to one folder per Survey_ID,
+# so the respondent-level citations are never held in memory all at once.
+# streamMetrics then loads one survey at a time, codes it against the survey and entity tables built so far,
+# and keeps only that survey's theme metrics (see themes.py). The deltas, z-scores and ratings are calculated from these metrics,
+# so peak memory is bounded by the largest single survey rather than the whole history.
+
+
+def partitionSource(path, folder, chunksize):
+    # Splits the source CSV into per-survey partitions in folder and returns their Survey_IDs.
+    # The partitions are kept until the file changes, as the column cache in ingest.py is.
+    # The manifest lists each survey's folder before it is written, so an interrupted split is cleaned up by the next one.
+    schema = ingest.schemas["source"]
+    manifest = ingest.cachedManifest(path, folder, schema)
+    if manifest is not None and manifest.get("complete", True):
+        return manifest["surveys"]
+
+    removePartitions(folder)
+    manifest = dict(ingest.fileManifest(path, schema), surveys = [], complete = False)
+
+    survey_ids = set()
+    for i, chunk in enumerate(pd.read_csv(path, usecols = list(schema), dtype = schema, chunksize = chunksize)):
+        for survey_id, survey in chunk.groupby("Survey_ID", sort = False):
+            survey_folder = os.path.join(folder, str(survey_id))
+            if survey_id not in survey_ids:
+                survey_ids.add(survey_id)
+                manifest["surveys"] = sorted(int(survey_id) for survey_id in survey_ids)
+                ingest.writeManifest(folder, manifest)
+                os.makedirs(survey_folder)
+            survey[list(schema)].to_pickle(os.path.join(survey_folder, "%06d.pkl" % i))
+
+    manifest["complete"] = True
+    ingest.writeManifest(folder, manifest)
+    return manifest["surveys"]
+
+
+def removePartitions(folder):
+    # Removes the survey folders listed in the partition manifest of folder, and creates folder if it does not exist.
+    # Nothing else in folder is removed, and a folder with other contents but no partition manifest is refused.
+    manifest_file = os.path.join(folder, "manifest.json")
+    manifest = None
+    if os.path.exists(manifest_file):
+        with open(manifest_file) as f:
+            manifest = json.load(f)
+    if manifest is None or "surveys" not in manifest:
+        if os.path.isdir(folder) and os.listdir(folder):
+            raise ValueError("partition_dir " + folder + " is not empty and holds no partitions of the source dataset: use a new or empty folder")
+        if not os.path.exists(folder):
+            os.makedirs(folder)
+        return
+
+    os.remove(manifest_file)
+    for survey_id in manifest["surveys"]:
+        shutil.rmtree(os.path.join(folder, str(survey_id)), ignore_errors = True)
+
+
+def readPartition(folder, survey_id):
+    # Citations of one survey, in the order they appear in the source file.
+    survey_folder = os.path.join(folder, str(survey_id))
+    pieces = [pd.read_pickle(os.path.join(survey_folder, piece)) for piece in sorted(os.listdir(survey_folder))]
+    return pd.concat(pieces, ignore_index = True)
+
+
+def streamMetrics(folder, survey_ids, survey_dict, entity_dict, cloudsector, cloudvendors):
+    # Codes the given surveys one partition at a time and returns the survey and entity tables with the spend, peer and cloud metrics.
+    # Survey and entity tables from an earlier run can be passed in to keep their IDs (see entities.buildEntities).
+    metrics = {"spend": [], "peer": [], "cloud": []}
+    for survey_id in survey_ids:
+        citations, survey_dict, entity_dict = entities.buildEntities(readPartition(folder, survey_id), survey_dict, entity_dict)
+        for name, frame in themes.themeMetrics(citations, entity_dict, cloudsector, cloudvendors).items():
+            metrics[name].append(frame)
+
+    metrics = {name: pd.concat(frames, ignore_index = True) for name, frames in metrics.items()}
+    return survey_dict, entity_dict, metrics
@@ -0,0 +1,212 @@
+import os
+import json
+import time
+import pickle
+import hashlib
+import pandas as pd
+import parameters
+import ingest
+import entities
+import themes
+import bitmaps
+import ratings
+import cocitation
+import lags
+import weighted
+import model
+import instrument
+
+
+
+# The Quant Insights calculation as named stages with an on-disk cache.
+# Each stage lists the stages it reads, the parameters in parameters.py it depends on, and the input files it reads.
+# A stage's cache key is a hash of its name, those parameter values, the contents of its input files, the hashes of its
+# input stages' results and the source code of the calculation modules. Its result is pickled to <stage_cache_dir>/<key>.pkl,
+# and the SHA-1 hash of the pickle is the hash its downstream stages are keyed on.
+# A rerun therefore only computes the stages whose key is not in the cache: changing upperpcutoff recomputes the forecast and
+# performance stages but not the model fit or the themes, and an upstream stage that is recomputed with the same result
+# leaves its downstream stages cached. Cached stages are only loaded when a stage that reads them has to be computed.
+# The cache is bounded to stage_cache_size bytes by removing the least recently used results.
+#
+# The computed stages are recorded in the stage report when it is set (see instrument.py).
+#
+# Run with "python pipeline.py". Streaming and incremental mode (see partition.py and incremental.py) and several return horizons
+# (return_horizons) are only used by "Quant Insights.py".
+
+
+def readSource(cache_dir, source_file):
+    source1 = ingest.readDataset(source_file, "source", cache_dir = cache_dir)
+    return entities.buildEntities(source1)
+
+
+def readReturns(path, name, cache_dir):
+    return ingest.readDataset(path, name, cache_dir = cache_dir)
+
+
+def fitStage(returns3, survey_dict, model_summaries):
+    return model.fitModel(returns3, max(survey_dict.index), verbose = model_summaries)
+
+
+def forecastStage(returns3, fit, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff):
+    result, selected_ratings = fit
+    return model.forecast(returns3, result, selected_ratings, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff)
+
+
+stages = {
+    "ingest":         {"function": readSource, "inputs": [], "parameters": ["cache_dir"], "files": {"source_file": "source"}},
+    "surveys":        {"function": lambda source: source[1], "inputs": ["ingest"]},
+    "entities":       {"function": lambda source: source[2], "inputs": ["ingest"]},
+    "sp_returns":     {"function": lambda cache_dir, spReturns_file: readReturns(spReturns_file, "spReturns", cache_dir), "inputs": [], "parameters": ["cache_dir"], "files": {"spReturns_file": "spReturns"}},
+    "ftec_returns":   {"function": lambda cache_dir, ftecReturns_file: readReturns(ftecReturns_file, "ftecReturns", cache_dir), "inputs": [], "parameters": ["cache_dir"], "files": {"ftecReturns_file": "ftecReturns"}},
+    "spend_metrics":  {"function": lambda source: themes.spendMetrics(source[0], source[2]), "inputs": ["ingest"]},
+    "spend_zscores":  {"function": themes.spendDeltas, "inputs": ["spend_metrics"]},
+    "spend_ratings":  {"function": themes.spendScores, "inputs": ["spend_zscores"], "parameters": ["vcutoff", "dcutoff", "mincitations"]},
+    "peer_metrics":   {"function": lambda source: themes.peerMetrics(source[0], source[2]), "inputs": ["ingest"]},
+    "peer_deltas":    {"function": themes.peerDeltas, "inputs": ["peer_metrics"]},
+    "peer_ratings":   {"function": themes.peerScores, "inputs": ["peer_deltas"], "parameters": ["peermincitations", "deltayoy", "peerdelta"]},
+    "cloud_metrics":  {"function": lambda source, cloudsector, cloudvendors: themes.cloudMetrics(source[0], source[2], cloudsector, cloudvendors),
+                       "inputs": ["ingest"], "parameters": ["cloudsector", "cloudvendors"]},
+    "cloud_deltas":   {"function": themes.cloudDeltas, "inputs": ["cloud_metrics", "entities"]},
+    "cloud_ratings":  {"function": themes.cloudScores, "inputs": ["cloud_deltas"], "parameters": ["cloudsector", "cloudvendors", "cloudthresholds"]},
+    "insight_data":   {"function": model.insightData, "inputs": ["spend_ratings", "peer_ratings", "cloud_ratings", "entities"], "parameters": ["mincitations"]},
+    "returns":        {"function": model.stockReturns, "inputs": ["insight_data", "sp_returns"], "parameters": ["zcutoff"]},
+    "model_fit":      {"function": fitStage, "inputs": ["returns", "surveys"], "parameters": ["model_summaries"]},
+    "forecast":       {"function": forecastStage, "inputs": ["returns", "model_fit", "surveys", "entities", "sp_returns"], "parameters": ["upperpcutoff", "lowerpcutoff"]},
+    "performance":    {"function": model.performance, "inputs": ["forecast", "ftec_returns"]},
+    "insight_final":  {"function": model.finalInsightData, "inputs": ["insight_data", "surveys", "entities"]},
+    "forecast_final": {"function": model.finalInsightForecast, "inputs": ["forecast"]},
+}
+
+
+def codeVersion():
+    # Hash of the calculation modules, so that a change to the code invalidates every cached result.
+    sha1 = hashlib.sha1()
+    for module in [ingest, entities, themes, bitmaps, lags, ratings, cocitation, weighted, model]:
+        with open(module.__file__, "rb") as f:
+            sha1.update(f.read())
+    with open(os.path.abspath(__file__), "rb") as f:
+        sha1.update(f.read())
+    return sha1.hexdigest()
+
+
+def fileDigest(path, name, cache_dir):
+    # SHA-1 hash of an input file, from the manifest of its column cache in cache_dir when that still matches the file (see ingest.py).
+    if cache_dir is not None:
+        manifest = ingest.cachedManifest(path, os.path.join(cache_dir, name), ingest.schemas[name])
+        if manifest is not None:
+            return manifest["sha1"]
+    return ingest.fileHash(path)
+
+
+def readIndex(cache_dir):
+    index_file = os.path.join(cache_dir, "index.json")
+    if not os.path.exists(index_file):
+        return {}
+    with open(index_file) as f:
+        index = json.load(f)
+    # Entries whose result file has been removed are dropped.
+    return {key: entry for key, entry in index.items() if os.path.exists(os.path.join(cache_dir, key + ".pkl"))}
+
+
+def writeIndex(cache_dir, index):
+    index_file = os.path.join(cache_dir, "index.json")
+    with open(index_file + ".tmp", "w") as f:
+        json.dump(index, f, indent = 1, sort_keys = True)
+    os.replace(index_file + ".tmp", index_file)
+
+
+def evictResults(cache_dir, index, cache_size, keep):
+    # Removes the least recently used results until the cache is no larger than cache_size bytes.
+    # The results in keep (those used by the current run) are removed last.
+    total = sum(entry["size"] for entry in index.values())
+    for key in sorted(index, key = lambda key: (key in keep, index[key]["used"])):
+        if total <= cache_size:
+            break
+        total -= index[key]["size"]
+        os.remove(os.path.join(cache_dir, key + ".pkl"))
+        del index[key]
+
+
+def runPipeline(targets, cache_dir, cache_size = None, settings = None):
+    # Returns a dict with the results of the target stages, computing only the stages that are not in cache_dir.
+    # The parameter values and file paths are read from settings, or from parameters.py.
+    if settings is None:
+        settings = vars(parameters)
+    if settings.get("return_horizons") is not None:
+        raise ValueError("return_horizons is only supported by quantinsights.run, not by the stage pipeline")
+    if not os.path.exists(cache_dir):
+        os.makedirs(cache_dir)
+
+    index = readIndex(cache_dir)
+    code = codeVersion()
+    keys = {}
+    digests = {}
+    values = {}
+
+    def stageDigest(name):
+        # Hash of the stage's result, computing the stage if it is not cached.
+        if name in digests:
+            return digests[name]
+        stage = stages[name]
+        key_values = {"stage": name, "code": code,
+                      "inputs": [stageDigest(input_name) for input_name in stage["inputs"]],
+                      "parameters": {p: settings[p] for p in stage.get("parameters", [])},
+                      "files": {f: fileDigest(settings[f], dataset, settings["cache_dir"]) for f, dataset in stage.get("files", {}).items()}}
+        key = hashlib.sha1(json.dumps(key_values, sort_keys = True, default = repr).encode()).hexdigest()
+        keys[name] = key
+
+        if key in index:
+            print("Stage " + name + ": cached")
+        else:
+            print("Stage " + name + ": computing")
+            arguments = [stageValue(input_name) for input_name in stage["inputs"]]
+            arguments += [settings[p] for p in stage.get("parameters", [])]
+            arguments += [settings[f] for f in stage.get("files", {})]
+            values[name] = instrument.run(name, stage["function"], *arguments)
+
+            data = pickle.dumps(values[name], protocol = pickle.HIGHEST_PROTOCOL)
+            result_file = os.path.join(cache_dir, key + ".pkl")
+            with open(result_file + ".tmp", "wb") as f:
+                f.write(data)
+            os.replace(result_file + ".tmp", result_file)
+            index[key] = {"stage": name, "digest": hashlib.sha1(data).hexdigest(), "size": len(data)}
+
+        index[key]["used"] = time.time()
+        digests[name] = index[key]["digest"]
+        return digests[name]
+
+    def stageValue(name):
+        stageDigest(name)
+        if name not in values:
+            values[name] = pd.read_pickle(os.path.join(cache_dir, keys[name] + ".pkl"))
+        return values[name]
+
+    try:
+        results = {name: stageValue(name) for name in targets}
+    finally:
+        if cache_size is not None:
+            evictResults(cache_dir, index, cache_size, set(keys.values()))
+        writeIndex(cache_dir, index)
+    return results
+
+
+if __name__ == "__main__":
+    pd.set_option('display.expand_frame_repr', False)
+    pd.set_option('display.max_columns', 999)
+    pd.set_option('max_colwidth', 999)
+
+    instrument.configure(parameters.stage_report is not None, parameters.stage_profile_dir, parameters.stage_tracemalloc)
+    results = runPipeline(["insight_final", "forecast_final", "performance"], parameters.stage_cache_dir, parameters.stage_cache_size)
+    InsightData_Final = results["insight_final"]
+    InsightForecast_Final = results["forecast_final"]
+    InsightPerformance_Final = results["performance"]
+
+    print("InsightData_Final:")
+    print(InsightData_Final)
+    print("InsightForecast_Final:")
+    print(InsightForecast_Final)
+    print("InsightPerformance_Final:")
+    print(InsightPerformance_Final)
+
+    if parameters.stage_report is not None:
+        instrument.writeReport(parameters.stage_report)
@@ -0,0 +1,114 @@
+import numpy as np
+import pandas as pd
+
+
+
+# Portfolio simulation of the Insight forecasts.
+# InsightPerformance compares the equal-weighted mean returns of the Positive and Negative vendors of each survey.
+# simulate() instead holds portfolios of the forecasts (forecast3) from survey to survey: at each survey the Positive vendors
+# are bought (the Long book) and the Negative vendors are sold short (the Short book), held over the survey's return window and
+# rebalanced at the next survey. The LongShort book holds the Long book and shorts the Short book.
+# The holdings of a book are a survey x security matrix of weights (fractions of the book's value, negative when short), so the
+# turnover, trading costs and equity curves of all books, surveys and securities are a few array operations, fast enough to run
+# for every parameter set of a sweep (see sweep.py).
+#
+# Each book is fully invested in every survey it holds securities in; vendors without a return in the window are not held.
+# Between surveys the weights drift with their returns, and the trades of a survey are the differences between its weights and
+# the drifted weights of the survey before (the first survey buys the whole book). With equal weights and no costs, the Long
+# and LongShort returns are the Positive_Returns and the Positive_Returns less Negative_Returns of InsightPerformance.
+
+
+books = ["Long", "Short", "LongShort"]
+
+weightings = ["equal", "citations", "probability"]
+
+
+def positionScores(forecast3, weighting):
+    # The relative size of each forecast's position: equal, the vendor's citations in the survey, or the probability of
+    # its forecast (P_Positive for the Long book and P_Negative for the Short book).
+    if weighting == "equal":
+        return np.ones(len(forecast3))
+    if weighting == "citations":
+        return forecast3["Citations"].values.astype(float)
+    if weighting == "probability":
+        p_positive = forecast3["P_Positive"].values.astype(float)
+        return np.where(forecast3["Insight_Forecast"].values == "Positive", p_positive, 1 - p_positive)
+    raise ValueError("Unknown portfolio weighting: " + str(weighting) + " (expected " + ", ".join(weightings) + ")")
+
+
+def bookWeights(rows, columns, scores, shape):
+    # The weights of the positions (rows, columns) in proportion to their scores, summing to 1 in each survey (row).
+    weights = np.zeros(shape)
+    np.add.at(weights, (rows, columns), scores)
+    total = weights.sum(axis = 1, keepdims = True)
+    return np.divide(weights, total, out = np.zeros(shape), where = total > 0)
+
+
+def simulateBooks(weights, returns, cost_rate, trade_fee):
+    # Gross returns, turnover, costs, net returns and equity of books of weights (books x surveys x securities) held over
+    # returns (surveys x securities). Costs are paid out of the book's value at each survey's trades.
+    gross = (weights * returns).sum(axis = 2)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        drifted = weights * (1 + returns) / (1 + gross)[:, :, None]
+    previous = np.concatenate([np.zeros(weights[:, :1].shape), drifted[:, :-1]], axis = 1)
+
+    trades = np.abs(weights - previous)
+    turnover = trades.sum(axis = 2)
+    cost = turnover * cost_rate + (trades > 1e-12).sum(axis = 2) * trade_fee
+    net = (1 - cost) * (1 + gross) - 1
+    return {"Return": gross, "Turnover": turnover, "Cost": cost, "Net_Return": net, "Equity": np.cumprod(1 + net, axis = 1)}
+
+
+def simulateSurveys(forecast3, weighting, cost_rate, trade_fee):
+    # The equity curves of the books over the surveys of forecast3, one row per survey with returns.
+    forecast3 = forecast3[pd.notnull(forecast3["Return_End"]) & pd.notnull(forecast3["Insight_Forecast"])]
+    surveys = forecast3.drop_duplicates("Survey_ID").sort_values("Survey_ID")[["Survey_ID", "Window_Start", "Window_End"]].reset_index(drop = True)
+
+    rows = np.searchsorted(surveys["Survey_ID"].values, forecast3["Survey_ID"].values)
+    columns, securities = pd.factorize(forecast3["Bloomberg_ID_Historical"].values)
+    shape = (len(surveys), len(securities))
+
+    returns = np.zeros(shape)
+    returns[rows, columns] = forecast3["Return_End"].values.astype(float)
+
+    scores = positionScores(forecast3, weighting)
+    long = forecast3["Insight_Forecast"].values == "Positive"
+    long_weights = bookWeights(rows[long], columns[long], scores[long], shape)
+    short_weights = bookWeights(rows[~long], columns[~long], scores[~long], shape)
+
+    positions = [long_weights > 0, short_weights > 0, (long_weights > 0) | (short_weights > 0)]
+    curves = simulateBooks(np.stack([long_weights, -short_weights, long_weights - short_weights]), returns, cost_rate, trade_fee)
+    for i, book in enumerate(books):
+        surveys[book + "_Positions"] = positions[i].sum(axis = 1)
+        for name, values in curves.items():
+            surveys[book + "_" + name] = values[i]
+    return surveys
+
+
+def simulate(forecast3, weighting = "equal", cost_bps = 0., slippage_bps = 0., trade_fee = 0., by = []):
+    # The InsightPortfolio dataset: the Long, Short and LongShort books of each survey with their positions, gross return,
+    # turnover (the value traded as a fraction of the book's value), cost, net return and equity (the value of 1 invested at the first survey).
+    #   cost_bps, slippage_bps  commission and slippage of each trade, in basis points of the value traded
+    #   trade_fee               fixed cost of each trade, as a fraction of the book's value
+    # With by columns (Return_Horizon for model.forecastHorizons), the books of each of their groups are simulated separately.
+    cost_rate = (cost_bps + slippage_bps) / 10000.
+    if not by:
+        return simulateSurveys(forecast3, weighting, cost_rate, trade_fee)
+
+    portfolios = []
+    for keys, group in forecast3.groupby(by, sort = True):
+        curves = simulateSurveys(group, weighting, cost_rate, trade_fee)
+        for column, key in zip(by, keys if isinstance(keys, tuple) else (keys,)):
+            curves.insert(by.index(column), column, key)
+        portfolios.append(curves)
+    return pd.concat(portfolios, ignore_index = True)
+
+
+def portfolioSummary(portfolio):
+    # One row with the cumulative net return, mean turnover and total cost of each book (see sweep.py).
+    summary = pd.DataFrame(index = [0])
+    for book in books:
+        summary[book + "_Net_Cumulative"] = portfolio[book + "_Equity"].values[-1] - 1 if len(portfolio) else np.nan
+        summary[book + "_Turnover_Mean"] = portfolio[book + "_Turnover"].mean()
+        summary[book + "_Cost_Total"] = portfolio[book + "_Cost"].sum()
+    return summary
@@ -0,0 +1,418 @@
+import os
+import ast
+import types
+import argparse
+import pandas as pd
+import parameters
+import ingest
+import partition
+import entities
+import themes
+import model
+import incremental
+import parallel
+import shards
+import walkforward
+import significance
+import instrument
+import export
+import portfolio
+import query
+
+
+
+# The Quant Insights calculation as an importable module.
+# Importing it reads no files and prints nothing, and statsmodels is only imported when a model is fit (see model.py),
+# so a scheduler or notebook can compute the themes in-process without the cost of the model libraries:
+#
+#   import quantinsights
+#   source = quantinsights.loadSource({"source_file": "ETRSource.csv"})
+#   spend_final = quantinsights.computeSpend(source)
+#
+# Every function takes an optional config dict of parameter values that replace those in parameters.py for that call.
+# run(config) is the whole program and returns its three final datasets; "Quant Insights.py" and main() are its command line entry points:
+#
+#   python quantinsights.py --set source_file=ETRSource.csv --set upperpcutoff=.6 --output-dir results
+
+
+def settings(config = None):
+    # The parameters in parameters.py, with the values in config in their place.
+    values = {name: value for name, value in vars(parameters).items() if not name.startswith("__")}
+    for name in config or {}:
+        if name not in values:
+            raise ValueError("Unknown parameter: " + name)
+    values.update(config or {})
+    return types.SimpleNamespace(**values)
+
+
+def loadSource(config = None):
+    # The coded citations, survey dictionary and entity dictionary of the source dataset.
+    p = settings(config)
+    source1 = ingest.readDataset(p.source_file, "source", cache_dir = p.cache_dir)
+    return entities.buildEntities(source1)
+
+
+def returnsSchemas(p):
+    # The schemas of the two returns files: with return_horizons they have a row per Return_Horizon (see ingest.py).
+    return ("spReturnsHorizons", "ftecReturnsHorizons") if p.return_horizons is not None else ("spReturns", "ftecReturns")
+
+
+def loadReturns(config = None):
+    # The stock returns and benchmark returns datasets.
+    p = settings(config)
+    sp_schema, ftec_schema = returnsSchemas(p)
+    return (ingest.readDataset(p.spReturns_file, sp_schema, cache_dir = p.cache_dir),
+            ingest.readDataset(p.ftecReturns_file, ftec_schema, cache_dir = p.cache_dir))
+
+
+def computeSpend(source, config = None):
+    # Expected Enterprise Spend + Market Share Theme of the source returned by loadSource (see themes.py).
+    p = settings(config)
+    citations, survey_dict, entity_dict = source
+    return themes.spendTheme(citations, entity_dict, p.vcutoff, p.dcutoff, p.mincitations)
+
+
+def computePeer(source, config = None):
+    # Peer Benchmarking / Competition Theme of the source returned by loadSource (see themes.py).
+    p = settings(config)
+    citations, survey_dict, entity_dict = source
+    return themes.peerTheme(citations, entity_dict, p.peermincitations, p.deltayoy, p.peerdelta)
+
+
+def computeCloud(source, config = None):
+    # Alignment With Major Public Cloud Vendors Theme of the source returned by loadSource (see themes.py).
+    p = settings(config)
+    citations, survey_dict, entity_dict = source
+    return themes.cloudTheme(citations, entity_dict, p.cloudsector, p.cloudvendors, p.cloudthresholds)
+
+
+def computeReturns(source, spend_final, peer_final, cloud_final, spReturns, config = None):
+    # The Insight Dataset of the three themes (returns1) and the same rows labelled by their stock returns (returns3),
+    # in each of the return_horizons when they are set.
+    p = settings(config)
+    citations, survey_dict, entity_dict = source
+    returns1 = model.insightData(spend_final, peer_final, cloud_final, entity_dict, p.mincitations)
+    if p.return_horizons is not None:
+        return returns1, model.horizonReturns(returns1, spReturns, p.return_horizons, p.zcutoff)
+    return returns1, model.stockReturns(returns1, spReturns, p.zcutoff)
+
+
+def fitModel(source, returns3, verbose = False, config = None):
+    # The fitted logistic regression model and its selected ratings (see model.py), or with return_horizons a dict of them by horizon.
+    p = settings(config)
+    citations, survey_dict, entity_dict = source
+    if p.return_horizons is not None:
+        return model.fitHorizons(returns3, max(survey_dict.index), p.return_horizons, verbose = verbose)
+    return model.fitModel(returns3, max(survey_dict.index), verbose = verbose)
+
+
+def forecast(source, returns3, fit, spReturns, ftecReturns, config = None):
+    # The forecasts of each vendor (forecast3) and the model's historical performance (forecast9), by Return_Horizon with return_horizons.
+    p = settings(config)
+    citations, survey_dict, entity_dict = source
+    if p.return_horizons is not None:
+        forecast3 = model.forecastHorizons(returns3, fit, survey_dict, entity_dict, spReturns, p.upperpcutoff, p.lowerpcutoff)
+        return forecast3, model.performance(forecast3, ftecReturns, ["Return_Horizon"])
+    result, selected_ratings = fit
+    forecast3 = model.forecast(returns3, result, selected_ratings, survey_dict, entity_dict, spReturns, p.upperpcutoff, p.lowerpcutoff)
+    return forecast3, model.performance(forecast3, ftecReturns)
+
+
+def run(config = None):
+    # Runs the whole program and returns a dict with the InsightData, InsightForecast and InsightPerformance final datasets
+    # (and InsightPortfolio with p.portfolio set).
+    p = settings(config)
+    if p.return_horizons is not None and (p.walkforward or p.significance):
+        raise ValueError("return_horizons cannot be combined with walkforward or significance")
+
+
+    # With p.stage_report set, the time, memory and row counts of each stage below are recorded and saved to that file (see instrument.py).
+    # They are also recorded with p.memory_budget set, so the peak memory of each stage can be reported (see main).
+
+    instrument.configure(p.stage_report is not None or p.memory_budget is not None, p.stage_profile_dir, p.stage_tracemalloc)
+
+
+
+    ###################
+    ### Data Import ###
+    ###################
+
+
+    # The input files named by p.source_file, p.spReturns_file and p.ftecReturns_file are read with the explicit schemas
+    # in ingest.py. Their typed columns are cached in p.cache_dir, so later runs load the cache instead of parsing the CSV files again.
+    # In streaming mode the source dataset is instead split into per-survey partitions in p.partition_dir,
+    # which are processed one survey at a time below (see partition.py).
+
+    if p.streaming:
+        survey_ids = instrument.run("ingest", partition.partitionSource, p.source_file, p.partition_dir, p.chunksize)
+    else:
+        source1 = instrument.run("ingest", ingest.readDataset, p.source_file, "source", cache_dir = p.cache_dir)
+        survey_ids = sorted(source1['Survey_ID'].unique())
+    # With p.return_horizons set, the returns files have a row per survey, security and Return_Horizon (see ingest.py).
+    sp_schema, ftec_schema = returnsSchemas(p)
+    spReturns = instrument.run("ingest_spReturns", ingest.readDataset, p.spReturns_file, sp_schema, cache_dir = p.cache_dir)
+    ftecReturns = instrument.run("ingest_ftecReturns", ingest.readDataset, p.ftecReturns_file, ftec_schema, cache_dir = p.cache_dir)
+
+
+    # The most recent Survey_ID is set to a macro variable for later use.
+    survey_max = max(survey_ids)
+
+
+    # In incremental mode the theme outputs of earlier runs are loaded from p.state_file, and only the surveys
+    # that are not in it are computed below (see incremental.py). Otherwise every survey is computed.
+
+    theme_parameters = {"vcutoff": p.vcutoff, "dcutoff": p.dcutoff, "mincitations": p.mincitations,
+                        "peermincitations": p.peermincitations, "deltayoy": p.deltayoy, "peerdelta": p.peerdelta,
+                        "cloudsector": p.cloudsector, "cloudvendors": p.cloudvendors, "cloudthresholds": p.cloudthresholds}
+
+    state = incremental.loadState(p.state_file, theme_parameters) if p.incremental else None
+
+    new_surveys = incremental.newSurveys(survey_ids, state)
+    theme_surveys = sorted(themes.lagSurveys(new_surveys) & set(survey_ids))
+
+    cloudsector = p.cloudsector
+    cloudvendors = p.cloudvendors
+
+
+    # Each unique vendor/product key is mapped to an integer Entity_ID, and the descriptive columns are kept once per survey and per entity.
+    # The themes below work on the integer Survey_ID / Entity_ID keys; the descriptive columns are joined back onto the final datasets.
+    # See entities.py for the keys used to match vendors across surveys.
+    # Each theme's metrics are aggregated from the citations of the new surveys and their lag surveys (see themes.py).
+    # Without new surveys the saved theme outputs are used as they are.
+    # With p.parallel_themes the three themes are instead computed in parallel worker processes (see parallel.py),
+    # and with p.sharded_themes the spend and peer themes are computed as (Survey_ID, Sector) work units on worker processes or nodes (see shards.py).
+    # With p.memory_budget set, the peer metrics and the spend z-scores are computed in groups of surveys estimated to fit in it.
+    # Each intermediate is released as soon as the stages that read it are done, the source dataset once the metrics are computed.
+
+    theme_finals = None
+    saved_surveys = state["surveys"] if state is not None else None
+    saved_entities = state["entities"] if state is not None else None
+
+    if not new_surveys:
+        survey_dict, entity_dict = saved_surveys, saved_entities
+    elif p.streaming:
+        survey_dict, entity_dict, theme_metrics = instrument.run("stream_metrics", partition.streamMetrics, p.partition_dir, theme_surveys, saved_surveys, saved_entities, cloudsector, cloudvendors)
+    else:
+        source1, survey_dict, entity_dict = instrument.run("entities", entities.buildEntities, source1, saved_surveys, saved_entities)
+        theme_source = source1 if len(theme_surveys) == len(survey_ids) else source1[source1["Survey_ID"].isin(theme_surveys)]
+        if p.sharded_themes:
+            executor = shards.loadExecutor(p.shard_executor, p.shard_processes)
+            theme_finals = instrument.run("sharded_themes", shards.runThemes, theme_source, entity_dict, theme_parameters, executor, p.shard_tasks)
+        elif p.parallel_themes:
+            theme_finals = instrument.run("parallel_themes", parallel.runThemes, theme_source, entity_dict, theme_parameters)
+        else:
+            theme_metrics = {"spend": instrument.run("spend_metrics", themes.spendMetrics, theme_source, entity_dict),
+                             "peer": instrument.run("peer_metrics", themes.peerMetrics, theme_source, entity_dict, p.memory_budget),
+                             "cloud": instrument.run("cloud_metrics", themes.cloudMetrics, theme_source, entity_dict, cloudsector, cloudvendors)}
+    source1 = theme_source = None
+
+
+
+    ######################################################
+    ### Expected Enterprise Spend + Market Share Theme ###
+    ######################################################
+
+
+    # Spend metrics, Survey-over-Survey and Year-over-Year deltas, survey z-scores and the
+    # Adoption_Rating, Increase_Rating, Decrease_Rating, Replacing_Rating, NetScore_Rating and MarketShare_Rating ratings (see themes.py).
+
+    vcutoff = p.vcutoff
+    dcutoff = p.dcutoff
+    mincitations = p.mincitations
+
+    spend_final = None
+    if theme_finals is not None:
+        spend_final = theme_finals["spend"]
+    elif new_surveys:
+        spend12 = instrument.run("spend_zscores", themes.spendDeltas, theme_metrics.pop("spend"), p.memory_budget)
+        spend_final = instrument.run("spend_ratings", themes.spendScores, spend12, vcutoff, dcutoff, mincitations)
+        del spend12
+    spend_final = incremental.appendSurveys(state, "spend", spend_final, new_surveys)
+
+
+    ###########################################
+    ## Peer Benchmarking / Competition Theme ##
+    ###########################################
+
+
+    # Shared account Net Scores of each pair of vendors in the same sector, each competitor's Net Effect and the Peer_Rating (see themes.py).
+
+    peermincitations = p.peermincitations
+    deltayoy = p.deltayoy
+    peerdelta = p.peerdelta
+
+    peer_final = None
+    if theme_finals is not None:
+        peer_final = theme_finals["peer"]
+    elif new_surveys:
+        peer9 = instrument.run("peer_deltas", themes.peerDeltas, theme_metrics.pop("peer"))
+        peer_final = instrument.run("peer_ratings", themes.peerScores, peer9, peermincitations, deltayoy, peerdelta)
+        del peer9
+    peer_final = incremental.appendSurveys(state, "peer", peer_final, new_surveys)
+
+
+    #####################################################
+    ## Alignment With Major Public Cloud Vendors Theme ##
+    #####################################################
+
+
+    # Cloud Group and Control Group Net Scores, their Survey-over-Survey and Year-over-Year deltas and the Cloud_Rating (see themes.py).
+
+    cloudthresholds = p.cloudthresholds
+
+    cloud_final = None
+    if theme_finals is not None:
+        cloud_final = theme_finals["cloud"]
+    elif new_surveys:
+        cloud10b = instrument.run("cloud_deltas", themes.cloudDeltas, theme_metrics.pop("cloud"), entity_dict)
+        cloud_final = instrument.run("cloud_ratings", themes.cloudScores, cloud10b, cloudsector, cloudvendors, cloudthresholds)
+        del cloud10b
+    cloud_final = incremental.appendSurveys(state, "cloud", cloud_final, new_surveys)
+
+
+    if p.incremental:
+        incremental.saveState(p.state_file, survey_dict, entity_dict, {"spend": spend_final, "peer": peer_final, "cloud": cloud_final}, theme_parameters)
+
+
+
+
+    ############################################
+    ## Model Creation and Performance Testing ##
+    ############################################
+
+
+    # Metrics from all themes are merged together.
+    # Stock Price returns are merged on.
+    # Stock Price return survey averages and z-scores are calculated to determine outperformers and underperformers.
+    # See Appendix E of the accompanying methodology documentation for a graphical representation of this process.
+
+    # Please note, only data from 2015 and on is used for the remainder of this program (see model.py).
+
+    # With p.return_horizons set, the returns of every horizon are merged on and labelled together, and the model fit,
+    # forecasts and performance below are done for each horizon in the same pass, with a Return_Horizon column in
+    # InsightForecast and InsightPerformance (see model.horizonReturns).
+
+    zcutoff = p.zcutoff
+    horizons = p.return_horizons
+
+    returns1 = instrument.run("insight_data", model.insightData, spend_final, peer_final, cloud_final, entity_dict, mincitations)
+    if horizons is not None:
+        returns3 = instrument.run("returns", model.horizonReturns, returns1, spReturns, horizons, zcutoff)
+    else:
+        returns3 = instrument.run("returns", model.stockReturns, returns1, spReturns, zcutoff)
+
+
+    # The logistic regression model is trained to model the probability of outperformance, with step-wise backwards selection of the ratings.
+    # The original dataset is passed through the trained model to determine the model's historical performance.
+    # Vendors across multiple sectors or products are combined using a citation-weighted average to determine the vendor's overall probability of outperformance.
+    # Only vendors above a certain threshold are assigned a Positive / Negative forecast.
+    # In walk-forward mode each survey is instead forecast by a model trained only on the surveys before it (see walkforward.py).
+    # Historical returns are calculated to measure model performance.
+
+    upperpcutoff = p.upperpcutoff
+    lowerpcutoff = p.lowerpcutoff
+
+    if horizons is not None:
+        fits = instrument.run("model_fit", model.fitHorizons, returns3, survey_max, horizons, verbose = p.model_summaries)
+        forecast3 = instrument.run("forecast", model.forecastHorizons, returns3, fits, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff)
+    elif p.walkforward:
+        forecast3 = instrument.run("walkforward", walkforward.walkForward, returns3, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff, p.walkforward_min_surveys, p.walkforward_processes)
+    else:
+        result, selected_ratings = instrument.run("model_fit", model.fitModel, returns3, survey_max, verbose = p.model_summaries)
+        forecast3 = instrument.run("forecast", model.forecast, returns3, result, selected_ratings, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff)
+    returns3 = None
+    forecast9 = instrument.run("performance", model.performance, forecast3, ftecReturns, ["Return_Horizon"] if horizons is not None else [])
+
+
+    # Optionally, bootstrap confidence intervals and permutation p-values of the Positive minus Negative return spread are added
+    # to each performance row, by resampling the forecast vendors of each survey (see significance.py).
+
+    if p.significance:
+        forecast9 = instrument.run("significance", significance.performanceSignificance, forecast3, forecast9, p.significance_resamples, p.significance_level, p.significance_seed, p.significance_processes)
+
+
+    # Final Datasets
+
+    # The survey and vendor/product descriptive columns are joined back on from the entity dictionary.
+
+    InsightData_Final = model.finalInsightData(returns1, survey_dict, entity_dict)
+    InsightForecast_Final = model.finalInsightForecast(forecast3)
+    InsightPerformance_Final = forecast9
+    finals = {"InsightData": InsightData_Final, "InsightForecast": InsightForecast_Final, "InsightPerformance": InsightPerformance_Final}
+
+
+    # With p.portfolio set, the forecasts are also held as Long, Short and LongShort portfolios from survey to survey,
+    # with their turnover, trading costs and equity curves in a fourth final dataset, InsightPortfolio (see portfolio.py).
+
+    if p.portfolio:
+        finals["InsightPortfolio"] = instrument.run("portfolio", portfolio.simulate, forecast3, p.portfolio_weighting, p.portfolio_cost_bps,
+                                                    p.portfolio_slippage_bps, p.portfolio_trade_fee, ["Return_Horizon"] if horizons is not None else [])
+
+
+    # With p.export_dir set, the final datasets (and with p.export_themes the theme outputs, with their descriptive columns)
+    # are written as Parquet or Arrow files partitioned by Survey_ID (see export.py).
+
+    if p.export_dir is not None:
+        datasets = dict(finals)
+        if p.export_themes:
+            for name, theme_final in [("SpendTheme", spend_final), ("PeerTheme", peer_final), ("CloudTheme", cloud_final)]:
+                datasets[name] = entities.decode(theme_final, survey_dict, entity_dict)
+        instrument.run("export", export.exportDatasets, datasets, p.export_dir, p.export_format)
+
+
+    # With p.publish_dir set, the final datasets are published for the query service, with the P_Positive of each forecast (see query.py).
+
+    if p.publish_dir is not None:
+        published = dict(finals, InsightForecast = model.finalInsightForecast(forecast3, probability = True))
+        instrument.run("publish", query.publish, published, p.publish_dir)
+
+    if p.stage_report is not None:
+        instrument.writeReport(p.stage_report)
+
+    return finals
+
+
+def parseSetting(text):
+    # name=value from the command line, with value read as a Python literal (a number, list, None, ...) or else as a string.
+    name, separator, value = text.partition("=")
+    if not separator:
+        raise argparse.ArgumentTypeError("Expected name=value: " + text)
+    try:
+        value = ast.literal_eval(value)
+    except (ValueError, SyntaxError):
+        pass
+    return name.strip(), value
+
+
+def main(argv = None):
+    parser = argparse.ArgumentParser(description = "Run the Quant Insights program with the parameters in parameters.py.")
+    parser.add_argument("--set", dest = "settings", type = parseSetting, action = "append", default = [], metavar = "NAME=VALUE",
+                        help = "Replace a parameter in parameters.py, e.g. --set upperpcutoff=.6 (repeatable)")
+    parser.add_argument("--output-dir", help = "Folder to write InsightData.csv, InsightForecast.csv and InsightPerformance.csv to, instead of printing them")
+    args = parser.parse_args(argv)
+
+    config = dict(args.settings)
+    finals = run(config)
+
+    # With a memory budget, the peak memory of each stage is reported after the run.
+    if settings(config).memory_budget is not None:
+        print(instrument.report()[["Stage", "Wall_Seconds", "Peak_RSS_MB", "Peak_RSS_Delta_MB"]].to_string(index = False))
+
+    if args.output_dir is not None:
+        if not os.path.exists(args.output_dir):
+            os.makedirs(args.output_dir)
+        for name, final in finals.items():
+            final.to_csv(os.path.join(args.output_dir, name + ".csv"), index = False)
+        return
+
+    pd.set_option('display.expand_frame_repr', False)
+    pd.set_option('display.max_columns', 999)
+    pd.set_option('max_colwidth', 999)
+
+    for name, final in finals.items():
+        print(name + "_Final:")
+        print(final)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,247 @@
+import os
+import re
+import json
+import time
+import shutil
+import argparse
+import threading
+import urllib.parse
+import numpy as np
+import pandas as pd
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+import parameters
+
+
+
+# Query service over the latest published final datasets.
+# publish() saves a run's final datasets to <publish_dir>/<run>/ and then points <publish_dir>/latest.json at them,
+# so a reader never sees a partly written run. openStore() loads the latest run once and indexes InsightData and InsightForecast
+# (the latter with each forecast vendor's P_Positive) on Survey_ID, Bloomberg_ID_Historical, Vendor_Current and Sector_Current.
+# Forecasts are matched to the vendors and sectors of their securities through InsightData. A lookup intersects the precomputed
+# row positions of its filters instead of filtering the frames, so point and range lookups take well under a millisecond.
+# The store checks latest.json at most every reload_interval seconds and swaps in a newly published run without a restart.
+#
+# serve() answers the same lookups as JSON over a local HTTP endpoint. Run with "python query.py" after a run with publish_dir set:
+#   GET /InsightData?bloomberg=<id>&survey=latest
+#   GET /InsightForecast?sector=<sector>&forecast=Negative&survey=10-18
+#   GET /security?bloomberg=<id>          the ratings and forecast of one security in the latest survey
+#   GET /surveys                          the published run and the surveys of each dataset
+
+
+# Lookup filters and the columns they match.
+filters = {"bloomberg": "Bloomberg_ID_Historical", "vendor": "Vendor_Current", "sector": "Sector_Current", "forecast": "Insight_Forecast"}
+
+# The names publish() gives its runs.
+run_name = re.compile(r"^\d+\.\d{6}$")
+
+
+def publish(datasets, folder, keep = 2):
+    # Saves the DataFrames in datasets (a dict by name) as the latest run in folder and returns the run's name.
+    # The keep most recent runs are kept, as a reader may still be loading the previous one. The published runs are listed
+    # in latest.json, and only those are removed: other folders in folder are left alone.
+    run = "%017.6f" % time.time()
+    run_folder = os.path.join(folder, run)
+    os.makedirs(run_folder)
+    for name, df in datasets.items():
+        df.to_pickle(os.path.join(run_folder, name + ".pkl"))
+
+    latest = os.path.join(folder, "latest.json")
+    runs = []
+    if os.path.exists(latest):
+        with open(latest) as f:
+            previous = json.load(f)
+        runs = previous.get("runs", [previous["run"]])
+    runs = [old for old in runs if old != run] + [run]
+    kept = runs[-max(keep, 1):]
+
+    with open(latest + ".tmp", "w") as f:
+        json.dump({"run": run, "datasets": sorted(datasets), "runs": kept}, f)
+    os.replace(latest + ".tmp", latest)
+
+    for old in runs[:-max(keep, 1)]:
+        if run_name.match(old):
+            shutil.rmtree(os.path.join(folder, old), ignore_errors = True)
+    return run
+
+
+def valueIndex(values):
+    # The row positions (in ascending order) of each value; missing values are not indexed.
+    codes, uniques = pd.factorize(pd.Series(values).astype(object))
+    order = np.argsort(codes, kind = 'mergesort')
+    bounds = np.searchsorted(codes[order], np.arange(len(uniques) + 1))
+    return {value: order[bounds[i]:bounds[i + 1]] for i, value in enumerate(uniques)}
+
+
+def indexTable(df, columns):
+    # The frame with its rows in Survey_ID order and the row positions of each value of the given columns.
+    # InsightPerformance has no Survey_ID and is only returned whole.
+    survey_ids = df["Survey_ID"].values if "Survey_ID" in df.columns else np.array([], dtype = np.int64)
+    order = np.argsort(survey_ids, kind = 'mergesort')
+    return {"frame": df, "survey_ids": survey_ids[order], "survey_order": order,
+            "indexes": {column: valueIndex(df[column].values) for column in columns if column in df.columns}}
+
+
+def loadRun(folder, run):
+    # Loads and indexes the datasets of a published run.
+    frames = {name[:-4]: pd.read_pickle(os.path.join(folder, run, name)) for name in os.listdir(os.path.join(folder, run)) if name.endswith(".pkl")}
+    tables = {name: indexTable(df, filters.values()) for name, df in frames.items()}
+
+    # Forecasts are indexed on the vendors and sectors whose rows in InsightData have the same survey and security.
+    if "InsightForecast" in frames and "InsightData" in frames:
+        keys = ["Survey_ID", "Bloomberg_ID_Historical"]
+        forecast = frames["InsightForecast"][keys].astype(object).assign(Row = np.arange(len(frames["InsightForecast"])))
+        data = frames["InsightData"][keys + ["Vendor_Current", "Sector_Current"]].astype(object).drop_duplicates()
+        matched = forecast.merge(data[pd.notnull(data["Bloomberg_ID_Historical"])], on = keys)
+        for column in ["Vendor_Current", "Sector_Current"]:
+            pairs = matched[[column, "Row"]].drop_duplicates()
+            tables["InsightForecast"]["indexes"][column] = {value: np.sort(rows.values) for value, rows in pairs.groupby(column)["Row"]}
+    return {"run": run, "tables": tables}
+
+
+def openStore(folder, reload_interval = 1.0):
+    # A store of the latest run published to folder (see publish).
+    store = {"folder": folder, "reload_interval": reload_interval, "checked": 0., "current": None, "lock": threading.Lock()}
+    refresh(store)
+    return store
+
+
+def refresh(store):
+    # Loads the latest run when a new one has been published, checking at most every reload_interval seconds.
+    now = time.time()
+    if store["current"] is not None and now - store["checked"] < store["reload_interval"]:
+        return
+    with store["lock"]:
+        store["checked"] = now
+        with open(os.path.join(store["folder"], "latest.json")) as f:
+            run = json.load(f)["run"]
+        if store["current"] is None or store["current"]["run"] != run:
+            # The new run replaces the current one in a single assignment, so lookups see either one or the other.
+            store["current"] = loadRun(store["folder"], run)
+
+
+def surveyRows(table, survey):
+    # Row positions of a survey: a Survey_ID, "latest" or a (first, last) range of Survey_IDs.
+    survey_ids = table["survey_ids"]
+    if len(survey_ids) == 0:
+        return np.array([], dtype = np.int64)
+    if survey == "latest":
+        survey = survey_ids[-1]
+    first, last = survey if isinstance(survey, (tuple, list)) else (survey, survey)
+    return np.sort(table["survey_order"][np.searchsorted(survey_ids, first, 'left'):np.searchsorted(survey_ids, last, 'right')])
+
+
+def lookupRows(store, dataset, survey = None, bloomberg = None, vendor = None, sector = None, forecast = None):
+    # The table of dataset and the row positions matching every given filter (None when there are no filters).
+    refresh(store)
+    tables = store["current"]["tables"]
+    if dataset not in tables:
+        raise KeyError("Unknown dataset: " + str(dataset))
+    table = tables[dataset]
+
+    positions = None if survey is None else surveyRows(table, survey)
+    for name, value in [("bloomberg", bloomberg), ("vendor", vendor), ("sector", sector), ("forecast", forecast)]:
+        if value is None:
+            continue
+        index = table["indexes"].get(filters[name])
+        if index is None:
+            raise KeyError(dataset + " cannot be filtered by " + name)
+        rows = index.get(value, np.array([], dtype = np.int64))
+        positions = rows if positions is None else np.intersect1d(positions, rows, assume_unique = True)
+    return table, positions
+
+
+def lookup(store, dataset, survey = None, bloomberg = None, vendor = None, sector = None, forecast = None):
+    # The rows of dataset (InsightData or InsightForecast) matching every given filter.
+    table, positions = lookupRows(store, dataset, survey, bloomberg, vendor, sector, forecast)
+    return table["frame"] if positions is None else table["frame"].iloc[positions]
+
+
+def security(store, bloomberg, survey = "latest"):
+    # The ratings (InsightData) and forecast with P_Positive (InsightForecast) of one security in a survey,
+    # by default the latest survey it has ratings in.
+    ratings, positions = lookupRows(store, "InsightData", bloomberg = bloomberg)
+    surveys = ratings["frame"]["Survey_ID"].values[positions]
+    if survey == "latest":
+        survey = surveys.max() if len(surveys) else -1
+    return {"ratings": ratings["frame"].iloc[positions[surveys == survey]],
+            "forecast": lookup(store, "InsightForecast", survey = survey, bloomberg = bloomberg)}
+
+
+def parseSurvey(text):
+    # "latest", a Survey_ID or a first-last range of Survey_IDs.
+    if text == "latest":
+        return text
+    first, separator, last = text.partition("-")
+    return (int(first), int(last)) if separator else int(first)
+
+
+def records(df):
+    return json.loads(df.to_json(orient = "records", date_format = "iso"))
+
+
+def handler(store):
+    # A request handler class answering lookups on store.
+    class QueryHandler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            url = urllib.parse.urlparse(self.path)
+            dataset = url.path.strip("/")
+            arguments = {name: values[-1] for name, values in urllib.parse.parse_qs(url.query).items()}
+            try:
+                if "survey" in arguments:
+                    arguments["survey"] = parseSurvey(arguments["survey"])
+                unknown = set(arguments) - set(filters) - {"survey"}
+                if unknown:
+                    raise ValueError("Unknown parameters: " + ", ".join(sorted(unknown)))
+                if dataset == "surveys":
+                    refresh(store)
+                    current = store["current"]
+                    body = {"run": current["run"], "surveys": {name: sorted(int(s) for s in set(table["survey_ids"])) for name, table in current["tables"].items()}}
+                elif dataset == "security":
+                    if "bloomberg" not in arguments:
+                        raise ValueError("security requires bloomberg")
+                    body = {name: records(df) for name, df in security(store, arguments["bloomberg"], arguments.get("survey", "latest")).items()}
+                else:
+                    body = records(lookup(store, dataset, **arguments))
+                self.respond(200, body)
+            except KeyError as error:
+                self.respond(404, {"error": error.args[0]})
+            except ValueError as error:
+                self.respond(400, {"error": str(error)})
+
+        def respond(self, status, body):
+            data = json.dumps(body).encode()
+            self.send_response(status)
+            self.send_header("Content-Type", "application/json")
+            self.send_header("Content-Length", str(len(data)))
+            self.end_headers()
+            self.wfile.write(data)
+
+        def log_message(self, format, *args):
+            pass
+
+    return QueryHandler
+
+
+def serve(folder, host = "127.0.0.1", port = 8765, reload_interval = 1.0):
+    server = ThreadingHTTPServer((host, port), handler(openStore(folder, reload_interval)))
+    print("Serving the runs published to " + folder + " on http://" + host + ":" + str(port))
+    try:
+        server.serve_forever()
+    finally:
+        server.server_close()
+
+
+def main():
+    parser = argparse.ArgumentParser(description = "Serve lookups on the latest published final datasets over HTTP.")
+    parser.add_argument("--folder", default = parameters.publish_dir, help = "Folder the runs are published to (publish_dir in parameters.py)")
+    parser.add_argument("--host", default = "127.0.0.1")
+    parser.add_argument("--port", type = int, default = parameters.query_port)
+    parser.add_argument("--reload-interval", type = float, default = parameters.query_reload_interval, help = "Seconds between checks for a newly published run")
+    args = parser.parse_args()
+    if args.folder is None:
+        parser.error("set publish_dir in parameters.py or pass --folder")
+    serve(args.folder, args.host, args.port, args.reload_interval)
+
+
+if __name__ == "__main__":
+    main()
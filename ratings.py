@@ -0,0 +1,171 @@
+import numpy as np
+
+
+
+# Column-wise versions of the rating decision trees.
+# Each tree is evaluated for every vendor/product row at once with NumPy boolean masks
+# and produces exactly the same labels as the original row-by-row trees.
+# See Appendix A1-A5 and Appendix B of the accompanying methodology documentation for graphical representations of the decision tree algorithms.
+
+
+# Each spend rating is listed with the metric it reads, the label given when that metric is rising,
+# the label given when it is falling, and the shape of its decision tree.
+spend_rating_list = [("Adoption_Rating", "AdoptionP", "Positive", "Negative", "standard"),
+                     ("Increase_Rating", "IncreaseP", "Positive", "Negative", "standard"),
+                     ("Decrease_Rating", "DecreaseP", "Negative", "Positive", "standard"),
+                     ("Replacing_Rating", "ReplacingP", "Negative", "Positive", "standard"),
+                     ("NetScore_Rating", "NetScore", "Positive", "Negative", "netscore"),
+                     ("MarketShare_Rating", "MarketShare", "Positive", "Negative", "marketshare")]
+
+
+def labels(up, down, up_label, down_label):
+    label = np.full(len(up), np.nan, dtype = object)
+    label[up] = up_label
+    label[down] = down_label
+    return label
+
+
+def trendMasks(value, sos, yoy, vcutoff, dcutoff, tree):
+    # Returns the rows where the metric is rated as rising and as falling.
+    # Comparisons against NaN are False, as they are in the row-wise trees.
+    has_sos = ~np.isnan(sos)
+    has_yoy = ~np.isnan(yoy)
+    both = has_sos & has_yoy
+    sos_only = has_sos & ~has_yoy
+    neither = ~has_sos & ~has_yoy
+
+    with np.errstate(invalid = 'ignore'):
+        rising_both = (sos >= 0) & (yoy >= 0) & ((sos >= dcutoff) | (yoy >= dcutoff))
+        falling_both = (sos <= 0) & (yoy <= 0) & ((sos <= -dcutoff) | (yoy <= -dcutoff))
+        rising_sos = sos >= dcutoff
+        falling_sos = sos <= -dcutoff
+        high = value >= vcutoff
+        low = value <= -vcutoff
+        nonnegative = value >= 0
+        nonpositive = value <= 0
+
+    if tree == "marketshare":
+        up = (both & rising_both) | (sos_only & rising_sos)
+        down = (both & falling_both) | (sos_only & falling_sos)
+    else:
+        up = (both & (high | (nonnegative & rising_both))) | (sos_only & (high | (nonnegative & rising_sos))) | (neither & high)
+        if tree == "netscore":
+            down = (both & ((nonpositive & falling_both) | low)) | (sos_only & ((nonpositive & falling_sos) | low)) | (neither & low)
+        else:
+            down = (both & falling_both) | (sos_only & falling_sos)
+
+    # The trees are if/elif chains, so a row that is rising is never also rated as falling.
+    return up, down & ~up
+
+
+def spendRatings(df, vcutoff, dcutoff, mincitations):
+    # Assigns the Adoption_Rating, Increase_Rating, Decrease_Rating, Replacing_Rating, NetScore_Rating and MarketShare_Rating
+    # columns to a copy of the pivoted spend metrics (one row per vendor/product and survey).
+    eligible = df["Citations"].values >= mincitations
+
+    rated = {}
+    for rating, metric, up_label, down_label, tree in spend_rating_list:
+        value = df[metric + "_Value_SurveyZ"].values.astype(float) if tree != "marketshare" else np.full(len(df), np.nan)
+        sos = df[metric + "_Delta_sos_SurveyZ"].values.astype(float)
+        yoy = df[metric + "_Delta_yoy_SurveyZ"].values.astype(float)
+
+        up, down = trendMasks(value, sos, yoy, vcutoff, dcutoff, tree)
+        rated[rating] = labels(eligible & up, eligible & down, up_label, down_label)
+
+    return df.assign(**rated)
+
+
+def cloudRatings(df, thresholds, cloudsector, cloudvendors):
+    # Assigns the Cloud_Rating column to a copy of the cloud metrics, using the decision tree thresholds in parameters.cloudthresholds.
+    # See Appendix D of the accompanying methodology documentation for a graphical representation of this decision tree algorithm.
+    t = thresholds
+    column = lambda name: df[name].values.astype(float)
+
+    netscore = column("Cloud_NetScore")
+    delta_control = column("Cloud_NetScore_Delta_Control")
+    control_citations = column("Control_Citations")
+    share = column("Cloud_Share")
+    has_sos = ~np.isnan(column("Cloud_NetScore_sos"))
+    has_yoy = ~np.isnan(column("Cloud_NetScore_yoy"))
+
+    positive = np.zeros(len(df), dtype = bool)
+    negative = np.zeros(len(df), dtype = bool)
+
+    with np.errstate(invalid = 'ignore'):
+        # Branch 0 has both Survey-over-Survey and Year-over-Year history, branch 1 has Survey-over-Survey history only.
+        # Without Year-over-Year history the Survey-over-Survey values stand in for the Year-over-Year ones,
+        # which reduces the branch 0 rules to the branch 1 rules.
+        for branch, rows in enumerate([has_sos & has_yoy, has_sos & ~has_yoy]):
+            suffix_yoy = "_yoy" if branch == 0 else "_sos"
+            netscore_sos = column("Cloud_NetScore_sos")
+            netscore_yoy = column("Cloud_NetScore" + suffix_yoy)
+            delta_sos = column("Cloud_NetScore_Delta_sos")
+            delta_yoy = column("Cloud_NetScore_Delta" + suffix_yoy)
+            share_sos = column("Cloud_Share_sos")
+            share_yoy = column("Cloud_Share" + suffix_yoy)
+            delta = (delta_sos + delta_yoy) / 2
+
+            trend_delta = t["trend_delta"][branch]
+            trend_control = t["trend_control"][branch]
+            band_delta = t["band_delta"][branch]
+            band_control = t["band_control"][branch]
+            band_citations = t["band_citations"][branch]
+
+            up = ((netscore >= t["netscore_high"])
+                  | ((netscore >= t["netscore_mid"]) & (delta_sos > 0) & (delta_yoy > 0) & (delta > trend_delta) & (delta_control > trend_control))
+                  | ((netscore >= t["netscore_mid"]) & (delta_sos > -band_delta) & (delta_yoy > -band_delta) & (delta > -trend_delta) & (delta_control > band_control) & (control_citations >= band_citations)))
+            down = ~up & (((delta_sos < 0) & (delta_yoy < 0) & (delta < -trend_delta) & (delta_control < -trend_control))
+                          | ((delta_sos < band_delta) & (delta_yoy < band_delta) & (delta < trend_delta) & (delta_control < -band_control) & (control_citations >= band_citations))
+                          | (netscore <= t["netscore_low"]))
+
+            # Ratings that contradict the vendor's Net Score history or a large move in Cloud_Share are removed.
+            up &= ~((netscore_sos <= 0) | (netscore_yoy <= 0))
+            up &= ~((share < share_sos * t["share_drop"]) | (share < share_yoy * t["share_drop"]))
+            down &= ~((share > share_sos * t["share_rise"]) | (share > share_yoy * t["share_rise"]))
+
+            low = netscore <= t["netscore_low"]
+            positive |= rows & up & ~low
+            negative |= rows & (down | low)
+
+        neither = ~has_sos & ~has_yoy
+        positive |= neither & (netscore >= t["netscore_high"])
+        negative |= neither & ~positive & (netscore <= t["netscore_low"])
+
+        # Vendors with too few citations or too little overlap with the Cloud Group are not rated.
+        unrated = ((column("Survey_Citations") < t["min_survey_citations"])
+                   | (column("Cloud_Citations") < t["min_cloud_citations"])
+                   | (column("Cloud_Overlap") < t["min_cloud_overlap"]))
+
+    leaders = ((df["Sector_Current"] == cloudsector) & df["Vendor_Current"].isin(cloudvendors)).values
+
+    rating = labels((positive & ~unrated) | leaders, negative & ~unrated & ~leaders, "Positive", "Negative")
+    return df.assign(Cloud_Rating = rating)
+
+
+def netEffects(df, peermincitations, deltayoy):
+    # Assigns the NetEffect column (Accelerating, Decelerating or NaN) of each competitor within the primary vendor's accounts.
+    # See Appendix C of the accompanying methodology documentation for a graphical representation of this decision tree algorithm.
+    column = lambda name: df[name].values.astype(float)
+
+    with np.errstate(invalid = 'ignore'):
+        eligible = ((column("PeerPos_Citations") >= peermincitations) & (column("PeerPos_Citations_yoy") >= peermincitations)
+                    & (column("PeerNeg_Citations") >= peermincitations) & (column("PeerNeg_Citations_yoy") >= peermincitations))
+        pos_delta = column("PeerPos_NetScore") - column("PeerPos_NetScore_yoy")
+        neg_delta = column("PeerNeg_NetScore") - column("PeerNeg_NetScore_yoy")
+
+        accelerating = eligible & (pos_delta > 0) & (neg_delta > 0) & ((pos_delta >= deltayoy) | (neg_delta >= deltayoy))
+        decelerating = eligible & (pos_delta < 0) & (neg_delta < 0) & ((pos_delta <= -deltayoy) | (neg_delta <= -deltayoy))
+
+    return df.assign(NetEffect = labels(accelerating, decelerating, "Accelerating", "Decelerating"))
+
+
+def peerRatings(df, peerdelta):
+    # Assigns the Peer_Rating column from the number of Accelerating and Decelerating competitors.
+    # See Appendix C of the accompanying methodology documentation for a graphical representation of this decision tree algorithm.
+    accelerating = df["Peer_Accelerating"].values
+    decelerating = df["Peer_Decelerating"].values
+
+    # More accelerating competitors is "Negative", and takes precedence as in the original if/elif tree.
+    negative = accelerating - decelerating >= peerdelta
+    positive = decelerating - accelerating >= peerdelta
+    return df.assign(Peer_Rating = labels(positive & ~negative, negative, "Positive", "Negative"))
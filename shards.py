@@ -0,0 +1,155 @@
+import os
+import sys
+import shutil
+import tempfile
+import importlib
+import numpy as np
+import pandas as pd
+import cocitation
+import weighted
+import themes
+import parallel
+
+
+
+# Sector-sharded theme mode.
+# The spend and peer themes only combine citations of the same survey and sector: market share counts the respondents of the
+# vendor's sector, shared accounts are counted within each respondent's sector accounts, and the Product_ID that deltas and
+# competitors are matched on includes the sector. runThemes therefore splits the coded citations into (Survey_ID, Sector_ID)
+# work units and computes the two themes in steps of independent tasks:
+#   metrics  the spend and peer metrics of groups of work units, balanced on their citation pairs (see cocitation.surveyPairs),
+#            so the shared accounts of a peer-heavy sector are spread over several tasks instead of one
+#   deltas   the spend and peer deltas of groups of sectors over all their surveys, with the peer ratings and the
+#            partial weighted sums of the spend survey averages (see weighted.weightedSums)
+#   reduce   the partial sums of all groups are combined into each survey's spend averages and standard deviations
+#   zscores  the spend z-scores of the same groups of sectors
+# The reduce step, the spend ratings and the cloud theme (whose Cloud Group spans sectors) are computed in this process.
+#
+# The tasks of each step are run by an executor: a function like map(function, tasks) that returns the list of results.
+# localExecutor runs them in worker processes on this machine, started the same way as in parallel.py. To run them on several
+# nodes, pass any executor with this interface, e.g. lambda function, tasks: list(client.get_executor().map(function, tasks))
+# for a dask.distributed Client, or name a function returning one in parameters.shard_executor.
+
+
+def localExecutor(processes = None):
+    # An executor running the tasks of each map call in processes worker processes (one per CPU by default) on this machine.
+    def executor(function, tasks):
+        tasks = list(tasks)
+        workers = min(processes or os.cpu_count() or 1, len(tasks))
+        if workers <= 1:
+            return [function(task) for task in tasks]
+
+        folder = tempfile.mkdtemp(prefix = "QuantInsights_Shards_")
+        try:
+            for worker in range(workers):
+                pd.to_pickle({"function": function, "tasks": tasks[worker::workers]}, os.path.join(folder, "tasks" + str(worker) + ".pkl"))
+            parallel.runWorkers(os.path.abspath(__file__), folder, range(workers))
+            results = [None] * len(tasks)
+            for worker in range(workers):
+                results[worker::workers] = pd.read_pickle(os.path.join(folder, "results" + str(worker) + ".pkl"))
+            return results
+        finally:
+            shutil.rmtree(folder, ignore_errors = True)
+    return executor
+
+
+def runTasks(folder, worker):
+    # Worker: runs its share of the tasks of a map call and pickles their results to the folder.
+    inputs = pd.read_pickle(os.path.join(folder, "tasks" + str(worker) + ".pkl"))
+    pd.to_pickle([inputs["function"](task) for task in inputs["tasks"]], os.path.join(folder, "results" + str(worker) + ".pkl"))
+
+
+def loadExecutor(name = None, processes = None):
+    # The executor returned by the function named "module:function", or localExecutor(processes) when name is None.
+    if name is None:
+        return localExecutor(processes)
+    module, separator, function = name.partition(":")
+    if not separator:
+        raise ValueError("Expected module:function for the shard executor: " + name)
+    return getattr(importlib.import_module(module), function)()
+
+
+def packGroups(costs, groups):
+    # Assigns each item (by its cost) to one of up to groups groups, the largest items first, each to the least loaded group.
+    # Returns the group of each item, in the order of costs.
+    loads = np.zeros(min(groups, len(costs)))
+    group = np.empty(len(costs), dtype = np.int64)
+    for i in np.argsort(-costs, kind = 'mergesort'):
+        group[i] = np.argmin(loads)
+        loads[group[i]] += costs[i]
+    return group
+
+
+def unitTasks(citations, sectors, tasks):
+    # The task of each citation: its (Survey_ID, Sector_ID) work unit's group, balanced on the units' citations and citation pairs.
+    costs = cocitation.surveyPairs(citations, ["Survey_ID", "Sector_ID"]) + citations.groupby(["Survey_ID", "Sector_ID"]).size()
+    units = costs.index.get_level_values("Survey_ID").values.astype(np.int64) * sectors + costs.index.get_level_values("Sector_ID").values
+    task = np.zeros(units.max() + 1 if len(units) else 0, dtype = np.int64)
+    task[units] = packGroups(costs.values.astype(float), tasks)
+    return task[citations["Survey_ID"].values.astype(np.int64) * sectors + citations["Sector_ID"].values]
+
+
+def metricsTask(task):
+    # The spend and peer metrics of the citations of a group of work units.
+    citations, entity_dict = task
+    return themes.spendMetrics(citations, entity_dict), themes.peerMetrics(citations, entity_dict)
+
+
+def deltasTask(task):
+    # The spend deltas and the partial sums of their survey averages, and the peer ratings, of a group of sectors.
+    spend6, peer7, p = task
+    spend8b = themes.spendLags(spend6)
+    sums = weighted.weightedSums(spend8b, ['Survey_ID', 'Metric'], themes.spend_averages, 'Citations')
+    return spend8b, sums, themes.peerScores(themes.peerDeltas(peer7), p["peermincitations"], p["deltayoy"], p["peerdelta"])
+
+
+def zscoresTask(task):
+    # The pivoted spend z-scores of a group of sectors.
+    spend8b, surveyavg1 = task
+    return themes.spendZScores(spend8b, surveyavg1)
+
+
+def runThemes(citations, entity_dict, theme_parameters, executor = None, tasks = None):
+    # Returns a dict with the output of each theme, with the spend and peer themes computed as tasks of executor
+    # (localExecutor() by default), each step split into up to tasks tasks (four per CPU by default).
+    p = theme_parameters
+    if executor is None:
+        executor = localExecutor()
+    if tasks is None:
+        tasks = 4 * (os.cpu_count() or 1)
+    keys = entity_dict[["Sector_ID", "Product_ID"]]
+    sectors = int(keys["Sector_ID"].max()) + 1
+
+    # Metrics of the work units.
+    task = unitTasks(citations, sectors, tasks)
+    metrics = executor(metricsTask, [(units, keys) for i, units in citations.groupby(task, sort = True)])
+    spend6 = pd.concat([spend for spend, peer in metrics], ignore_index = True)
+    peer7 = pd.concat([peer for spend, peer in metrics], ignore_index = True)
+    del metrics
+
+    # Deltas of groups of sectors, balanced on their metric rows.
+    spend_sector = keys["Sector_ID"].values[spend6["Entity_ID"].values]
+    peer_sector = keys["Sector_ID"].values[peer7["Entity_ID"].values]
+    rows = np.bincount(spend_sector, minlength = sectors) + np.bincount(peer_sector, minlength = sectors)
+    group = np.full(sectors, -1, dtype = np.int64)
+    group[rows > 0] = packGroups(rows[rows > 0].astype(float), tasks)
+    spend_groups = dict(list(spend6.groupby(group[spend_sector], sort = True)))
+    peer_groups = dict(list(peer7.groupby(group[peer_sector], sort = True)))
+    deltas = executor(deltasTask, [(spend_groups[i], peer_groups.get(i, peer7.iloc[:0]), p) for i in sorted(spend_groups)])
+    del spend6, peer7, spend_groups, peer_groups
+
+    # The partial sums are combined into the survey averages, and the z-scores are calculated with them.
+    sums = weighted.combineSums(pd.concat([part[1] for part in deltas], ignore_index = True), ['Survey_ID', 'Metric'], themes.spend_averages)
+    surveyavg1 = themes.spendAverages(weighted.sumMoments(sums, ['Survey_ID', 'Metric'], themes.spend_averages))
+    zscores = executor(zscoresTask, [(part[0], surveyavg1) for part in deltas])
+    spend12 = themes.spendColumns(pd.concat(zscores).sort_index().sort_index(axis = 1))
+    peer_final = pd.concat([part[2] for part in deltas], ignore_index = True)
+    del deltas, zscores
+
+    return {"spend": themes.spendScores(spend12, p["vcutoff"], p["dcutoff"], p["mincitations"]),
+            "peer": peer_final.sort_values(["Survey_ID", "Entity_ID"]).reset_index(drop = True),
+            "cloud": themes.cloudTheme(citations, entity_dict, p["cloudsector"], p["cloudvendors"], p["cloudthresholds"])}
+
+
+if __name__ == "__main__":
+    runTasks(sys.argv[1], sys.argv[2])
@@ -0,0 +1,138 @@
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import model
+import parallel
+
+
+
+# Significance of the Positive minus Negative return spread in InsightPerformance.
+# The spread of each row is resampled from the forecast vendors of its surveys (forecast3):
+#   bootstrap    the Positive and the Negative vendors of each survey are each resampled with replacement,
+#                giving a percentile confidence interval for the spread
+#   permutation  the Positive / Negative forecasts are shuffled among the vendors of each survey,
+#                giving the two-sided p-value of a spread at least as large as the observed one by chance
+# The Four Consecutive and Cumulative rows compound the resampled survey returns of their surveys, as their returns are compounded.
+# Each block of resamples is drawn for all surveys at once as NumPy index arrays. Blocks are seeded by their position,
+# so the results do not depend on how many worker processes (see parallel.runWorkers) the blocks are spread over.
+
+
+block_size = 1000  # Resamples drawn at a time
+
+
+def surveyReturns(forecast3):
+    # The Positive and Negative vendor returns of each survey, with the survey's return window.
+    forecast3 = forecast3[pd.notnull(forecast3["Return_End"]) & pd.notnull(forecast3["Window_Start"]) & pd.notnull(forecast3["Window_End"])]
+    surveys = forecast3.drop_duplicates("Survey_ID").sort_values("Survey_ID")[["Survey_ID", "Window_Start", "Window_End"]].reset_index(drop = True)
+    returns = []
+    for survey_id in surveys["Survey_ID"]:
+        survey = forecast3[forecast3["Survey_ID"] == survey_id]
+        returns.append((survey.loc[survey["Insight_Forecast"] == "Positive", "Return_End"].values.astype(float),
+                        survey.loc[survey["Insight_Forecast"] == "Negative", "Return_End"].values.astype(float)))
+    return surveys, returns
+
+
+def groupMeans(values, index):
+    # Mean of values[index] along the last axis; NaN when there are no values.
+    if values.size == 0:
+        return np.full(index.shape[0], np.nan)
+    return values[index].mean(axis = 1)
+
+
+def resampleBlock(returns, size, seed):
+    # Bootstrap and permutation Positive and Negative means of every survey for one block of resamples, each of shape (size, surveys).
+    rng = np.random.RandomState(seed)
+    draws = {name: np.full((size, len(returns)), np.nan) for name in ["Positive_Bootstrap", "Negative_Bootstrap", "Positive_Permutation", "Negative_Permutation"]}
+    for i, (positive, negative) in enumerate(returns):
+        draws["Positive_Bootstrap"][:, i] = groupMeans(positive, rng.randint(0, max(len(positive), 1), (size, len(positive))))
+        draws["Negative_Bootstrap"][:, i] = groupMeans(negative, rng.randint(0, max(len(negative), 1), (size, len(negative))))
+
+        pooled = np.concatenate([positive, negative])
+        order = np.argsort(rng.random_sample((size, len(pooled))), axis = 1)
+        draws["Positive_Permutation"][:, i] = groupMeans(pooled, order[:, :len(positive)])
+        draws["Negative_Permutation"][:, i] = groupMeans(pooled, order[:, len(positive):])
+    return draws
+
+
+def resampleBlocks(returns, blocks, seed):
+    # The resamples of each (block, size) in blocks, by block.
+    return {block: resampleBlock(returns, size, seed + block) for block, size in blocks}
+
+
+def runBlocks(folder, worker):
+    # Worker: draws its share of the blocks and saves them to the folder.
+    inputs = pd.read_pickle(os.path.join(folder, "inputs.pkl"))
+    draws = resampleBlocks(inputs["returns"], inputs["workers"][int(worker)], inputs["seed"])
+    pd.to_pickle(draws, os.path.join(folder, "worker" + str(worker) + ".pkl"))
+
+
+def performanceRows(surveys):
+    # The survey columns compounded by each InsightPerformance row, keyed by Index_Type and Index_Window as in model.performance.
+    starts = surveys["Window_Start"].apply(model.strtodate)
+    ends = surveys["Window_End"].apply(model.strtodate)
+    years = surveys["Window_Start"].str.slice(start = -4)
+
+    rows = [("Single Insight Dataset", surveys["Window_Start"][i] + "-" + surveys["Window_End"][i], [i]) for i in range(len(surveys))]
+    for year in sorted(years.unique()):
+        columns = list(np.flatnonzero((years == year).values))
+        rows.append(("Four Consecutive Insight Datasets", model.datetostr(starts[columns].min()) + "-" + model.datetostr(ends[columns].max()), columns))
+    rows.append(("Cumulative Insight Dataset", model.datetostr(starts.min()) + "-" + model.datetostr(ends.max()), list(range(len(surveys)))))
+    return rows
+
+
+def compoundedSpreads(positive, negative, rows):
+    # Spread of each row, compounding the survey returns of the row's surveys; missing survey returns are skipped as in model.performance.
+    spreads = np.empty(positive.shape[:-1] + (len(rows),))
+    for j, (index_type, index_window, columns) in enumerate(rows):
+        if len(columns) == 1:
+            spreads[..., j] = positive[..., columns[0]] - negative[..., columns[0]]
+        else:
+            spreads[..., j] = np.expm1(np.nansum(np.log1p(positive[..., columns]), axis = -1)) - np.expm1(np.nansum(np.log1p(negative[..., columns]), axis = -1))
+    return spreads
+
+
+def performanceSignificance(forecast3, forecast9, resamples, level, seed = 0, processes = 1):
+    # Returns the InsightPerformance table with the spread, its bootstrap confidence interval and its permutation p-value.
+    surveys, returns = surveyReturns(forecast3)
+    blocks = [(block, min(block_size, resamples - block * block_size)) for block in range((resamples + block_size - 1) // block_size)]
+
+    if processes is None:
+        processes = os.cpu_count() or 1
+    workers = [blocks[i::processes] for i in range(min(processes, len(blocks)))]
+    if len(workers) <= 1:
+        drawn = resampleBlocks(returns, blocks, seed)
+    else:
+        folder = tempfile.mkdtemp(prefix = "QuantInsights_Significance_")
+        try:
+            pd.to_pickle({"returns": returns, "workers": workers, "seed": seed}, os.path.join(folder, "inputs.pkl"))
+            parallel.runWorkers(os.path.abspath(__file__), folder, range(len(workers)))
+            drawn = {}
+            for worker in range(len(workers)):
+                drawn.update(pd.read_pickle(os.path.join(folder, "worker" + str(worker) + ".pkl")))
+        finally:
+            shutil.rmtree(folder, ignore_errors = True)
+    draws = {name: np.concatenate([drawn[block][name] for block, size in blocks]) for name in drawn[0]}
+
+    rows = performanceRows(surveys)
+    observed = compoundedSpreads(np.array([[np.mean(p) if len(p) else np.nan for p, n in returns]]),
+                                 np.array([[np.mean(n) if len(n) else np.nan for p, n in returns]]), rows)[0]
+    bootstrap = compoundedSpreads(draws["Positive_Bootstrap"], draws["Negative_Bootstrap"], rows)
+    permutation = compoundedSpreads(draws["Positive_Permutation"], draws["Negative_Permutation"], rows)
+
+    significance = pd.DataFrame({"Index_Type": [row[0] for row in rows], "Index_Window": [row[1] for row in rows]})
+    significance["Spread_Returns"] = observed
+    with np.errstate(invalid = 'ignore'):
+        significance["Spread_Lower"] = np.nanpercentile(bootstrap, 50 * (1 - level), axis = 0)
+        significance["Spread_Upper"] = np.nanpercentile(bootstrap, 50 * (1 + level), axis = 0)
+        extreme = (np.abs(permutation) >= np.abs(observed) - 1e-12).sum(axis = 0)
+    significance["Spread_PValue"] = (extreme + 1.) / (np.isfinite(permutation).sum(axis = 0) + 1.)
+    significance.loc[np.isnan(observed), ["Spread_Lower", "Spread_Upper", "Spread_PValue"]] = np.nan
+
+    return forecast9.merge(significance, how = 'left', on = ["Index_Type", "Index_Window"])
+
+
+if __name__ == "__main__":
+    runBlocks(sys.argv[1], sys.argv[2])
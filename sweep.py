@@ -0,0 +1,144 @@
+import itertools
+import random
+import multiprocessing
+import pandas as pd
+import parameters
+import ingest
+import partition
+import entities
+import themes
+import model
+import portfolio
+
+
+
+# Parameter sweeps over the rating, model and forecast parameters in parameters.py.
+# The stages that do not depend on these parameters (each theme's metrics, deltas and z-scores, and the Cloud_Rating)
+# are computed once. Each parameter set then only reassigns the spend and peer ratings, refits the model and recalculates
+# the forecasts and performance, in a pool of worker processes.
+# The InsightPerformance rows of every parameter set are written to parameters.sweep_file, next to the parameter values.
+# With parameters.portfolio set, each parameter set's forecasts are also simulated as portfolios (see portfolio.py), and the
+# cumulative net return, mean turnover and total cost of each book are added to its Cumulative Insight Dataset row.
+#
+# Run with "python sweep.py" after setting the sweep parameters in parameters.py.
+
+
+sweep_parameters = ["vcutoff", "dcutoff", "mincitations", "peermincitations", "deltayoy", "peerdelta", "zcutoff", "upperpcutoff", "lowerpcutoff"]
+
+
+def parameterSets(grid, samples = None, seed = 0):
+    # Returns every combination of the values listed in grid, or a random sample of samples combinations.
+    # In a random sample a (low, high) pair is drawn uniformly instead of from a list.
+    # Parameters that are not in grid keep their value in parameters.py.
+    for name in grid:
+        if name not in sweep_parameters:
+            raise ValueError("Unknown sweep parameter: " + name)
+        if samples is None and isinstance(grid[name], tuple):
+            raise ValueError("A (low, high) range can only be sampled: set sweep_samples for " + name)
+
+    names = list(grid)
+    if samples is None:
+        combinations = itertools.product(*[grid[name] for name in names])
+    else:
+        rng = random.Random(seed)
+        def draw(values):
+            if not isinstance(values, tuple):
+                return rng.choice(values)
+            if isinstance(values[0], int) and isinstance(values[1], int):
+                return rng.randint(values[0], values[1])
+            return rng.uniform(values[0], values[1])
+        combinations = [[draw(grid[name]) for name in names] for i in range(samples)]
+
+    base = {name: getattr(parameters, name) for name in sweep_parameters}
+    return [dict(base, **dict(zip(names, combination))) for combination in combinations]
+
+
+def sweepInputs():
+    # Reads the input files and computes the parameter-independent stages, with the settings in parameters.py.
+    if parameters.return_horizons is not None:
+        raise ValueError("return_horizons cannot be combined with a parameter sweep")
+    cloudsector = parameters.cloudsector
+    cloudvendors = parameters.cloudvendors
+
+    if parameters.streaming:
+        survey_ids = partition.partitionSource(parameters.source_file, parameters.partition_dir, parameters.chunksize)
+        survey_dict, entity_dict, metrics = partition.streamMetrics(parameters.partition_dir, survey_ids, None, None, cloudsector, cloudvendors)
+    else:
+        source1 = ingest.readDataset(parameters.source_file, "source", cache_dir = parameters.cache_dir)
+        source1, survey_dict, entity_dict = entities.buildEntities(source1)
+        metrics = themes.themeMetrics(source1, entity_dict, cloudsector, cloudvendors)
+
+    return {"survey_max": max(survey_dict.index),
+            "survey_dict": survey_dict,
+            "entity_dict": entity_dict,
+            "spend12": themes.spendDeltas(metrics["spend"]),
+            "peer9": themes.peerDeltas(metrics["peer"]),
+            "cloud_final": themes.cloudScores(themes.cloudDeltas(metrics["cloud"], entity_dict), cloudsector, cloudvendors, parameters.cloudthresholds),
+            "spReturns": ingest.readDataset(parameters.spReturns_file, "spReturns", cache_dir = parameters.cache_dir),
+            "ftecReturns": ingest.readDataset(parameters.ftecReturns_file, "ftecReturns", cache_dir = parameters.cache_dir)}
+
+
+# The parameter-independent stages, set once in each worker process.
+worker_inputs = None
+
+
+def initWorker(inputs):
+    global worker_inputs
+    worker_inputs = inputs
+
+
+def runParameterSet(parameter_set):
+    # Returns the InsightPerformance rows of one parameter set, or None when its model cannot be fit.
+    inputs = worker_inputs
+    p = parameter_set
+    try:
+        spend_final = themes.spendScores(inputs["spend12"], p["vcutoff"], p["dcutoff"], p["mincitations"])
+        peer_final = themes.peerScores(inputs["peer9"], p["peermincitations"], p["deltayoy"], p["peerdelta"])
+
+        returns1 = model.insightData(spend_final, peer_final, inputs["cloud_final"], inputs["entity_dict"], p["mincitations"])
+        returns3 = model.stockReturns(returns1, inputs["spReturns"], p["zcutoff"])
+        result, selected_ratings = model.fitModel(returns3, inputs["survey_max"], verbose = False)
+
+        forecast3 = model.forecast(returns3, result, selected_ratings, inputs["survey_dict"], inputs["entity_dict"], inputs["spReturns"], p["upperpcutoff"], p["lowerpcutoff"])
+        performance = model.performance(forecast3, inputs["ftecReturns"])
+    except Exception as e:
+        print("Parameter set " + str(p) + " failed: " + repr(e))
+        return None
+
+    for name in sweep_parameters:
+        performance[name] = p[name]
+    performance["Selected_Ratings"] = ", ".join(selected_ratings)
+
+    if parameters.portfolio:
+        simulated = portfolio.simulate(forecast3, parameters.portfolio_weighting, parameters.portfolio_cost_bps, parameters.portfolio_slippage_bps, parameters.portfolio_trade_fee)
+        performance = performance.merge(portfolio.portfolioSummary(simulated).assign(Index_Type = "Cumulative Insight Dataset"), how = 'left', on = "Index_Type")
+    return performance
+
+
+def runSweep(parameter_sets, processes = None, inputs = None):
+    # Runs every parameter set in a pool of worker processes and returns their InsightPerformance rows, numbered by Configuration.
+    if inputs is None:
+        inputs = sweepInputs()
+
+    pool = multiprocessing.Pool(processes, initializer = initWorker, initargs = (inputs,))
+    try:
+        performances = pool.map(runParameterSet, parameter_sets, chunksize = 1)
+    finally:
+        pool.close()
+        pool.join()
+
+    sweep = [performance.assign(Configuration = i) for i, performance in enumerate(performances) if performance is not None]
+    if not sweep:
+        return pd.DataFrame()
+    sweep = pd.concat(sweep, ignore_index = True)
+    columns = ["Configuration"] + sweep_parameters + ["Selected_Ratings", "Index_Type", "Index_Window", "Positive_Returns", "Negative_Returns", "Benchmark_Fidelity_MSCI_IT_ETF"]
+    return sweep[columns + [column for column in sweep.columns if column not in columns and column != "Configuration"]]
+
+
+if __name__ == "__main__":
+    parameter_sets = parameterSets(parameters.sweep_grid, parameters.sweep_samples, parameters.sweep_seed)
+    print("Running " + str(len(parameter_sets)) + " parameter sets")
+
+    sweep = runSweep(parameter_sets, parameters.sweep_processes)
+    sweep.to_csv(parameters.sweep_file, index = False)
+    print(sweep)
@@ -0,0 +1,76 @@
+import unittest
+import numpy as np
+import pandas as pd
+import weighted
+
+
+
+# Checks weighted.py against per-group np.average / np.cov(x, aweights = w, ddof = 0).
+# Run with "python -m unittest discover tests" or "python -m pytest tests" from the repository folder.
+
+
+def referenceMoments(df, by, column, weights):
+    rows = []
+    for key, group in df.groupby(by, sort = True):
+        values = group[[column, weights]].dropna()
+        if values[weights].sum() > 0:
+            mean = np.average(values[column].values, weights = values[weights].values)
+            stddev = np.sqrt(np.cov(values[column].values, aweights = values[weights].values, ddof = 0))
+        else:
+            mean, stddev = np.nan, np.nan
+        rows.append({by: key, column + "_Mean": mean, column + "_StdDev": stddev})
+    return pd.DataFrame(rows)
+
+
+class WeightedMomentsTest(unittest.TestCase):
+
+    def assertMatches(self, df, column = "x", atol = 1e-12):
+        moments = weighted.weightedMoments(df, ["g"], [column], "w")
+        reference = referenceMoments(df, "g", column, "w")
+        for statistic in ["_Mean", "_StdDev"]:
+            np.testing.assert_allclose(moments[column + statistic].values, reference[column + statistic].values, rtol = 1e-9, atol = atol)
+        return moments
+
+    def test_random_groups(self):
+        rng = np.random.RandomState(0)
+        n = 5000
+        df = pd.DataFrame({"g": rng.randint(0, 500, n), "x": rng.rand(n), "w": rng.randint(1, 50, n).astype(float)})
+        df.loc[rng.rand(n) < .3, "x"] = np.nan
+        df.loc[df["g"] % 11 == 0, "x"] = np.nan
+        moments = self.assertMatches(df)
+        self.assertTrue(np.isnan(moments.loc[moments["g"] % 11 == 0, "x_StdDev"]).all())
+
+    def test_single_row_groups(self):
+        # A group of one value has a StdDev of exactly 0, so its z-scores are 0 / 0.
+        rng = np.random.RandomState(1)
+        n = 2000
+        df = pd.DataFrame({"g": np.arange(n), "x": rng.rand(n) * 2 - 1, "w": rng.randint(1, 500, n).astype(float)})
+        moments = self.assertMatches(df, atol = 1e-15)
+        self.assertTrue((moments["x_StdDev"] == 0).all())
+        with np.errstate(invalid = 'ignore'):
+            self.assertTrue(np.isnan((df["x"].values - moments["x_Mean"].values) / moments["x_StdDev"].values).all())
+
+    def test_small_spread(self):
+        # Small differences between large values are kept.
+        df = pd.DataFrame({"g": [0, 0, 1, 1, 2, 2], "x": [1000, 1000.001, .5, .5000004, .3, .3], "w": [3., 5., 1., 2., 4., 7.]})
+        moments = self.assertMatches(df, atol = 0)
+        self.assertTrue((moments["x_StdDev"].values[:2] > 0).all())
+        self.assertEqual(moments["x_StdDev"].values[2], 0)
+
+    def test_combined_parts(self):
+        # The sums of parts combine into the sums of the whole frame (see shards.py).
+        rng = np.random.RandomState(2)
+        n = 6000
+        df = pd.DataFrame({"g": rng.randint(0, 800, n), "x": rng.rand(n) * 100, "w": rng.randint(1, 50, n).astype(float)})
+        df.loc[rng.rand(n) < .2, "x"] = np.nan
+        parts = pd.concat([weighted.weightedSums(df.iloc[i::3], ["g"], ["x"], "w") for i in range(3)], ignore_index = True)
+        combined = weighted.sumMoments(weighted.combineSums(parts, ["g"], ["x"]), ["g"], ["x"])
+        whole = weighted.weightedMoments(df, ["g"], ["x"], "w")
+        for statistic in ["x_Mean", "x_StdDev"]:
+            np.testing.assert_allclose(combined[statistic].values, whole[statistic].values, rtol = 1e-9, atol = 1e-12)
+        single = df.dropna().groupby("g").size()
+        self.assertTrue((combined.set_index("g")["x_StdDev"].reindex(single[single == 1].index) == 0).all())
+
+
+if __name__ == "__main__":
+    unittest.main()
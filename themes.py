@@ -0,0 +1,352 @@
+import pandas as pd
+import numpy as np
+import ratings
+import cocitation
+import weighted
+import entities
+import bitmaps
+import lags
+
+
+
+# The spend, peer and cloud themes, computed from the coded citations (see entities.py).
+# Each theme has three stages:
+#   <theme>Metrics aggregates the citations of each survey on its own, into one row per vendor/product (or vendor pair) and survey
+#   <theme>Deltas matches each survey's metrics with those of its Survey-over-Survey and Year-over-Year lag surveys (see lags.py)
+#   and calculates the deltas and z-scores
+#   <theme>Scores assigns the ratings, the only stage that depends on the rating parameters in parameters.py
+# so the metrics can be calculated one survey at a time (see partition.py), a theme can be computed for any set of surveys
+# from the metrics of those surveys and their lag surveys, and the ratings can be reassigned without the earlier stages (see sweep.py).
+
+
+metric_list = ['ADOPTION', 'INCREASE', 'FLAT', 'DECREASE', 'REPLACING']
+
+# Estimated bytes held per row while the heaviest stages run, used to split them into groups of surveys under a memory budget.
+pair_bytes = 32      # per citation pair of the peer metrics (see cocitation.surveyPairs)
+zscore_bytes = 600   # per spend metric row of the z-scores and their pivot
+
+# Columns of the spend metrics whose weighted survey averages and standard deviations give the z-scores.
+spend_averages = ['value', 'Delta_sos', 'Delta_yoy']
+
+
+def lagSurveys(survey_ids):
+    # Returns the given surveys together with the lag surveys their deltas are calculated against.
+    survey_ids = [int(survey_id) for survey_id in survey_ids]
+    vectors = lags.lagVectors(max(survey_ids, default = 0))
+    return set(survey_ids) | set(vectors["sos"][survey_ids]) | set(vectors["yoy"][survey_ids][vectors["yoy"][survey_ids] >= 0])
+
+
+def surveyChunks(sizes, memory_budget):
+    # Groups of consecutive surveys whose estimated sizes (a Series of bytes by Survey_ID) each fit in memory_budget MB.
+    # All surveys are one group when there is no budget or they fit in it together; a survey larger than the budget is a group of its own.
+    sizes = sizes.sort_index()
+    if memory_budget is None or sizes.sum() <= memory_budget * 1024 ** 2:
+        return [list(sizes.index)]
+    chunks = [[]]
+    total = 0
+    for survey_id, size in sizes.items():
+        if chunks[-1] and total + size > memory_budget * 1024 ** 2:
+            chunks.append([])
+            total = 0
+        chunks[-1].append(survey_id)
+        total += size
+    return chunks
+
+
+def themeMetrics(citations, entity_dict, cloudsector, cloudvendors):
+    # The metrics stage of all three themes.
+    return {"spend": spendMetrics(citations, entity_dict),
+            "peer": peerMetrics(citations, entity_dict),
+            "cloud": cloudMetrics(citations, entity_dict, cloudsector, cloudvendors)}
+
+
+######################################################
+### Expected Enterprise Spend + Market Share Theme ###
+######################################################
+
+
+def spendMetrics(citations, entity_dict):
+
+    # Spending intentions for each vendor are aggregated to calculate spend metrics:
+    # Citations, Adoption %, Increase %, Flat %, Decrease %, Replacing %, Net Score.
+    # Unique number of respondents in each sector is merged on to calculate Market Share.
+
+    spend1b = citations[citations.Metric != 'REPLACING'].drop_duplicates(['Survey_ID', 'Respondent_ID', 'Sector_ID'])
+
+    spend2b = spend1b.groupby(['Survey_ID', 'Sector_ID']).size().reset_index(name = 'Count')
+
+    spend4 = entities.countMetrics(citations, ['Survey_ID', 'Entity_ID'], metric_list)
+    spend4['Sector_ID'] = entities.entityKey(spend4, entity_dict, 'Sector_ID')
+
+    spend5 = spend4.merge(spend2b, on = ['Survey_ID', 'Sector_ID'])
+    spend5['Citations'] = spend5['ADOPTION'] + spend5['INCREASE'] + spend5['FLAT'] + spend5['DECREASE'] + spend5['REPLACING']
+    spend5['Citations_ExR'] = spend5['ADOPTION'] + spend5['INCREASE'] + spend5['FLAT'] + spend5['DECREASE']
+    spend5['AdoptionP'] = spend5['ADOPTION'] / spend5['Citations']
+    spend5['IncreaseP'] = spend5['INCREASE'] / spend5['Citations']
+    spend5['FlatP'] = spend5['FLAT'] / spend5['Citations']
+    spend5['DecreaseP'] = spend5['DECREASE'] / spend5['Citations']
+    spend5['ReplacingP'] = spend5['REPLACING'] / spend5['Citations']
+    spend5['NetScore'] = (spend5['ADOPTION'] + spend5['INCREASE'] - spend5['DECREASE'] - spend5['REPLACING']) / spend5['Citations']
+    spend5['MarketShare'] = spend5['Citations_ExR'] / spend5['Count']
+
+    spend5 = spend5.drop(['ADOPTION', 'INCREASE', 'FLAT', 'DECREASE', 'REPLACING', 'Citations_ExR', 'Count', 'Sector_ID'], axis = 1)
+
+    spend6 = pd.melt(spend5, id_vars = ['Survey_ID', 'Entity_ID', 'Citations'], value_vars = ['AdoptionP', 'IncreaseP', 'FlatP', 'DecreaseP', 'ReplacingP', 'NetScore', 'MarketShare'])
+    spend6['Product_ID'] = entities.entityKey(spend6, entity_dict, 'Product_ID')
+
+    return spend6
+
+
+def spendDeltas(spend6, memory_budget = None):
+
+    spend8b = spendLags(spend6)
+
+    # Weighted survey averages for each metric value and delta are calculated to create z-scores.
+    # Deltas are averaged over the vendors that have a Survey-over-Survey or Year-over-Year value.
+
+    surveyavg1 = spendAverages(weighted.weightedMoments(spend8b, ['Survey_ID', 'Metric'], spend_averages, 'Citations'))
+
+    # With a memory budget (in MB), the z-scores are calculated and pivoted for groups of surveys that are estimated to fit in it.
+
+    if memory_budget is None:
+        spend12 = spendZScores(spend8b, surveyavg1)
+    else:
+        chunks = surveyChunks(spend8b.groupby('Survey_ID').size() * zscore_bytes, memory_budget)
+        spend12 = pd.concat([spendZScores(spend8b[spend8b['Survey_ID'].isin(chunk)], surveyavg1) for chunk in chunks]).sort_index(axis = 1)
+
+    return spendColumns(spend12)
+
+
+def spendLags(spend6):
+
+    # Survey-over-Survey and Year-over-Year values for each metric are looked up to calculate deltas.
+    # Deltas are used to measure recent inflections and longer-term trends.
+    # Values are matched on the vendor/product (Product_ID) and metric.
+
+    spend7 = spend6.rename(columns = {'variable':'Metric'}, copy = False)
+
+    spend8b = lags.addLags(spend7, ['Product_ID', 'Metric'], {'value': 'Value'})
+
+    spend8b['Delta_sos'] = spend8b['value'] - spend8b['Value_sos']
+    spend8b['Delta_yoy'] = spend8b['value'] - spend8b['Value_yoy']
+    spend8b = spend8b.drop(['Product_ID'], axis = 1)
+
+    return spend8b
+
+
+def spendAverages(moments):
+    # The weighted survey averages and standard deviations of the columns in spend_averages, named as spendZScores reads them.
+    return moments.rename(columns = {"value_Mean": "Value_SurveyMean", "Delta_sos_Mean":"Delta_sos_SurveyMean", "Delta_yoy_Mean":"Delta_yoy_SurveyMean", "value_StdDev":"Value_SurveyStdDev", "Delta_sos_StdDev":"Delta_sos_SurveyStdDev", "Delta_yoy_StdDev":"Delta_yoy_SurveyStdDev"})
+
+
+def spendColumns(spend12):
+    # The pivoted z-scores with one column per metric, e.g. NetScore_Delta_sos_SurveyZ.
+    spend12.columns = [metric + "_" + value for value, metric in spend12.columns.values]
+    return spend12.reset_index()
+
+
+def spendZScores(spend8b, surveyavg1):
+
+    spend9 = spend8b.merge(surveyavg1, how = 'left', on = ['Survey_ID', 'Metric'])
+    spend9["Value_SurveyZ"] = (spend9["value"] - spend9["Value_SurveyMean"]) / spend9["Value_SurveyStdDev"]
+    spend9["Delta_sos_SurveyZ"] = (spend9["Delta_sos"] - spend9["Delta_sos_SurveyMean"]) / spend9["Delta_sos_SurveyStdDev"]
+    spend9["Delta_yoy_SurveyZ"] = (spend9["Delta_yoy"] - spend9["Delta_yoy_SurveyMean"]) / spend9["Delta_yoy_SurveyStdDev"]
+
+    spend9 = spend9.rename(columns = {"value":"Value"}, copy = False)
+
+    # Each metric's values, deltas and z-scores are pivoted to one column per metric, e.g. NetScore_Delta_sos_SurveyZ.
+
+    return pd.pivot_table(spend9, index = ['Survey_ID', 'Entity_ID', 'Citations'], columns = "Metric", values = ['Value', 'Delta_sos',  'Delta_yoy', 'Value_SurveyZ', 'Delta_sos_SurveyZ', 'Delta_yoy_SurveyZ'])
+
+
+def spendScores(spend12, vcutoff, dcutoff, mincitations):
+
+    # The Adoption_Rating, Increase_Rating, Decrease_Rating, Replacing_Rating, NetScore_Rating and MarketShare_Rating ratings
+    # are assigned based on the decision tree algorithms in ratings.py.
+    # See Appendix A1-A5 and Appendix B of the accompanying methodology documentation for graphical representations of the decision tree algorithms.
+
+    spend13 = ratings.spendRatings(spend12, vcutoff, dcutoff, mincitations).drop(["MarketShare_Value_SurveyZ"], axis = 1)
+
+    return spend13
+
+
+def spendTheme(citations, entity_dict, vcutoff, dcutoff, mincitations):
+    return spendScores(spendDeltas(spendMetrics(citations, entity_dict)), vcutoff, dcutoff, mincitations)
+
+
+###########################################
+## Peer Benchmarking / Competition Theme ##
+###########################################
+
+
+def peerMetrics(citations, entity_dict, memory_budget = None):
+
+    # Pairwise combinations of vendors within the same sector are matched.
+    # Shared accounts Citations and Net Scores are calculated for each pairwise combination.
+    # Shared accounts are counted with sparse respondent incidence matrices (see cocitation.py) rather than a self-join of the source.
+    # The primary vendor (Vendor_Filter) is the Entity_ID and each competitor (Vendor_Calc) is a vendor/product (Product_ID_Calc).
+    # With a memory budget (in MB), the metrics are calculated for groups of surveys whose shared accounts are estimated to fit in it.
+
+    if memory_budget is not None:
+        chunks = surveyChunks(cocitation.surveyPairs(citations) * pair_bytes, memory_budget)
+        if len(chunks) > 1:
+            return pd.concat([peerMetrics(citations[citations["Survey_ID"].isin(chunk)], entity_dict) for chunk in chunks], ignore_index = True)
+
+    peer4 = cocitation.coCitations(citations, entity_dict)
+
+    peer5 = peer4.set_index(['Survey_ID', 'Entity_ID', 'Metric_Filter_Group', 'Product_ID_Calc', 'Metric_Calc'])['Count'].unstack('Metric_Calc', fill_value = 0)
+    peer5 = peer5.reindex(columns = metric_list, fill_value = 0).reset_index()
+    peer5.columns.name = None
+
+    peer7 = peer5
+
+    peer7['Peer_Citations'] = peer7['ADOPTION'] + peer7['INCREASE'] + peer7['FLAT'] + peer7['DECREASE'] + peer7['REPLACING']
+    peer7['Peer_NetScore'] = (peer7['ADOPTION'] + peer7['INCREASE'] - peer7['DECREASE'] - peer7['REPLACING']) / peer7['Peer_Citations']
+    peer7 = peer7.drop(['ADOPTION', 'INCREASE', 'FLAT', 'DECREASE', 'REPLACING'], axis = 1)
+    peer7['Product_ID_Filter'] = entities.entityKey(peer7, entity_dict, 'Product_ID')
+
+    return peer7
+
+
+def peerDeltas(peer7):
+
+    # Year-over-Year values for each metric are looked up to calculate deltas.
+    # Deltas are used to measure longer-term trends.
+
+    peer8 = lags.addLags(peer7, ['Product_ID_Filter', 'Metric_Filter_Group', 'Product_ID_Calc'], {'Peer_Citations': 'Peer_Citations', 'Peer_NetScore': 'Peer_NetScore'}, lags = ["yoy"])
+    peer8 = peer8.drop(['Product_ID_Filter'], axis = 1)
+    peer8pos = peer8.loc[peer8['Metric_Filter_Group'] == "Pos"].rename(columns = {'Peer_Citations':'PeerPos_Citations', 'Peer_NetScore':'PeerPos_NetScore', 'Peer_Citations_yoy':'PeerPos_Citations_yoy', 'Peer_NetScore_yoy':'PeerPos_NetScore_yoy'}, copy = False)
+    peer8neg = peer8.loc[peer8['Metric_Filter_Group'] == "Neg"].rename(columns = {'Peer_Citations':'PeerNeg_Citations', 'Peer_NetScore':'PeerNeg_NetScore', 'Peer_Citations_yoy':'PeerNeg_Citations_yoy', 'Peer_NetScore_yoy':'PeerNeg_NetScore_yoy'}, copy = False)
+    del peer8
+
+    peer9 = peer8pos.merge(peer8neg, how = "outer", on = ['Survey_ID', 'Entity_ID', 'Product_ID_Calc']).drop(["Metric_Filter_Group_y", "Metric_Filter_Group_x"], axis = 1)
+
+    return peer9
+
+
+def peerScores(peer9, peermincitations, deltayoy, peerdelta):
+
+    # Each Competitor (Vendor_Calc) is assigned an Accelerating, Decelerating, or None Net Effect within the primary vendor's (Vendor_Filter) accounts,
+    # based on the decision tree algorithm in ratings.py.
+    # See Appendix C of the accompanying methodology documentation for a graphical representation of this decision tree algorithm.
+
+    peer9 = ratings.netEffects(peer9, peermincitations, deltayoy)
+
+    peer11 = peer9.groupby([peer9['Survey_ID'], peer9['Entity_ID'], peer9['NetEffect'].fillna('---')]).size().unstack('NetEffect', fill_value = 0)
+    peer11 = peer11.reindex(columns = ['Accelerating', 'Decelerating'], fill_value = 0).reset_index()
+    peer11.columns.name = None
+
+    peer13 = peer11.rename(columns = {'Accelerating':'Peer_Accelerating', 'Decelerating':'Peer_Decelerating'})
+
+    # The Peer_Rating rating is assigned based on the decision tree algorithm in ratings.py.
+    # See Appendix C of the accompanying methodology documentation for a graphical representation of this decision tree algorithm.
+
+    peer13 = ratings.peerRatings(peer13, peerdelta)
+
+    return peer13
+
+
+def peerTheme(citations, entity_dict, peermincitations, deltayoy, peerdelta):
+    return peerScores(peerDeltas(peerMetrics(citations, entity_dict)), peermincitations, deltayoy, peerdelta)
+
+
+#####################################################
+## Alignment With Major Public Cloud Vendors Theme ##
+#####################################################
+
+
+def cloudGroups(citations, cloud_entities):
+
+    # Two customer groups are identified: a Cloud Group and a Control Group.
+    # The Cloud Group consists of customers who are Adopting or Increasing spend with a Public Cloud vendor (AWS, Microsoft, Google),
+    # while the Control Group consists of all others.
+    # Returns the citations of each metric per survey and vendor/product in each group, and the size of each survey's Cloud Group.
+
+    # The groups are counted on the respondent bitmap index (see bitmaps.py): each survey's Cloud Group is the union of the
+    # Public Cloud vendors' ADOPTION and INCREASE bitmaps, and a vendor's Cloud Group citations are the popcounts of its bitmaps
+    # ANDed with it. The Control Group has the rest of its citations.
+    index = bitmaps.buildIndex(citations)
+    if index["exact"]:
+        keys = index["keys"]
+        cloud = bitmaps.cohorts(index, cloud_entities[keys["Entity_ID"].values] & keys["Metric"].isin(["ADOPTION", "INCREASE"]).values)
+        cloud_counts = bitmaps.cohortCounts(index, cloud)
+        cloud_n = pd.DataFrame({"Survey_ID": index["surveys"], "Cloud_N": bitmaps.popcount(cloud)})
+        cloud_n = cloud_n[cloud_n["Cloud_N"] > 0].reset_index(drop = True)
+        return bitmaps.metricCounts(index, cloud_counts, metric_list), bitmaps.metricCounts(index, keys["Citations"].values - cloud_counts, metric_list), cloud_n
+
+    # Respondents with repeated citations of a vendor/product and metric are counted once by the bitmaps,
+    # so their citations are matched to the groups by a merge instead.
+    cloud1 = citations[cloud_entities[citations["Entity_ID"].values]]
+    cloud1 = cloud1[(cloud1["Metric"] == "ADOPTION") | (cloud1["Metric"] == "INCREASE")]
+
+    cloud2 = cloud1.drop_duplicates(subset = ["Survey_ID", "Respondent_ID"])[["Survey_ID", "Respondent_ID"]]
+    cloud2["Group"] = "Cloud"
+    cloud_n = cloud2.groupby(["Survey_ID"]).size().reset_index(name = "Cloud_N")
+
+    cloud3 = citations.merge(cloud2, how = 'left', on = ["Survey_ID", "Respondent_ID"])
+    cloud3["Group"] = cloud3["Group"].fillna("Control")
+
+    cloud7 = entities.countMetrics(cloud3, ["Group", "Survey_ID", "Entity_ID"], metric_list)
+    return (cloud7[cloud7['Group'] == "Cloud"]).drop(['Group'], axis = 1), (cloud7[cloud7['Group'] == "Control"]).drop(['Group'], axis = 1), cloud_n
+
+
+def cloudMetrics(citations, entity_dict, cloudsector, cloudvendors):
+
+    # Each vendor's Net Score and Citations are calculated among each of the customer groups (see cloudGroups).
+
+    cloud_entities = ((entity_dict["Sector_Current"] == cloudsector) & entity_dict["Vendor_Current"].isin(cloudvendors)).values
+
+    cloud7a, cloud7b, cloud_n = cloudGroups(citations, cloud_entities)
+
+    for cloud7 in [cloud7a, cloud7b]:
+        cloud7['Citations'] = cloud7['ADOPTION'] + cloud7['INCREASE'] + cloud7['FLAT'] + cloud7['DECREASE'] + cloud7['REPLACING']
+        cloud7['NetScore'] = (cloud7['ADOPTION'] + cloud7['INCREASE'] - cloud7['DECREASE'] - cloud7['REPLACING']) / cloud7['Citations']
+
+    cloud7a = cloud7a.drop(['ADOPTION', 'INCREASE', 'FLAT', 'DECREASE', 'REPLACING'], axis = 1)
+    cloud7b = cloud7b.drop(['ADOPTION', 'INCREASE', 'FLAT', 'DECREASE', 'REPLACING'], axis = 1)
+
+    cloud7a = cloud7a.rename(columns = {"Citations":"Cloud_Citations", "NetScore":"Cloud_NetScore"}, copy = False)
+    cloud7b = cloud7b.rename(columns = {"Citations":"Control_Citations", "NetScore":"Control_NetScore"}, copy = False)
+
+    cloud8 = cloud7a.merge(cloud7b, how = 'outer', on = ["Survey_ID", "Entity_ID"])
+
+    cloud9 = cloud8.merge(cloud_n, on = ["Survey_ID"])
+    cloud9["Cloud_NetScore_Delta_Control"] = cloud9["Cloud_NetScore"] - cloud9["Control_NetScore"]
+    cloud9.loc[np.isnan(cloud9["Control_Citations"]) == True, "Control_Citations"] = 0
+    cloud9["Survey_Citations"] = cloud9["Cloud_Citations"] + cloud9["Control_Citations"]
+    cloud9["Cloud_Overlap"] = cloud9["Cloud_Citations"] / cloud9["Survey_Citations"]
+    cloud9["Cloud_Share"] = cloud9["Cloud_Citations"] / cloud9["Cloud_N"]
+    cloud9["Security_ID"] = entities.entityKey(cloud9, entity_dict, "Security_ID")
+
+    return cloud9
+
+
+def cloudDeltas(cloud9, entity_dict):
+
+    # Survey-over-Survey and Year-over-Year values for each metric are looked up to calculate deltas.
+    # Deltas are used to measure recent inflections and longer-term trends.
+    # Values are matched on the vendor/product and its current security identifiers (Security_ID).
+
+    cloud10b = lags.addLags(cloud9, ['Security_ID'], {'Cloud_Citations': 'Cloud_Citations', 'Cloud_NetScore': 'Cloud_NetScore', 'Cloud_Share': 'Cloud_Share'}).drop(["Security_ID"], axis = 1)
+    cloud10b["Cloud_NetScore_Delta_sos"] = cloud10b["Cloud_NetScore"] - cloud10b["Cloud_NetScore_sos"]
+    cloud10b["Cloud_NetScore_Delta_yoy"] = cloud10b["Cloud_NetScore"] - cloud10b["Cloud_NetScore_yoy"]
+
+    # The Sector and Vendor are looked up for the Public Cloud vendors' rating override.
+    cloud10b["Sector_Current"] = entities.entityKey(cloud10b, entity_dict, "Sector_Current")
+    cloud10b["Vendor_Current"] = entities.entityKey(cloud10b, entity_dict, "Vendor_Current")
+
+    return cloud10b
+
+
+def cloudScores(cloud10b, cloudsector, cloudvendors, cloudthresholds):
+
+    # The Cloud_Rating rating is assigned based on the decision tree algorithm in ratings.py, using the thresholds in parameters.py.
+    # See Appendix D of the accompanying methodology documentation for a graphical representation of this decision tree algorithm.
+
+    cloud11 = ratings.cloudRatings(cloud10b, cloudthresholds, cloudsector, cloudvendors).drop(["Cloud_Citations_sos", "Cloud_NetScore_sos", "Cloud_Citations_yoy", "Cloud_NetScore_yoy", "Control_Citations", "Sector_Current", "Vendor_Current"], axis = 1)
+
+    return cloud11
+
+
+def cloudTheme(citations, entity_dict, cloudsector, cloudvendors, cloudthresholds):
+    return cloudScores(cloudDeltas(cloudMetrics(citations, entity_dict, cloudsector, cloudvendors), entity_dict), cloudsector, cloudvendors, cloudthresholds)
@@ -0,0 +1,82 @@
+import os
+import sys
+import shutil
+import tempfile
+import numpy as np
+import pandas as pd
+import model
+import parallel
+
+
+
+# Walk-forward (out-of-sample) backtest.
+# The standard model is fit once on every survey before the most recent one and scores all surveys in-sample.
+# In walk-forward mode each survey is instead forecast by a model fit, with the same step-wise selection, only on the
+# surveys before it, so InsightForecast and InsightPerformance show the forecasts that would have been made at the time.
+# The forecast of the most recent survey is the same in both modes.
+#
+# The surveys are split into consecutive blocks, one per worker process (see parallel.runWorkers). Within a block each fit
+# is warm-started from the coefficients of the previous survey's fit, which differ from them by one survey of data.
+# Surveys with fewer than min_surveys earlier surveys of returns, or whose model cannot be fit, are not forecast.
+
+
+def foldSurveys(returns3, min_surveys):
+    # Survey_IDs that are forecast, each with at least min_surveys earlier surveys of returns to fit on.
+    labelled = np.unique(returns3.loc[pd.notnull(returns3["PosNeg_EndZ"]), "Survey_ID"].values)
+    return [survey_id for survey_id in np.unique(returns3["Survey_ID"].values) if (labelled < survey_id).sum() >= min_surveys]
+
+
+def forecastSurveys(returns3, survey_ids, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff):
+    # Fits and forecasts the given surveys in order, each fit warm-started from the previous one.
+    forecasts = []
+    start_params = None
+    for survey_id in survey_ids:
+        try:
+            result, selected_ratings = model.fitModel(returns3, survey_id, verbose = False, start_params = start_params)
+        except Exception as e:
+            print("Survey " + str(survey_id) + " was not forecast: " + repr(e))
+            continue
+        start_params = dict(result.params)
+        survey = returns3[returns3["Survey_ID"] == survey_id]
+        forecasts.append(model.forecast(survey, result, selected_ratings, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff))
+    return forecasts
+
+
+def runBlock(folder, block):
+    # Worker: forecasts one block of surveys and pickles the forecasts to the folder.
+    inputs = pd.read_pickle(os.path.join(folder, "inputs.pkl"))
+    survey_ids = inputs["blocks"][int(block)]
+    forecasts = forecastSurveys(inputs["returns"], survey_ids, inputs["surveys"], inputs["entities"], inputs["spReturns"], inputs["upperpcutoff"], inputs["lowerpcutoff"])
+    pd.to_pickle(forecasts, os.path.join(folder, "block" + str(block) + ".pkl"))
+
+
+def walkForward(returns3, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff, min_surveys, processes = None):
+    # Returns the walk-forward forecasts, in the layout of model.forecast.
+    survey_ids = foldSurveys(returns3, min_surveys)
+    if processes is None:
+        processes = os.cpu_count() or 1
+    blocks = [list(block) for block in np.array_split(survey_ids, max(1, min(processes, len(survey_ids)))) if len(block)]
+
+    if len(blocks) <= 1:
+        forecasts = forecastSurveys(returns3, survey_ids, survey_dict, entity_dict, spReturns, upperpcutoff, lowerpcutoff)
+    else:
+        folder = tempfile.mkdtemp(prefix = "QuantInsights_WalkForward_")
+        try:
+            inputs = {"returns": returns3, "surveys": survey_dict, "entities": entity_dict, "spReturns": spReturns,
+                      "upperpcutoff": upperpcutoff, "lowerpcutoff": lowerpcutoff, "blocks": blocks}
+            pd.to_pickle(inputs, os.path.join(folder, "inputs.pkl"))
+            parallel.runWorkers(os.path.abspath(__file__), folder, range(len(blocks)))
+            forecasts = []
+            for block in range(len(blocks)):
+                forecasts += pd.read_pickle(os.path.join(folder, "block" + str(block) + ".pkl"))
+        finally:
+            shutil.rmtree(folder, ignore_errors = True)
+
+    if not forecasts:
+        raise ValueError("No survey has " + str(min_surveys) + " earlier surveys of returns to fit a walk-forward model on.")
+    forecast3 = pd.concat(forecasts, sort = False)
+    return forecast3.sort_values(by = ["Survey_ID", "Insight_Forecast", "Bloomberg_ID_Historical"])
+
+
+if __name__ == "__main__":
+    runBlock(sys.argv[1], sys.argv[2])
@@ -0,0 +1,100 @@
+import numpy as np
+import scipy.sparse as sparse
+
+
+
+# Grouped weighted means and standard deviations.
+# sum(w), sum(w * x) and the centred sum(w * (x - mean)^2) are accumulated for every group and every column in two
+# sparse group-indicator products (one for the means, one around them), which replace per-group np.average / np.cov calls.
+# Missing values are left out of both the weights and the sums of their own column only,
+# so each column is averaged over its non-missing rows.
+
+
+def weightedSums(df, by, columns, weights):
+    # Returns one row per group with "<column>_SumW" (the sum of the weights), "<column>_Mean", "<column>_M2" (the weighted
+    # sum of squared deviations from the mean) and "<column>_Count" (the number of non-missing values) of each column.
+    # The sums of parts of df can be combined with combineSums before sumMoments, e.g. when the parts are computed on
+    # different workers (see shards.py).
+    grouped = df.groupby(by, sort = True)
+    group = grouped.ngroup().values
+    sums = grouped.size().reset_index()[by]
+
+    x = df[columns].values.astype(float)
+    w = df[weights].values.astype(float)[:, None]
+    valid = ~np.isnan(x)
+    x = np.where(valid, x, 0)
+    wv = w * valid
+
+    indicator = sparse.csr_matrix((np.ones(len(df)), (group, np.arange(len(df)))), shape = (len(sums), len(df)))
+    k = len(columns)
+    totals = indicator.dot(np.hstack([wv, wv * x, valid, x]))
+    sw, swx, count, sx = totals[:, :k], totals[:, k:2 * k], totals[:, 2 * k:3 * k], totals[:, 3 * k:]
+
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        # A group's only value is its mean (swx / sw can differ from it in the last bit), so it has no variance.
+        mean = np.where((count == 1) & (sw > 0), sx, swx / sw)
+    deviation = np.where(valid, x - mean[group], 0)
+    m2 = indicator.dot(wv * deviation * deviation)
+
+    for i, column in enumerate(columns):
+        sums[column + "_SumW"] = sw[:, i]
+        sums[column + "_Mean"] = mean[:, i]
+        sums[column + "_M2"] = m2[:, i]
+        sums[column + "_Count"] = count[:, i]
+
+    return sums
+
+
+def combineSums(parts, by, columns):
+    # Combines the weightedSums of parts of a frame (concatenated in parts) into the weightedSums of the whole frame:
+    # each group's mean is the weighted mean of its parts' means, and its M2 adds up the parts' M2 and the weighted squared
+    # deviations of their means from it (the parallel form of the centred sums).
+    grouped = parts.groupby(by, sort = True)
+    group = grouped.ngroup().values
+    sums = grouped.size().reset_index()[by]
+    indicator = sparse.csr_matrix((np.ones(len(parts)), (group, np.arange(len(parts)))), shape = (len(sums), len(parts)))
+
+    sw = parts[[column + "_SumW" for column in columns]].values
+    mean = parts[[column + "_Mean" for column in columns]].values
+    m2 = parts[[column + "_M2" for column in columns]].values
+    count = parts[[column + "_Count" for column in columns]].values
+    has_weight = sw > 0
+
+    total_sw = indicator.dot(sw)
+    total_count = indicator.dot(count)
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        # A group with one value keeps that value (the mean of its only part with values) as its mean.
+        total_mean = np.where((total_count == 1) & (total_sw > 0), indicator.dot(np.where(count > 0, mean, 0)),
+                              indicator.dot(np.where(has_weight, sw * mean, 0)) / total_sw)
+    deviation = np.where(has_weight, mean - total_mean[group], 0)
+    total_m2 = indicator.dot(np.where(has_weight, m2, 0) + sw * deviation * deviation)
+
+    for i, column in enumerate(columns):
+        sums[column + "_SumW"] = total_sw[:, i]
+        sums[column + "_Mean"] = total_mean[:, i]
+        sums[column + "_M2"] = total_m2[:, i]
+        sums[column + "_Count"] = total_count[:, i]
+
+    return sums
+
+
+def sumMoments(sums, by, columns):
+    # The weighted means and standard deviations of each group from its weightedSums, as weightedMoments returns them.
+    moments = sums[by].reset_index(drop = True)
+    sw = sums[[column + "_SumW" for column in columns]].values
+    m2 = sums[[column + "_M2" for column in columns]].values
+
+    with np.errstate(invalid = 'ignore', divide = 'ignore'):
+        variance = np.where(sw > 0, m2 / sw, np.nan)
+
+    for i, column in enumerate(columns):
+        moments[column + "_Mean"] = sums[column + "_Mean"].values
+        moments[column + "_StdDev"] = np.sqrt(variance[:, i])
+
+    return moments
+
+
+def weightedMoments(df, by, columns, weights):
+    # Returns one row per group with "<column>_Mean" and "<column>_StdDev" for each column.
+    # The standard deviation is the population (ddof = 0) weighted standard deviation, as np.cov(x, aweights = w, ddof = 0).
+    return sumMoments(weightedSums(df, by, columns, weights), by, columns)